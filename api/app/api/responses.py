@@ -0,0 +1,62 @@
+"""
+Réponses JSON rapides pour les listes.
+Les éléments sont des dictionnaires construits directement depuis les
+lignes SQL (colonnes choisies), renvoyés par ORJSONResponse sans repasser
+par response_model: pas de seconde validation ni de sérialisation
+intermédiaire. Le response_model reste déclaré sur la route (documentation
+OpenAPI) et la forme des dictionnaires doit lui correspondre.
+orjson sérialise directement datetime et les Enum (par leur valeur).
+
+Le paramètre fields= restreint les colonnes lues et renvoyées (cartes de
+liste sans la description complète, par exemple); l'identifiant est
+toujours inclus.
+"""
+from typing import Any, Iterable, Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import case, func
+
+
+def preview(column, length: int, label: str):
+    """Premiers caractères d'un texte, calculés en SQL ("..." si tronqué)."""
+    return case(
+        (func.length(column) > length, func.substr(column, 1, length) + "..."),
+        else_=column,
+    ).label(label)
+
+
+def select_fields(fields: Optional[str], columns: dict, default: Iterable[str]) -> list:
+    """
+    Colonnes à sélectionner pour fields= (noms séparés par des virgules).
+    Sans fields=, les colonnes par défaut; un nom inconnu donne une 400.
+    """
+    if not fields:
+        names = list(default)
+    else:
+        names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in names if name not in columns]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Champs inconnus: {', '.join(unknown)} (disponibles: {', '.join(columns)})"
+            )
+        if "id" not in names:
+            names.insert(0, "id")
+    return [columns[name] for name in names]
+
+
+def row_dicts(rows: Iterable) -> list[dict[str, Any]]:
+    """Lignes (result.mappings()) en dictionnaires, clés = libellés des colonnes."""
+    return [dict(row) for row in rows]
+
+
+def page_response(items: list[dict], total: int, page: int, per_page: int) -> ORJSONResponse:
+    """Réponse paginée au format DeclarationListResponse."""
+    return ORJSONResponse({
+        "items": items,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": (total + per_page - 1) // per_page,
+    })
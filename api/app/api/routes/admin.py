@@ -0,0 +1,449 @@
+"""
+Routes d'administration des données.
+Export en flux et import en masse des déclarations, indices et journaux d'activité.
+Sauvegardes à chaud de la base. Statistiques du tableau de bord.
+Consultation du journal d'activité.
+"""
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import anyio
+from fastapi import (
+    APIRouter, Depends, HTTPException, status, Request, Query,
+    UploadFile, File, BackgroundTasks,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import get_db
+from app.models.declaration import DeclarationType, DeclarationStatus
+from app.models.activity_log import ActivityLog, ActivityAction, ActivityLogSegment
+from app.models.import_job import ImportJob, ImportStatus
+from app.models.user import User
+from app.schemas.admin import (
+    ImportJobResponse,
+    ImportJobDetailResponse,
+    BackupResponse,
+    BackupFile,
+    ActivityLogPage,
+    ActivityLogSegmentResponse,
+    ActivityArchiveResponse,
+    StatsResponse,
+)
+from app.services.export import (
+    EXPORT_DATASETS,
+    resolve_columns,
+    build_export_query,
+    ndjson_chunks,
+    csv_chunks,
+    gzip_chunks,
+)
+from app.services.backup import (
+    BackupError,
+    backup_directory,
+    list_snapshots,
+    run_backup,
+    is_backup_running,
+)
+from app.services.stats import get_stats, rebuild_stats
+from app.services.activity_logs import (
+    ActivityLogFilters,
+    InvalidCursor,
+    build_activity_query,
+    decode_cursor,
+    encode_cursor,
+)
+from app.services.activity_archive import (
+    SegmentCorrupted,
+    merge_archived,
+    run_archive,
+)
+from app.services.importer import IMPORT_DATASETS, IMPORT_FORMATS, run_import, is_import_running
+from app.api.deps import require_admin, require_moderator_or_admin, get_client_info
+
+router = APIRouter(prefix="/admin", tags=["Administration"])
+settings = get_settings()
+
+IMPORT_DIR = Path(settings.IMPORT_DIR)
+IMPORT_DIR.mkdir(parents=True, exist_ok=True)
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+@router.get("/export/{dataset}")
+async def export_data(
+    dataset: str,
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    fields: Optional[str] = Query(None, description="Colonnes séparées par des virgules"),
+    status_filter: Optional[DeclarationStatus] = Query(None, alias="status"),
+    type: Optional[DeclarationType] = None,
+    declaration_id: Optional[str] = None,
+    action: Optional[ActivityAction] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    gzip: bool = False,
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Export en flux d'un jeu de données (admin).
+    
+    - dataset: declarations, tips ou activity_logs
+    - format: ndjson ou csv
+    - fields: sélection de colonnes
+    - status, type (déclarations), declaration_id (indices), action (journaux)
+    - date_from / date_to: période sur la date de création
+    - gzip: compression à la volée
+    """
+    definition = EXPORT_DATASETS.get(dataset)
+    if definition is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Jeu de données inconnu"
+        )
+    
+    try:
+        columns = resolve_columns(definition, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    # Filtres applicables à chaque jeu de données
+    if dataset == "declarations":
+        filters = {"status": status_filter, "type": type}
+    elif dataset == "tips":
+        filters = {"declaration_id": declaration_id}
+    else:
+        filters = {"action": action}
+    
+    query = build_export_query(definition, columns, filters, date_from, date_to)
+    
+    # Logger l'export (avant l'envoi: la session de la requête est fermée ensuite)
+    log = ActivityLog(
+        action=ActivityAction.DATA_EXPORTED,
+        user_id=current_user.id,
+        username=current_user.username,
+        target_type=dataset,
+        details={
+            "format": format,
+            "columns": columns,
+            "filters": {k: getattr(v, "value", v) for k, v in filters.items() if v is not None},
+            "date_from": date_from.isoformat() if date_from else None,
+            "date_to": date_to.isoformat() if date_to else None,
+            "gzip": gzip,
+        },
+        **get_client_info(request)
+    )
+    db.add(log)
+    await db.commit()
+    
+    chunks = ndjson_chunks(query, columns) if format == "ndjson" else csv_chunks(query, columns)
+    media_type = EXPORT_MEDIA_TYPES[format]
+    
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    filename = f"{dataset}_{timestamp}.{format}"
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        media_type = "application/gzip"
+        filename += ".gz"
+    
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+        },
+    )
+
+
+async def get_import_job(job_id: str, db: AsyncSession) -> ImportJob:
+    job = await db.get(ImportJob, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import introuvable"
+        )
+    return job
+
+
+@router.post(
+    "/import/{dataset}",
+    response_model=ImportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def import_data(
+    dataset: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    batch_size: Optional[int] = Query(None, ge=1, le=10000),
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Import en masse de déclarations ou d'indices (admin).
+    
+    - dataset: declarations ou tips
+    - format: ndjson ou csv (déduit de l'extension si absent)
+    - batch_size: lignes par lot inséré
+    
+    Le fichier est traité en arrière-plan; suivre l'avancement via
+    GET /admin/import/jobs/{job_id}.
+    """
+    if dataset not in IMPORT_DATASETS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Jeu de données inconnu"
+        )
+    
+    fmt = format or IMPORT_FORMATS.get(Path(file.filename or "").suffix.lower())
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Format non reconnu (ndjson ou csv)"
+        )
+    
+    job = ImportJob(
+        dataset=dataset,
+        format=fmt,
+        source_path="",
+        batch_size=batch_size or settings.IMPORT_BATCH_SIZE,
+        created_by=current_user.id,
+    )
+    db.add(job)
+    await db.flush()
+    
+    # Copie en flux du fichier source (conservé pour la reprise)
+    source_path = IMPORT_DIR / f"{job.id}.{fmt}"
+    
+    def copy_source():
+        with open(source_path, "wb") as out:
+            shutil.copyfileobj(file.file, out, 1024 * 1024)
+    
+    await anyio.to_thread.run_sync(copy_source)
+    job.source_path = str(source_path.resolve())
+    
+    db.add(ActivityLog(
+        action=ActivityAction.DATA_IMPORTED,
+        user_id=current_user.id,
+        username=current_user.username,
+        target_type=dataset,
+        target_id=job.id,
+        details={"format": fmt, "filename": file.filename, "stage": "started"},
+        **get_client_info(request)
+    ))
+    await db.commit()
+    await db.refresh(job)
+    
+    background_tasks.add_task(run_import, job.id)
+    return job
+
+
+@router.get("/import/jobs/{job_id}", response_model=ImportJobDetailResponse)
+async def get_import_status(
+    job_id: str,
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Avancement d'un import et erreurs par ligne (admin)."""
+    return await get_import_job(job_id, db)
+
+
+@router.post(
+    "/import/jobs/{job_id}/resume",
+    response_model=ImportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def resume_import(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Reprend un import interrompu (échec ou redémarrage du serveur)
+    à partir du dernier lot validé.
+    """
+    job = await get_import_job(job_id, db)
+    if job.status == ImportStatus.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Import déjà terminé"
+        )
+    if is_import_running(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Import déjà en cours"
+        )
+    if not Path(job.source_path).exists():
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Fichier source introuvable"
+        )
+    
+    background_tasks.add_task(run_import, job.id)
+    return job
+
+
+@router.post(
+    "/backups",
+    response_model=BackupResponse,
+    status_code=status.HTTP_201_CREATED
+)
+async def create_backup(
+    request: Request,
+    current_user: User = Depends(require_admin)
+):
+    """
+    Sauvegarde à chaud de la base (admin).
+    La copie se fait par étapes sans bloquer les écritures;
+    la restauration se fait hors ligne: python -m app.cli restore <fichier>.
+    """
+    if is_backup_running():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Sauvegarde déjà en cours"
+        )
+    try:
+        return await run_backup(
+            user_id=current_user.id,
+            username=current_user.username,
+            client_info=get_client_info(request),
+        )
+    except BackupError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get("/backups", response_model=list[BackupFile])
+async def get_backups(current_user: User = Depends(require_admin)):
+    """Sauvegardes disponibles, de la plus récente à la plus ancienne (admin)."""
+    return await anyio.to_thread.run_sync(list_snapshots, backup_directory())
+
+
+async def run_scheduled_backup() -> None:
+    """Sauvegarde planifiée (tâche périodique)."""
+    if not is_backup_running():
+        await run_backup()
+
+
+@router.get("/stats", response_model=StatsResponse)
+async def get_dashboard_stats(
+    days: int = Query(30, ge=7, le=366, description="Période de la série journalière"),
+    current_user: User = Depends(require_moderator_or_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Statistiques du tableau de bord (totaux par statut, type, priorité,
+    catégorie et soumissions par jour). Lues depuis les tables agrégées
+    et gardées en cache quelques secondes.
+    """
+    return await get_stats(db, days)
+
+
+@router.post("/stats/rebuild", response_model=StatsResponse)
+async def rebuild_dashboard_stats(
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Recalcule les tables agrégées depuis les déclarations et indices (admin)."""
+    await rebuild_stats(db)
+    return await get_stats(db, 30)
+
+
+@router.get("/activity-logs", response_model=ActivityLogPage)
+async def list_activity_logs(
+    action: Optional[ActivityAction] = None,
+    user_id: Optional[str] = None,
+    target_type: Optional[str] = None,
+    target_id: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    include_archived: bool = True,
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Journal d'activité filtré, du plus récent au plus ancien (admin).
+    
+    - action, user_id, target_type (+ target_id), ip_address
+    - date_from / date_to: période sur la date de l'action
+    - cursor: valeur next_cursor de la page précédente
+    - include_archived: compléter avec les mois archivés (lus à la demande)
+    """
+    if target_id and not target_type:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="target_id nécessite target_type"
+        )
+    
+    filters = ActivityLogFilters(
+        action=action,
+        user_id=user_id,
+        target_type=target_type,
+        target_id=target_id,
+        ip_address=ip_address,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    try:
+        query = build_activity_query(filters, limit, cursor)
+        cursor_key = decode_cursor(cursor) if cursor else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    result = await db.execute(query)
+    logs = result.scalars().all()
+    
+    if include_archived:
+        try:
+            logs = await merge_archived(db, filters, limit, cursor_key, logs)
+        except SegmentCorrupted as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=str(e)
+            )
+    
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        next_cursor = encode_cursor(logs[-1].created_at, logs[-1].id)
+    
+    return ActivityLogPage(items=logs, next_cursor=next_cursor)
+
+
+@router.get("/activity-logs/segments", response_model=list[ActivityLogSegmentResponse])
+async def list_activity_segments(
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Segments d'archive du journal d'activité, du plus récent au plus ancien (admin)."""
+    result = await db.execute(
+        select(ActivityLogSegment).order_by(ActivityLogSegment.last_created_at.desc())
+    )
+    return result.scalars().all()
+
+
+@router.post("/activity-logs/archive", response_model=ActivityArchiveResponse)
+async def archive_activity_logs(current_user: User = Depends(require_admin)):
+    """Scelle et purge les mois clos du journal d'activité (admin)."""
+    return await run_archive()
+
+
+async def run_scheduled_archive() -> None:
+    """Archivage planifié du journal d'activité (tâche périodique)."""
+    await run_archive()
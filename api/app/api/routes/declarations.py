@@ -7,23 +7,52 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, func, or_, false
 
+from app.core.config import get_settings
 from app.core.database import get_db
-from app.core.security import generate_tracking_code, sanitize_input
+from app.core.security import generate_tracking_code
 from app.models.declaration import Declaration, DeclarationType, DeclarationStatus, DeclarationPriority
-from app.models.tip import Tip
 from app.models.activity_log import ActivityLog, ActivityAction
 from app.models.user import User
+from app.services.categories import find_category, resolve_category
+from app.services.duplicates import compute_signature, find_duplicates, store_signature
+from app.services.matching import apply_status_change, match_index
+from app.services.suggestions import add_suggestions, suggest
+from app.services.moderation import (
+    UPDATED,
+    bulk_update_declarations,
+    claim_next,
+    release_lease,
+    renew_lease,
+    status_action,
+)
+from app.services.stats import StatsDelta, state_of_declaration
+from app.services.status_history import (
+    TRACK_HISTORY_LIMIT,
+    add_status_event,
+    admin_entry,
+    get_status_events,
+    public_entry,
+)
 from app.schemas.declaration import (
     DeclarationCreate,
     DeclarationUpdate,
-    DeclarationPublicResponse,
+    DeclarationBulkUpdate,
+    BulkItemResult,
+    BulkUpdateResponse,
+    QueueClaimResponse,
+    LeaseResponse,
     DeclarationAdminResponse,
     DeclarationTrackResponse,
     DeclarationListResponse,
+    SuggestionItem,
+    SuggestionResponse,
 )
 from app.api.deps import get_current_user, require_moderator_or_admin, get_client_info
+from app.api.responses import page_response, preview, row_dicts, select_fields
+
+settings = get_settings()
 
 router = APIRouter(prefix="/declarations", tags=["Déclarations"])
 
@@ -57,38 +86,62 @@ async def create_declaration(
     if declaration_data.attachments:
         for att in declaration_data.attachments[:5]:  # Max 5 fichiers
             attachments.append({
-                "filename": sanitize_input(att.filename, 255),
+                "filename": att.filename,
                 "content_type": att.content_type,
                 "size": att.size,
                 "data": att.data,  # Base64
+                "stored_name": att.stored_name,
             })
     
+    # Champs texte déjà nettoyés par le schéma (une seule fois)
+    category = declaration_data.category
+    description = declaration_data.description
+    location = declaration_data.location
+    
+    # Catégorie du référentiel (correspondance en mémoire, créée si inconnue)
+    category_id = await resolve_category(db, category)
+    
+    # Quasi-doublons (index LSH): signalés aux modérateurs, jamais bloquants
+    signature = compute_signature(description, category, location)
+    duplicates = await find_duplicates(db, declaration_data.type, signature)
+    
+    metadata = {
+        "ip_address": client_info["ip_address"],
+        "user_agent": client_info["user_agent"],
+        "submitted_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if duplicates:
+        metadata["possible_duplicates"] = duplicates
+    
     # Créer la déclaration
     declaration = Declaration(
         tracking_code=tracking_code,
         type=declaration_data.type,
-        category=sanitize_input(declaration_data.category, 100),
-        description=sanitize_input(declaration_data.description, 5000),
+        category=category,
+        category_id=category_id,
+        description=description,
         incident_date=declaration_data.incident_date,
-        location=sanitize_input(declaration_data.location, 500) if declaration_data.location else None,
-        reward=sanitize_input(declaration_data.reward, 100) if declaration_data.reward else None,
-        declarant_name=sanitize_input(declaration_data.declarant_name, 255) if declaration_data.declarant_name else None,
+        location=location,
+        reward=declaration_data.reward,
+        declarant_name=declaration_data.declarant_name,
         declarant_phone=declaration_data.declarant_phone,
         declarant_email=declaration_data.declarant_email.lower() if declaration_data.declarant_email else None,
         attachments=attachments,
-        metadata={
-            "ip_address": client_info["ip_address"],
-            "user_agent": client_info["user_agent"],
-            "submitted_at": datetime.now(timezone.utc).isoformat(),
-        },
-        status_history=[{
-            "status": DeclarationStatus.EN_ATTENTE.value,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "comment": "Déclaration soumise",
-        }],
+        metadata_=metadata,
     )
     
     db.add(declaration)
+    # Flush: identifiant nécessaire à l'historique et au journal
+    await db.flush()
+    store_signature(db, declaration.id, declaration.type, signature)
+    submitted = add_status_event(
+        db, declaration.id, DeclarationStatus.EN_ATTENTE, "Déclaration soumise"
+    )
+    
+    # Statistiques du tableau de bord (même transaction)
+    stats = StatsDelta()
+    stats.declaration(state_of_declaration(declaration))
+    await stats.apply(db)
     
     # Logger l'action
     log = ActivityLog(
@@ -105,6 +158,7 @@ async def create_declaration(
     db.add(log)
     
     await db.commit()
+    add_suggestions(category, location)
     await db.refresh(declaration)
     
     return DeclarationTrackResponse(
@@ -115,10 +169,23 @@ async def create_declaration(
         priority=declaration.priority,
         created_at=declaration.created_at,
         last_update=declaration.updated_at,
-        status_history=[{
-            "status": h["status"],
-            "timestamp": h["timestamp"],
-        } for h in declaration.status_history],
+        status_history=[public_entry(submitted)],
+    )
+
+
+@router.get("/suggest", response_model=SuggestionResponse)
+async def suggest_values(
+    field: str = Query(..., pattern="^(category|location)$"),
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=settings.SUGGEST_TOP_K),
+):
+    """
+    Suggestions de catégorie ou de lieu pour la saisie (public).
+    Recherche par préfixe sans accents ni casse, en mémoire.
+    """
+    return SuggestionResponse(
+        field=field,
+        items=[SuggestionItem(value=v, count=c) for v, c in suggest(field, q, limit)],
     )
 
 
@@ -142,11 +209,9 @@ async def track_declaration(
             detail="Déclaration non trouvée"
         )
     
-    # Filtrer l'historique pour ne pas exposer les commentaires admin
-    safe_history = [{
-        "status": h["status"],
-        "timestamp": h["timestamp"],
-    } for h in declaration.status_history]
+    # Historique borné, sans les commentaires admin
+    events = await get_status_events(db, declaration.id, limit=TRACK_HISTORY_LIMIT)
+    safe_history = [public_entry(e) for e in events]
     
     return DeclarationTrackResponse(
         tracking_code=declaration.tracking_code,
@@ -160,74 +225,87 @@ async def track_declaration(
     )
 
 
+def _list_fields(location) -> dict:
+    """Colonnes d'un élément de liste (DeclarationPublicResponse), par nom de champ."""
+    return {
+        "id": Declaration.id,
+        "tracking_code": Declaration.tracking_code,
+        "type": Declaration.type,
+        "category": Declaration.category,
+        "description": Declaration.description,
+        "description_preview": preview(
+            Declaration.description, settings.LIST_PREVIEW_LENGTH, "description_preview"
+        ),
+        "incident_date": Declaration.incident_date,
+        "location": location,
+        "reward": Declaration.reward,
+        "status": Declaration.status,
+        "priority": Declaration.priority,
+        "created_at": Declaration.created_at,
+    }
+
+
+# Localisation anonymisée (50 premiers caractères) pour la liste publique
+_PUBLIC_FIELDS = _list_fields(preview(Declaration.location, 50, "location"))
+_ADMIN_FIELDS = _list_fields(Declaration.location)
+
+# Sans fields=: tous les champs sauf l'aperçu
+_LIST_DEFAULT = tuple(name for name in _PUBLIC_FIELDS if name != "description_preview")
+
+_FIELDS_QUERY = Query(
+    None,
+    max_length=500,
+    description="Champs renvoyés, séparés par des virgules (id toujours inclus), "
+                "dont description_preview",
+)
+
+
+async def _category_filter(db: AsyncSession, label: str):
+    """Filtre sur l'identifiant de catégorie (index entier), faux si le libellé est inconnu."""
+    category_id = await find_category(db, label)
+    return false() if category_id is None else Declaration.category_id == category_id
+
+
 @router.get("/public", response_model=DeclarationListResponse)
 async def list_public_declarations(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     type: Optional[DeclarationType] = None,
+    category: Optional[str] = Query(None, max_length=100),
+    fields: Optional[str] = _FIELDS_QUERY,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Liste les déclarations publiques (validées, type perte uniquement).
     Les données sensibles sont masquées.
+    Le filtre de catégorie accepte un synonyme ("portable" pour "Téléphone").
+    fields= restreint les champs renvoyés, par exemple
+    "category,reward,location,created_at,description_preview" pour les cartes.
     """
-    # Construire la requête de base
-    base_query = select(Declaration).where(
-        and_(
-            Declaration.status == DeclarationStatus.VALIDEE,
-            Declaration.type == DeclarationType.PERTE,
-        )
-    )
-    
+    columns = select_fields(fields, _PUBLIC_FIELDS, _LIST_DEFAULT)
+    filters = [
+        Declaration.status == DeclarationStatus.VALIDEE,
+        Declaration.type == DeclarationType.PERTE,
+    ]
     if type:
-        base_query = base_query.where(Declaration.type == type)
+        filters.append(Declaration.type == type)
+    if category:
+        filters.append(await _category_filter(db, category))
     
     # Compter le total
-    count_query = select(func.count()).select_from(base_query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar()
+    total = await db.scalar(select(func.count()).select_from(Declaration).where(*filters))
     
-    # Pagination
+    # Pagination: colonnes demandées seulement, localisation anonymisée en SQL
     offset = (page - 1) * per_page
-    query = base_query.order_by(
-        Declaration.priority.desc(),
+    # Tri par urgence (rang entier, pas le nom de l'énumération) servi par
+    # idx_declaration_public: pas de tri en B-tree temporaire
+    query = select(*columns).where(*filters).order_by(
+        Declaration.priority_rank.desc(),
         Declaration.created_at.desc()
     ).offset(offset).limit(per_page)
     
     result = await db.execute(query)
-    declarations = result.scalars().all()
-    
-    # Construire la réponse avec données anonymisées
-    items = []
-    for decl in declarations:
-        # Anonymiser la localisation
-        location = decl.location
-        if location and len(location) > 50:
-            location = location[:50] + "..."
-        
-        items.append(DeclarationPublicResponse(
-            id=decl.id,
-            tracking_code=decl.tracking_code,
-            type=decl.type,
-            category=decl.category,
-            description=decl.description,
-            incident_date=decl.incident_date,
-            location=location,
-            reward=decl.reward,
-            status=decl.status,
-            priority=decl.priority,
-            created_at=decl.created_at,
-        ))
-    
-    pages = (total + per_page - 1) // per_page
-    
-    return DeclarationListResponse(
-        items=items,
-        total=total,
-        page=page,
-        per_page=per_page,
-        pages=pages,
-    )
+    return page_response(row_dicts(result.mappings()), total, page, per_page)
 
 
 # === Routes Admin ===
@@ -239,14 +317,16 @@ async def list_all_declarations(
     status: Optional[DeclarationStatus] = None,
     type: Optional[DeclarationType] = None,
     priority: Optional[DeclarationPriority] = None,
+    category: Optional[str] = Query(None, max_length=100),
     search: Optional[str] = None,
+    fields: Optional[str] = _FIELDS_QUERY,
     current_user: User = Depends(require_moderator_or_admin),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Liste toutes les déclarations (admin).
     """
-    base_query = select(Declaration)
+    columns = select_fields(fields, _ADMIN_FIELDS, _LIST_DEFAULT)
     
     # Filtres
     filters = []
@@ -256,6 +336,8 @@ async def list_all_declarations(
         filters.append(Declaration.type == type)
     if priority:
         filters.append(Declaration.priority == priority)
+    if category:
+        filters.append(await _category_filter(db, category))
     if search:
         search_term = f"%{search}%"
         filters.append(or_(
@@ -265,45 +347,48 @@ async def list_all_declarations(
             Declaration.declarant_name.ilike(search_term),
         ))
     
-    if filters:
-        base_query = base_query.where(and_(*filters))
-    
     # Compter
-    count_query = select(func.count()).select_from(base_query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar()
+    total = await db.scalar(select(func.count()).select_from(Declaration).where(*filters))
     
     # Pagination
     offset = (page - 1) * per_page
-    query = base_query.order_by(
+    query = select(*columns).where(*filters).order_by(
         Declaration.created_at.desc()
     ).offset(offset).limit(per_page)
     
     result = await db.execute(query)
-    declarations = result.scalars().all()
-    
-    items = [DeclarationPublicResponse(
-        id=d.id,
-        tracking_code=d.tracking_code,
-        type=d.type,
-        category=d.category,
-        description=d.description,
-        incident_date=d.incident_date,
-        location=d.location,
-        reward=d.reward,
-        status=d.status,
-        priority=d.priority,
-        created_at=d.created_at,
-    ) for d in declarations]
-    
-    pages = (total + per_page - 1) // per_page
-    
-    return DeclarationListResponse(
-        items=items,
-        total=total,
-        page=page,
-        per_page=per_page,
-        pages=pages,
+    return page_response(row_dicts(result.mappings()), total, page, per_page)
+
+
+def _admin_response(declaration: Declaration, events) -> DeclarationAdminResponse:
+    """Fiche admin construite depuis la ligne chargée (compteurs dénormalisés)."""
+    return DeclarationAdminResponse(
+        id=declaration.id,
+        tracking_code=declaration.tracking_code,
+        type=declaration.type,
+        category=declaration.category,
+        category_id=declaration.category_id,
+        description=declaration.description,
+        incident_date=declaration.incident_date,
+        location=declaration.location,
+        reward=declaration.reward,
+        status=declaration.status,
+        priority=declaration.priority,
+        created_at=declaration.created_at,
+        declarant_name=declaration.declarant_name,
+        declarant_phone=declaration.declarant_phone,
+        declarant_email=declaration.declarant_email,
+        admin_notes=declaration.admin_notes,
+        metadata=declaration.metadata_,
+        status_history=[admin_entry(e) for e in events],
+        attachments=declaration.attachments,
+        updated_at=declaration.updated_at,
+        tips_count=declaration.tips_count,
+        unread_tips_count=declaration.unread_tips_count,
+        messages_count=declaration.messages_count,
+        unread_messages_count=declaration.unread_messages_count,
+        claimed_by=declaration.claimed_by,
+        claim_expires_at=declaration.claim_expires_at,
     )
 
 
@@ -316,10 +401,7 @@ async def get_declaration_admin(
     """
     Détails complets d'une déclaration (admin).
     """
-    result = await db.execute(
-        select(Declaration).where(Declaration.id == declaration_id)
-    )
-    declaration = result.scalar_one_or_none()
+    declaration = await db.get(Declaration, declaration_id)
     
     if not declaration:
         raise HTTPException(
@@ -327,43 +409,111 @@ async def get_declaration_admin(
             detail="Déclaration non trouvée"
         )
     
-    # Compter les tips
-    tips_result = await db.execute(
-        select(func.count()).where(Tip.declaration_id == declaration_id)
+    return _admin_response(declaration, await get_status_events(db, declaration_id))
+
+
+@router.post("/admin/queue/claim", response_model=QueueClaimResponse)
+async def claim_next_declaration(
+    current_user: User = Depends(require_moderator_or_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Réserve la prochaine déclaration en attente (urgence puis ancienneté).
+    Un bail en cours du modérateur est prolongé et renvoyé.
+    """
+    claim = await claim_next(db, current_user)
+    await db.commit()
+    if claim is None:
+        return QueueClaimResponse()
+    
+    declaration_id, lease_expires_at = claim
+    declaration = await db.get(Declaration, declaration_id)
+    events = await get_status_events(db, declaration_id)
+    return QueueClaimResponse(
+        declaration=_admin_response(declaration, events),
+        lease_expires_at=lease_expires_at,
+    )
+
+
+@router.post("/admin/queue/{declaration_id}/renew", response_model=LeaseResponse)
+async def renew_declaration_lease(
+    declaration_id: str,
+    current_user: User = Depends(require_moderator_or_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Prolonge le bail du modérateur sur une déclaration.
+    Un bail expiré ne se prolonge pas (409): réserver à nouveau.
+    """
+    lease_expires_at = await renew_lease(db, declaration_id, current_user)
+    if lease_expires_at is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Bail expiré ou déclaration non réservée par vous"
+        )
+    await db.commit()
+    return LeaseResponse(declaration_id=declaration_id, lease_expires_at=lease_expires_at)
+
+
+@router.post("/admin/queue/{declaration_id}/release", status_code=status.HTTP_204_NO_CONTENT)
+async def release_declaration_lease(
+    declaration_id: str,
+    current_user: User = Depends(require_moderator_or_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Rend une déclaration réservée à la file.
+    """
+    if not await release_lease(db, declaration_id, current_user):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Déclaration non réservée par vous"
+        )
+    await db.commit()
+
+
+@router.patch("/admin/bulk", response_model=BulkUpdateResponse)
+async def bulk_update_declarations_route(
+    update_data: DeclarationBulkUpdate,
+    request: Request,
+    current_user: User = Depends(require_moderator_or_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Met à jour statut et/ou priorité de plusieurs déclarations (admin).
+    Une seule transaction; résultat par identifiant.
+    """
+    if len(update_data.ids) > settings.MODERATION_BULK_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Au plus {settings.MODERATION_BULK_MAX_IDS} déclarations par requête"
+        )
+    if not update_data.status and not update_data.priority:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Aucune modification demandée"
+        )
+    
+    results = await bulk_update_declarations(
+        db,
+        update_data.ids,
+        current_user,
+        get_client_info(request),
+        status=update_data.status,
+        priority=update_data.priority,
+        status_comment=update_data.status_comment,
     )
-    tips_count = tips_result.scalar()
+    await db.commit()
     
-    unread_tips_result = await db.execute(
-        select(func.count()).where(
-            and_(Tip.declaration_id == declaration_id, Tip.is_read == 0)
+    # Index de rapprochement des indices, après validation de la transaction
+    if update_data.status:
+        await apply_status_change(
+            db, [i for i, r in results.items() if r == UPDATED], update_data.status
         )
-    )
-    unread_tips_count = unread_tips_result.scalar()
     
-    return DeclarationAdminResponse(
-        id=declaration.id,
-        tracking_code=declaration.tracking_code,
-        type=declaration.type,
-        category=declaration.category,
-        description=declaration.description,
-        incident_date=declaration.incident_date,
-        location=declaration.location,
-        reward=declaration.reward,
-        status=declaration.status,
-        priority=declaration.priority,
-        created_at=declaration.created_at,
-        declarant_name=declaration.declarant_name,
-        declarant_phone=declaration.declarant_phone,
-        declarant_email=declaration.declarant_email,
-        admin_notes=declaration.admin_notes,
-        metadata=declaration.metadata,
-        status_history=declaration.status_history,
-        attachments=declaration.attachments,
-        updated_at=declaration.updated_at,
-        tips_count=tips_count,
-        unread_tips_count=unread_tips_count,
-        messages_count=0,
-        unread_messages_count=0,
+    return BulkUpdateResponse(
+        results=[BulkItemResult(id=i, result=r) for i, r in results.items()],
+        updated=sum(r == UPDATED for r in results.values()),
     )
 
 
@@ -380,10 +530,7 @@ async def update_declaration(
     """
     client_info = get_client_info(request)
     
-    result = await db.execute(
-        select(Declaration).where(Declaration.id == declaration_id)
-    )
-    declaration = result.scalar_one_or_none()
+    declaration = await db.get(Declaration, declaration_id)
     
     if not declaration:
         raise HTTPException(
@@ -391,33 +538,41 @@ async def update_declaration(
             detail="Déclaration non trouvée"
         )
     
+    # Historique lu une fois: date de première décision et réponse
+    events = await get_status_events(db, declaration_id)
+    decided_at = next(
+        (e.created_at for e in events if e.status != DeclarationStatus.EN_ATTENTE), None
+    )
+    
     changes = {}
+    stats = StatsDelta()
+    stats.declaration(state_of_declaration(declaration, decided_at), -1)
     
     # Mise à jour du statut
     if update_data.status and update_data.status != declaration.status:
         old_status = declaration.status
         declaration.status = update_data.status
+        # Une déclaration décidée quitte la file: son bail est libéré
+        declaration.claimed_by = None
+        declaration.claim_expires_at = None
         
-        # Ajouter à l'historique
-        history_entry = {
-            "status": update_data.status.value,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "changed_by": current_user.username,
-            "comment": update_data.status_comment or "",
-        }
-        declaration.status_history = declaration.status_history + [history_entry]
+        # Ajouter à l'historique (une insertion, sans réécrire l'existant)
+        event = add_status_event(
+            db,
+            declaration_id,
+            update_data.status,
+            update_data.status_comment or "",
+            current_user.username,
+        )
+        events.append(event)
+        if update_data.status != DeclarationStatus.EN_ATTENTE and decided_at is None:
+            decided_at = event.created_at
         
         changes["status"] = {"old": old_status.value, "new": update_data.status.value}
         
         # Logger
-        action = ActivityAction.DECLARATION_STATUS_CHANGED
-        if update_data.status == DeclarationStatus.VALIDEE:
-            action = ActivityAction.DECLARATION_VALIDATED
-        elif update_data.status == DeclarationStatus.REJETEE:
-            action = ActivityAction.DECLARATION_REJECTED
-        
         log = ActivityLog(
-            action=action,
+            action=status_action(update_data.status),
             user_id=current_user.id,
             username=current_user.username,
             target_type="declaration",
@@ -446,11 +601,20 @@ async def update_declaration(
     
     # Mise à jour des notes admin
     if update_data.admin_notes is not None:
-        declaration.admin_notes = sanitize_input(update_data.admin_notes, 2000)
+        declaration.admin_notes = update_data.admin_notes
     
     declaration.updated_at = datetime.now(timezone.utc)
     
+    stats.declaration(state_of_declaration(declaration, decided_at))
+    await stats.apply(db)
+    
     await db.commit()
-    await db.refresh(declaration)
     
-    return await get_declaration_admin(declaration_id, current_user, db)
+    if "status" in changes:
+        match_index.sync(
+            declaration.id, declaration.type, declaration.status,
+            declaration.category, declaration.location, declaration.description,
+        )
+    
+    # État à jour en mémoire (expire_on_commit=False): pas de relecture
+    return _admin_response(declaration, events)
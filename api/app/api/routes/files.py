@@ -5,19 +5,46 @@ Gestion sécurisée des pièces jointes et photos de couverture.
 import os
 import uuid
 import hashlib
+import asyncio
+import anyio
 import magic
-from datetime import datetime, timezone
+import structlog
+from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Request
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    UploadFile,
+    File,
+    Depends,
+    Request,
+    Query,
+    BackgroundTasks,
+    Header,
+    Response,
+)
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
 
-from app.core.config import settings
-from app.api.deps import get_current_user
+from app.core.config import get_settings
+from app.core.database import get_db, AsyncSessionLocal
+from app.api.deps import require_admin
+from app.services.file_serving import FileInfoCache, build_file_response
+from app.services.images import (
+    DerivativeStore,
+    IMAGE_FORMATS,
+    FORMAT_BY_EXTENSION,
+    get_executor,
+    optimize_image,
+)
+from app.services.resumable_uploads import UploadSessionStore, UploadSessionError
+from app.services.storage_gc import collect_referenced_files, sweep_orphans, storage_report
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
+settings = get_settings()
 
 # Configuration
 UPLOAD_DIR = Path(settings.UPLOAD_DIR)
@@ -31,16 +58,93 @@ ALLOWED_TYPES = {
     'application/pdf': '.pdf',
 }
 
+# Extensions servies et types MIME associés
+CONTENT_TYPES = {ext: content_type for content_type, ext in ALLOWED_TYPES.items()}
+
+# Types MIME traités comme images (variantes, optimisation)
+IMAGE_CONTENT_TYPES = {content_type for _, content_type, _ in IMAGE_FORMATS.values()}
+
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5 MB
 
+# En-têtes de cache des fichiers servis (noms uniques, contenu immuable)
+FILE_CACHE_HEADERS = {
+    'Cache-Control': 'public, max-age=31536000, immutable',  # 1 an
+    'X-Content-Type-Options': 'nosniff',
+}
+
+# Cache des métadonnées (stat + ETag) des fichiers servis
+file_info_cache = FileInfoCache(settings.FILE_INFO_CACHE_SIZE)
+
+# Cache disque des variantes d'images (miniatures, WebP)
+derivative_store = DerivativeStore(
+    Path(settings.DERIVATIVES_DIR),
+    settings.DERIVATIVES_MAX_BYTES,
+    on_evict=file_info_cache.invalidate,
+)
+
+# Sessions d'upload reprenables (données partielles sur disque)
+upload_sessions = UploadSessionStore(
+    Path(settings.PARTIAL_UPLOAD_DIR),
+    timedelta(hours=settings.RESUMABLE_UPLOAD_EXPIRY_HOURS),
+)
+
 
 class FileUploadResponse(BaseModel):
-    """Réponse après upload."""
-    file_id: str
+    """
+    Réponse après upload.
+    Image en cours d'optimisation (processing): file_id et size restent
+    vides, l'URL répond 202 jusqu'à la publication; ensuite, taille et
+    ETag (SHA-256, dont file_id est le préfixe) sont ceux du fichier servi.
+    """
+    file_id: Optional[str] = None
     filename: str
     content_type: str
-    size: int
+    size: Optional[int] = None
     url: str
+    processing: bool = False
+
+
+class UploadSessionCreate(BaseModel):
+    """Création d'une session d'upload reprenable."""
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str
+    size: int = Field(..., gt=0)
+
+
+class UploadSessionResponse(BaseModel):
+    """État d'une session d'upload reprenable."""
+    id: str
+    filename: str
+    content_type: str
+    length: int
+    offset: int
+    expires_at: datetime
+
+
+class StorageGCResponse(BaseModel):
+    """Résultat d'un passage du ramasse-miettes."""
+    dry_run: bool
+    scanned: int
+    referenced: int
+    recent: int
+    deleted: int
+    bytes_freed: int
+    derivatives_deleted: int
+
+
+class StorageUsage(BaseModel):
+    """Nombre de fichiers et volume d'une tranche."""
+    files: int
+    bytes: int
+
+
+class StorageReportResponse(BaseModel):
+    """Utilisation du stockage des fichiers uploadés."""
+    total_files: int
+    total_bytes: int
+    by_age: dict[str, StorageUsage]
+    by_type: dict[str, StorageUsage]
+    derivatives_bytes: int
 
 
 class FileMetadata(BaseModel):
@@ -125,9 +229,129 @@ def scan_for_malware(data: bytes) -> bool:
     return False
 
 
+def pending_path(file_path: Path) -> Path:
+    """Nom temporaire d'un upload en cours d'optimisation (ni servi ni balayé)."""
+    return file_path.with_name(file_path.name + ".tmp")
+
+
+def publish_upload(tmp_path: Path, file_path: Path, content_type: str) -> None:
+    """Publie les octets définitifs sous leur nom servi (renommage atomique)."""
+    checksum = calculate_checksum(tmp_path.read_bytes())
+    os.replace(tmp_path, file_path)
+    file_info_cache.prime(file_path, content_type, checksum)
+
+
+async def optimize_uploaded_image(file_path: Path, content_type: str) -> None:
+    """
+    Optimise une image puis la publie (tâche d'arrière-plan, après la réponse).
+    Le ré-encodage s'exécute dans le pool de traitement d'images, sur le
+    fichier temporaire: les octets d'origine ne sont jamais servis.
+    """
+    logger = structlog.get_logger()
+    loop = asyncio.get_running_loop()
+    tmp_path = pending_path(file_path)
+    
+    try:
+        size_before, size_after = await loop.run_in_executor(
+            get_executor(),
+            optimize_image,
+            str(tmp_path),
+            settings.IMAGE_MAX_DIMENSION,
+            settings.IMAGE_QUALITY,
+        )
+        await anyio.to_thread.run_sync(publish_upload, tmp_path, file_path, content_type)
+    except Exception as e:
+        # Jamais de publication avec les métadonnées d'origine (GPS...)
+        tmp_path.unlink(missing_ok=True)
+        await logger.awarning("image_optimization_failed", filename=file_path.name, error=str(e))
+        return
+    
+    await logger.ainfo(
+        "image_optimized",
+        filename=file_path.name,
+        bytes_before=size_before,
+        bytes_after=size_after,
+        bytes_saved=size_before - size_after,
+    )
+
+
+def validate_upload(data: bytes, content_type: str) -> None:
+    """
+    Valide un fichier complet avant stockage.
+    Partagé par l'upload direct et la finalisation des uploads reprenables.
+    """
+    # Vérifier la taille
+    if len(data) > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Fichier trop volumineux. Maximum: {MAX_FILE_SIZE // (1024*1024)} Mo"
+        )
+    
+    # Valider le contenu réel
+    if not validate_file_content(data, content_type):
+        raise HTTPException(
+            status_code=400,
+            detail="Le contenu du fichier ne correspond pas au type déclaré"
+        )
+    
+    # Scan de sécurité
+    if not scan_for_malware(data):
+        raise HTTPException(
+            status_code=400,
+            detail="Fichier rejeté pour raisons de sécurité"
+        )
+
+
+async def store_upload(
+    data: bytes,
+    original_name: str,
+    content_type: str,
+    background_tasks: BackgroundTasks,
+    response: Response,
+) -> FileUploadResponse:
+    """
+    Enregistre un fichier validé.
+    Les images à optimiser sont écrites sous un nom temporaire et la réponse
+    (202, processing) part aussitôt: l'optimisation puis la publication
+    sous le nom définitif se font en arrière-plan. Un fichier publié n'est
+    jamais réécrit (cache immuable, variantes).
+    """
+    # Générer le nom sécurisé
+    secure_name = generate_secure_filename(original_name, content_type)
+    file_path = UPLOAD_DIR / secure_name
+    url = f"/api/v1/files/{secure_name}"
+    
+    if settings.IMAGE_OPTIMIZE_ON_UPLOAD and content_type in IMAGE_CONTENT_TYPES:
+        await anyio.to_thread.run_sync(pending_path(file_path).write_bytes, data)
+        background_tasks.add_task(optimize_uploaded_image, file_path, content_type)
+        response.status_code = 202
+        return FileUploadResponse(
+            filename=secure_name,
+            content_type=content_type,
+            url=url,
+            processing=True,
+        )
+    
+    # Sauvegarder le fichier et pré-remplir le cache de métadonnées
+    checksum = calculate_checksum(data)
+    await anyio.to_thread.run_sync(file_path.write_bytes, data)
+    file_info_cache.prime(file_path, content_type, checksum)
+    
+    return FileUploadResponse(
+        # Identifiant basé sur le checksum (déduplication)
+        file_id=checksum[:16],
+        filename=secure_name,
+        content_type=content_type,
+        size=len(data),
+        url=url,
+    )
+
+
 @router.post("/upload", response_model=FileUploadResponse)
 async def upload_file(
     request: Request,
+    background_tasks: BackgroundTasks,
+    response: Response,
     file: UploadFile = File(...)
 ):
     """
@@ -138,6 +362,10 @@ async def upload_file(
     - Taille maximale
     - Contenu réel vs type déclaré
     - Scan de sécurité basique
+    
+    Les images sont optimisées en arrière-plan après la réponse
+    (IMAGE_OPTIMIZE_ON_UPLOAD): redimensionnement et suppression des
+    métadonnées. Réponse 202 (processing) jusqu'à leur publication.
     """
     # Vérifier le type MIME déclaré
     if file.content_type not in ALLOWED_TYPES:
@@ -149,101 +377,224 @@ async def upload_file(
     # Lire le fichier
     data = await file.read()
     
-    # Vérifier la taille
-    if len(data) > MAX_FILE_SIZE:
+    validate_upload(data, file.content_type)
+    
+    return await store_upload(data, file.filename or "file", file.content_type, background_tasks, response)
+
+
+# === Uploads reprenables (inspirés de tus.io) ===
+
+def _session_headers(session: dict) -> dict:
+    return {
+        "Upload-Offset": str(session["offset"]),
+        "Upload-Length": str(session["length"]),
+        "Upload-Expires": session["expires_at"],
+        "Cache-Control": "no-store",
+    }
+
+
+def _session_error(e: UploadSessionError) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+@router.post("/uploads", response_model=UploadSessionResponse, status_code=201)
+async def create_upload_session(data: UploadSessionCreate, response: Response):
+    """
+    Crée une session d'upload reprenable.
+    Le client envoie ensuite les blocs par PATCH puis finalise la session.
+    """
+    if data.content_type not in ALLOWED_TYPES:
         raise HTTPException(
             status_code=400,
-            detail=f"Fichier trop volumineux. Maximum: {MAX_FILE_SIZE // (1024*1024)} Mo"
+            detail=f"Type de fichier non autorisé: {data.content_type}"
         )
     
-    # Valider le contenu réel
-    if not validate_file_content(data, file.content_type):
+    if data.size > MAX_FILE_SIZE:
         raise HTTPException(
             status_code=400,
-            detail="Le contenu du fichier ne correspond pas au type déclaré"
+            detail=f"Fichier trop volumineux. Maximum: {MAX_FILE_SIZE // (1024*1024)} Mo"
         )
     
-    # Scan de sécurité
-    if not scan_for_malware(data):
+    session = upload_sessions.create(data.filename, data.content_type, data.size)
+    response.headers["Location"] = f"/api/v1/files/uploads/{session['id']}"
+    response.headers.update(_session_headers(session))
+    
+    return UploadSessionResponse(**session)
+
+
+@router.head("/uploads/{session_id}")
+async def get_upload_offset(session_id: str):
+    """Retourne l'offset courant (reprise après coupure)."""
+    try:
+        session = upload_sessions.get(session_id)
+    except UploadSessionError as e:
+        return Response(status_code=e.status_code)
+    
+    return Response(status_code=200, headers=_session_headers(session))
+
+
+@router.patch("/uploads/{session_id}", status_code=204)
+async def upload_chunk(
+    session_id: str,
+    request: Request,
+    upload_offset: int = Header(..., ge=0),
+    upload_checksum: Optional[str] = Header(None),
+):
+    """
+    Envoie un bloc de données à l'offset courant.
+    
+    En-têtes:
+    - Upload-Offset: position du bloc (doit être égale à l'offset serveur)
+    - Upload-Checksum: "<algo> <base64>" (sha256, sha1 ou md5), optionnel
+    """
+    if request.headers.get("content-type") != "application/offset+octet-stream":
+        raise HTTPException(status_code=415, detail="Content-Type attendu: application/offset+octet-stream")
+    
+    # Refuser les blocs trop gros avant de les lire
+    content_length = request.headers.get("content-length")
+    if content_length is not None:
+        if not content_length.isdigit():
+            raise HTTPException(status_code=400, detail="Content-Length invalide")
+        if int(content_length) > MAX_FILE_SIZE:
+            raise HTTPException(status_code=413, detail="Bloc trop volumineux")
+    
+    data = await request.body()
+    
+    try:
+        session = await upload_sessions.append(session_id, upload_offset, data, upload_checksum)
+    except UploadSessionError as e:
+        raise _session_error(e)
+    
+    return Response(status_code=204, headers=_session_headers(session))
+
+
+@router.post("/uploads/{session_id}/finalize", response_model=FileUploadResponse)
+async def finalize_upload(session_id: str, background_tasks: BackgroundTasks, response: Response):
+    """
+    Finalise une session complète: mêmes validations et même stockage
+    que l'upload direct, puis suppression des données partielles.
+    """
+    try:
+        async with upload_sessions.completed(session_id) as (session, data):
+            try:
+                validate_upload(data, session["content_type"])
+            except HTTPException:
+                # Un fichier refusé ne peut pas être corrigé par une reprise
+                upload_sessions.delete(session_id)
+                raise
+            
+            result = await store_upload(
+                data, session["filename"], session["content_type"], background_tasks, response,
+            )
+            upload_sessions.delete(session_id)
+    except UploadSessionError as e:
+        raise _session_error(e)
+    
+    return result
+
+
+@router.delete("/uploads/{session_id}", status_code=204)
+async def cancel_upload(session_id: str):
+    """Abandonne une session d'upload."""
+    try:
+        upload_sessions.get(session_id)
+    except UploadSessionError as e:
+        raise _session_error(e)
+    
+    upload_sessions.delete(session_id)
+    return Response(status_code=204)
+
+
+async def cleanup_upload_sessions() -> None:
+    """Supprime les sessions d'upload expirées (tâche périodique)."""
+    removed = await anyio.to_thread.run_sync(upload_sessions.cleanup_expired)
+    if removed:
+        logger = structlog.get_logger()
+        await logger.ainfo("upload_sessions_cleaned", removed=removed)
+
+
+async def get_derivative_info(source: Path, ext: str, width: Optional[int], fmt: Optional[str]):
+    """Génère (ou récupère en cache) une variante d'image et ses métadonnées."""
+    if ext not in FORMAT_BY_EXTENSION:
+        raise HTTPException(status_code=400, detail="Variantes disponibles uniquement pour les images")
+    
+    # Largeurs limitées pour éviter de remplir le cache avec des variantes arbitraires
+    if width is not None and width not in settings.IMAGE_DERIVATIVE_WIDTHS:
         raise HTTPException(
             status_code=400,
-            detail="Fichier rejeté pour raisons de sécurité"
+            detail=f"Largeur non supportée. Valeurs possibles: {settings.IMAGE_DERIVATIVE_WIDTHS}"
         )
     
-    # Générer le nom sécurisé
-    secure_name = generate_secure_filename(file.filename or "file", file.content_type)
-    file_path = UPLOAD_DIR / secure_name
-    
-    # Calculer le checksum
-    checksum = calculate_checksum(data)
+    fmt = fmt or FORMAT_BY_EXTENSION[ext]
     
-    # Sauvegarder le fichier
-    with open(file_path, 'wb') as f:
-        f.write(data)
-    
-    # Créer l'ID du fichier (basé sur le checksum pour déduplication)
-    file_id = checksum[:16]
+    try:
+        path = await derivative_store.get(source, width, fmt)
+    except Exception:
+        raise HTTPException(status_code=422, detail="Impossible de générer la variante de l'image")
     
-    return FileUploadResponse(
-        file_id=file_id,
-        filename=secure_name,
-        content_type=file.content_type,
-        size=len(data),
-        url=f"/api/v1/files/{secure_name}"
-    )
+    info = await file_info_cache.load(path, IMAGE_FORMATS[fmt][1])
+    if info is None:
+        raise HTTPException(status_code=404, detail="Fichier introuvable")
+    return info
 
 
 @router.get("/{filename}")
-async def get_file(filename: str):
+async def get_file(
+    filename: str,
+    request: Request,
+    w: Optional[int] = Query(None, description="Largeur de la variante"),
+    fmt: Optional[str] = Query(None, pattern="^(jpeg|png|webp)$"),
+):
     """
-    Récupère un fichier uploadé.
+    Récupère un fichier uploadé, ou une variante d'image (?w=320&fmt=webp).
     
     Sécurité:
     - Validation du nom de fichier
     - Pas de traversée de répertoire
+    
+    Performance:
+    - ETag fort basé sur le SHA-256 du contenu (304 si If-None-Match)
+    - Requêtes partielles (Range simple et multiple, If-Range)
+    - Métadonnées en cache mémoire (pas de stat à chaque appel)
+    - Variantes générées dans un pool de processus et mises en cache disque
+    
+    Une image encore en cours d'optimisation répond 202 (Retry-After).
     """
     # Nettoyer le nom de fichier
     safe_name = os.path.basename(filename)
     
     # Vérifier l'extension
     ext = Path(safe_name).suffix.lower()
-    if ext not in ['.jpg', '.png', '.webp', '.pdf']:
+    if ext not in CONTENT_TYPES:
         raise HTTPException(status_code=400, detail="Type de fichier non autorisé")
     
     file_path = UPLOAD_DIR / safe_name
+    info = await file_info_cache.load(file_path, CONTENT_TYPES[ext])
     
-    if not file_path.exists():
+    if info is None:
+        # Image pas encore publiée: optimisation en cours
+        if await anyio.to_thread.run_sync(pending_path(file_path).exists):
+            return ORJSONResponse(
+                {"detail": "Fichier en cours de traitement", "processing": True},
+                status_code=202,
+                headers={"Retry-After": "1", "Cache-Control": "no-store"},
+            )
         raise HTTPException(status_code=404, detail="Fichier introuvable")
     
-    # Déterminer le type MIME
-    content_types = {
-        '.jpg': 'image/jpeg',
-        '.png': 'image/png',
-        '.webp': 'image/webp',
-        '.pdf': 'application/pdf',
-    }
+    if w is not None or fmt is not None:
+        info = await get_derivative_info(info.path, ext, w, fmt)
     
-    return FileResponse(
-        file_path,
-        media_type=content_types.get(ext, 'application/octet-stream'),
-        headers={
-            'Cache-Control': 'public, max-age=31536000',  # 1 an
-            'X-Content-Type-Options': 'nosniff',
-        }
-    )
+    return build_file_response(request, info, FILE_CACHE_HEADERS)
 
 
 @router.delete("/{filename}")
 async def delete_file(
     filename: str,
-    current_user = Depends(get_current_user)
+    current_user = Depends(require_admin)
 ):
     """
     Supprime un fichier (admin uniquement).
     """
-    if current_user.get("role") != "admin":
-        raise HTTPException(status_code=403, detail="Accès non autorisé")
-    
     safe_name = os.path.basename(filename)
     file_path = UPLOAD_DIR / safe_name
     
@@ -251,5 +602,85 @@ async def delete_file(
         raise HTTPException(status_code=404, detail="Fichier introuvable")
     
     os.remove(file_path)
+    file_info_cache.invalidate(file_path)
+    derivative_store.discard_sources([safe_name])
     
     return {"deleted": True, "filename": safe_name}
+
+
+# === Administration du stockage ===
+
+async def collect_orphan_uploads(db: AsyncSession, dry_run: bool = False) -> StorageGCResponse:
+    """
+    Ramasse-miettes des uploads jamais rattachés à une déclaration ou un indice.
+    Le balayage s'exécute dans un thread, par lots espacés.
+    """
+    referenced = await collect_referenced_files(db)
+    
+    stats = await anyio.to_thread.run_sync(
+        lambda: sweep_orphans(
+            UPLOAD_DIR,
+            referenced,
+            timedelta(hours=settings.UPLOAD_GC_GRACE_HOURS),
+            settings.UPLOAD_GC_BATCH_SIZE,
+            settings.UPLOAD_GC_BATCH_PAUSE,
+            dry_run=dry_run,
+            on_delete=file_info_cache.invalidate,
+        )
+    )
+    
+    derivatives_deleted = 0
+    if not dry_run:
+        derivatives_deleted = derivative_store.discard_sources(stats["deleted_files"])
+    
+    logger = structlog.get_logger()
+    await logger.ainfo(
+        "upload_gc",
+        dry_run=dry_run,
+        scanned=stats["scanned"],
+        deleted=stats["deleted"],
+        bytes_freed=stats["bytes_freed"],
+    )
+    
+    return StorageGCResponse(
+        dry_run=dry_run,
+        scanned=stats["scanned"],
+        referenced=stats["referenced"],
+        recent=stats["recent"],
+        deleted=stats["deleted"],
+        bytes_freed=stats["bytes_freed"],
+        derivatives_deleted=derivatives_deleted,
+    )
+
+
+async def run_scheduled_upload_gc() -> None:
+    """
+    Passage planifié du ramasse-miettes (tâche périodique).
+    Simulation seule, sauf si UPLOAD_GC_SCHEDULED_DELETE est activé.
+    """
+    async with AsyncSessionLocal() as db:
+        await collect_orphan_uploads(db, dry_run=not settings.UPLOAD_GC_SCHEDULED_DELETE)
+
+
+@router.post("/admin/gc", response_model=StorageGCResponse)
+async def run_upload_gc(
+    dry_run: bool = Query(True, description="Simuler sans supprimer"),
+    current_user = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Supprime les fichiers non référencés plus anciens que le délai de grâce
+    (admin uniquement). Par défaut, simulation sans suppression.
+    """
+    return await collect_orphan_uploads(db, dry_run=dry_run)
+
+
+@router.get("/admin/storage", response_model=StorageReportResponse)
+async def get_storage_report(current_user = Depends(require_admin)):
+    """Utilisation du stockage par âge et par type (admin uniquement)."""
+    report = await anyio.to_thread.run_sync(storage_report, UPLOAD_DIR)
+    
+    return StorageReportResponse(
+        **report,
+        derivatives_bytes=derivative_store.total_bytes,
+    )
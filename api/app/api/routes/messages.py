@@ -0,0 +1,289 @@
+"""
+Routes de messagerie entre l'équipe et le déclarant.
+Le déclarant s'authentifie par son code de suivi.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
+
+from app.core.database import get_db
+from app.models.declaration import Declaration
+from app.models.activity_log import ActivityLog, ActivityAction
+from app.models.user import User
+from app.services.activity_logs import InvalidCursor
+from app.services.messages import (
+    SENDER_ADMIN,
+    SENDER_DECLARANT,
+    get_inbox_page,
+    get_thread_page,
+    mark_read,
+    post_message,
+    unread_count,
+)
+from app.schemas.message import (
+    MessageCreate,
+    MessageMarkRead,
+    MessageResponse,
+    MessageThreadResponse,
+    MessageReadResult,
+    InboxItem,
+    InboxResponse,
+)
+from app.api.deps import require_moderator_or_admin, get_client_info
+
+router = APIRouter(prefix="/declarations", tags=["Messages"])
+
+# Colonnes lues pour la messagerie (ni description ni pièces jointes)
+_THREAD_COLUMNS = load_only(
+    Declaration.id,
+    Declaration.tracking_code,
+    Declaration.messages_count,
+    Declaration.unread_messages_count,
+    Declaration.declarant_unread_count,
+)
+
+
+async def _get_declaration(db: AsyncSession, *criteria) -> Declaration:
+    result = await db.execute(select(Declaration).options(_THREAD_COLUMNS).where(*criteria))
+    declaration = result.scalar_one_or_none()
+    if not declaration:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Déclaration non trouvée"
+        )
+    return declaration
+
+
+def _message_response(message, reader_type: str) -> MessageResponse:
+    return MessageResponse(
+        id=message.id,
+        sender_type=message.sender_type,
+        sender_id=message.sender_id if reader_type == SENDER_ADMIN else None,
+        content=message.content,
+        is_read=bool(message.is_read),
+        created_at=message.created_at,
+    )
+
+
+async def _thread(
+    db: AsyncSession,
+    declaration: Declaration,
+    reader_type: str,
+    limit: int,
+    cursor: Optional[str],
+) -> MessageThreadResponse:
+    try:
+        messages, next_cursor = await get_thread_page(db, declaration.id, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return MessageThreadResponse(
+        items=[_message_response(m, reader_type) for m in messages],
+        next_cursor=next_cursor,
+        messages_count=declaration.messages_count,
+        unread_count=unread_count(declaration, reader_type),
+    )
+
+
+# === Routes déclarant (code de suivi) ===
+
+@router.get("/track/{tracking_code}/messages", response_model=MessageThreadResponse)
+async def get_declarant_thread(
+    tracking_code: str,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Fil de messages d'une déclaration, vu par le déclarant.
+    Pagination: passer next_cursor pour obtenir les messages plus anciens.
+    """
+    declaration = await _get_declaration(
+        db, Declaration.tracking_code == tracking_code.upper()
+    )
+    return await _thread(db, declaration, SENDER_DECLARANT, limit, cursor)
+
+
+@router.post(
+    "/track/{tracking_code}/messages",
+    response_model=MessageResponse,
+    status_code=status.HTTP_201_CREATED
+)
+async def send_declarant_message(
+    tracking_code: str,
+    message_data: MessageCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Envoie un message à l'équipe (déclarant).
+    """
+    client_info = get_client_info(request)
+    declaration = await _get_declaration(
+        db, Declaration.tracking_code == tracking_code.upper()
+    )
+
+    message = await post_message(
+        db,
+        declaration.id,
+        SENDER_DECLARANT,
+        message_data.content,
+    )
+
+    log = ActivityLog(
+        action=ActivityAction.MESSAGE_SENT,
+        target_type="message",
+        target_id=message.id,
+        details={"declaration_id": declaration.id, "sender_type": SENDER_DECLARANT},
+        **client_info
+    )
+    db.add(log)
+
+    await db.commit()
+    return _message_response(message, SENDER_DECLARANT)
+
+
+@router.post("/track/{tracking_code}/messages/read", response_model=MessageReadResult)
+async def mark_declarant_messages_read(
+    tracking_code: str,
+    read_data: MessageMarkRead,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Marque comme lus les messages de l'équipe (tous, ou ceux indiqués).
+    """
+    declaration = await _get_declaration(
+        db, Declaration.tracking_code == tracking_code.upper()
+    )
+    marked = await mark_read(db, declaration.id, SENDER_DECLARANT, read_data.message_ids)
+    await db.commit()
+
+    return MessageReadResult(
+        marked=marked,
+        unread_count=unread_count(declaration, SENDER_DECLARANT),
+    )
+
+
+# === Routes Admin ===
+
+@router.get("/admin/messages/inbox", response_model=InboxResponse)
+async def get_inbox(
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(require_moderator_or_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Déclarations ayant des messages non lus, par dernier message décroissant.
+    """
+    try:
+        rows, next_cursor = await get_inbox_page(db, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return InboxResponse(
+        items=[InboxItem(
+            declaration_id=row.id,
+            tracking_code=row.tracking_code,
+            type=row.type,
+            category=row.category,
+            status=row.status,
+            messages_count=row.messages_count,
+            unread_messages_count=row.unread_messages_count,
+            last_message_at=row.last_message_at,
+        ) for row in rows],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/admin/{declaration_id}/messages", response_model=MessageThreadResponse)
+async def get_admin_thread(
+    declaration_id: str,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(require_moderator_or_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Fil de messages d'une déclaration (admin).
+    """
+    declaration = await _get_declaration(db, Declaration.id == declaration_id)
+    return await _thread(db, declaration, SENDER_ADMIN, limit, cursor)
+
+
+@router.post(
+    "/admin/{declaration_id}/messages",
+    response_model=MessageResponse,
+    status_code=status.HTTP_201_CREATED
+)
+async def send_admin_message(
+    declaration_id: str,
+    message_data: MessageCreate,
+    request: Request,
+    current_user: User = Depends(require_moderator_or_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Envoie un message au déclarant (admin).
+    """
+    client_info = get_client_info(request)
+    declaration = await _get_declaration(db, Declaration.id == declaration_id)
+
+    message = await post_message(
+        db,
+        declaration.id,
+        SENDER_ADMIN,
+        message_data.content,
+        sender_id=current_user.id,
+    )
+
+    log = ActivityLog(
+        action=ActivityAction.MESSAGE_SENT,
+        user_id=current_user.id,
+        username=current_user.username,
+        target_type="message",
+        target_id=message.id,
+        details={"declaration_id": declaration.id, "sender_type": SENDER_ADMIN},
+        **client_info
+    )
+    db.add(log)
+
+    await db.commit()
+    return _message_response(message, SENDER_ADMIN)
+
+
+@router.post("/admin/{declaration_id}/messages/read", response_model=MessageReadResult)
+async def mark_admin_messages_read(
+    declaration_id: str,
+    read_data: MessageMarkRead,
+    request: Request,
+    current_user: User = Depends(require_moderator_or_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Marque comme lus les messages du déclarant (tous, ou ceux indiqués).
+    """
+    client_info = get_client_info(request)
+    declaration = await _get_declaration(db, Declaration.id == declaration_id)
+
+    marked = await mark_read(db, declaration.id, SENDER_ADMIN, read_data.message_ids)
+    if marked:
+        log = ActivityLog(
+            action=ActivityAction.MESSAGE_READ,
+            user_id=current_user.id,
+            username=current_user.username,
+            target_type="declaration",
+            target_id=declaration.id,
+            details={"marked": marked},
+            **client_info
+        )
+        db.add(log)
+    await db.commit()
+
+    return MessageReadResult(
+        marked=marked,
+        unread_count=unread_count(declaration, SENDER_ADMIN),
+    )
@@ -14,11 +14,11 @@ from fastapi import APIRouter, HTTPException, Request, Depends, BackgroundTasks
 from pydantic import BaseModel, Field, field_validator
 import httpx
 
-from app.core.config import settings
+from app.core.config import get_settings
 from app.core.database import get_db
-from app.api.deps import log_activity
 
 router = APIRouter()
+settings = get_settings()
 
 
 class PaymentProvider(str, Enum):
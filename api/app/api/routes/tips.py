@@ -5,23 +5,35 @@ from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func
 
+from app.core.config import get_settings
 from app.core.database import get_db
-from app.core.security import sanitize_input
 from app.models.declaration import Declaration, DeclarationStatus, DeclarationType
 from app.models.tip import Tip
 from app.models.activity_log import ActivityLog, ActivityAction
 from app.models.user import User
+from app.services.matching import match_index
+from app.services.moderation import UPDATED, bulk_update_tips
+from app.services.stats import StatsDelta, state_of_tip
+from app.services.tip_counters import TipCounterDelta
 from app.schemas.tip import (
     TipCreate,
     TipPublicResponse,
     TipAdminResponse,
     TipUpdate,
+    TipBulkUpdate,
     TipListResponse,
+    TipCandidate,
+    TipCandidatesResponse,
 )
+from app.schemas.declaration import BulkItemResult, BulkUpdateResponse
 from app.api.deps import require_moderator_or_admin, get_client_info
+from app.api.responses import preview, row_dicts, select_fields
+
+settings = get_settings()
 
 router = APIRouter(prefix="/tips", tags=["Indices"])
 
@@ -61,19 +73,20 @@ async def create_tip(
     if tip_data.attachments:
         for att in tip_data.attachments[:3]:  # Max 3 fichiers
             attachments.append({
-                "filename": sanitize_input(att.filename, 255),
+                "filename": att.filename,
                 "content_type": att.content_type,
                 "size": att.size,
                 "data": att.data,
+                "stored_name": att.stored_name,
             })
     
     # Créer l'indice
     tip = Tip(
         declaration_id=tip_data.declaration_id,
         tipster_phone=tip_data.tipster_phone,
-        description=sanitize_input(tip_data.description, 2000),
+        description=tip_data.description,
         attachments=attachments,
-        metadata={
+        metadata_={
             "ip_address": client_info["ip_address"],
             "user_agent": client_info["user_agent"],
             "submitted_at": datetime.now(timezone.utc).isoformat(),
@@ -82,6 +95,15 @@ async def create_tip(
     
     db.add(tip)
     
+    # Statistiques du tableau de bord (même transaction)
+    stats = StatsDelta()
+    stats.tip(state_of_tip(tip))
+    await stats.apply(db)
+    
+    counters = TipCounterDelta()
+    counters.tip(tip.declaration_id, tip.is_read)
+    await counters.apply(db)
+    
     # Logger l'action
     log = ActivityLog(
         action=ActivityAction.TIP_SUBMITTED,
@@ -107,19 +129,63 @@ async def create_tip(
 
 # === Routes Admin ===
 
+def _tip_response(tip: Tip) -> TipAdminResponse:
+    return TipAdminResponse(
+        id=tip.id,
+        declaration_id=tip.declaration_id,
+        tipster_phone=tip.tipster_phone,
+        description=tip.description,
+        attachments=tip.attachments,
+        is_read=bool(tip.is_read),
+        is_useful=bool(tip.is_useful) if tip.is_useful is not None else None,
+        admin_notes=tip.admin_notes,
+        metadata=tip.metadata_,
+        created_at=tip.created_at,
+        reviewed_at=tip.reviewed_at,
+        reviewed_by=tip.reviewed_by,
+    )
+
+
+# Colonnes d'un élément de liste (TipAdminResponse), par nom de champ
+_TIP_FIELDS = {
+    "id": Tip.id,
+    "declaration_id": Tip.declaration_id,
+    "tipster_phone": Tip.tipster_phone,
+    "description": Tip.description,
+    "description_preview": preview(Tip.description, settings.LIST_PREVIEW_LENGTH, "description_preview"),
+    "attachments": Tip.attachments,
+    "is_read": Tip.is_read,
+    "is_useful": Tip.is_useful,
+    "admin_notes": Tip.admin_notes,
+    "metadata": Tip.metadata_.label("metadata"),
+    "created_at": Tip.created_at,
+    "reviewed_at": Tip.reviewed_at,
+    "reviewed_by": Tip.reviewed_by,
+}
+
+# Sans fields=: tous les champs sauf l'aperçu
+_TIP_DEFAULT = tuple(name for name in _TIP_FIELDS if name != "description_preview")
+
+
 @router.get("/admin", response_model=TipListResponse)
 async def list_tips(
     declaration_id: Optional[str] = None,
     unread_only: bool = False,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(
+        None,
+        max_length=500,
+        description="Champs renvoyés, séparés par des virgules (id toujours inclus), "
+                    "dont description_preview",
+    ),
     current_user: User = Depends(require_moderator_or_admin),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Liste les indices (admin).
     """
-    base_query = select(Tip)
+    columns = select_fields(fields, _TIP_FIELDS, _TIP_DEFAULT)
     
     # Filtres
     filters = []
@@ -128,47 +194,33 @@ async def list_tips(
     if unread_only:
         filters.append(Tip.is_read == 0)
     
-    if filters:
-        base_query = base_query.where(and_(*filters))
-    
     # Compter total et non lus
-    count_query = select(func.count()).select_from(base_query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar()
+    total = await db.scalar(select(func.count()).select_from(Tip).where(*filters))
     
     unread_query = select(func.count()).where(Tip.is_read == 0)
     if declaration_id:
         unread_query = unread_query.where(Tip.declaration_id == declaration_id)
-    unread_result = await db.execute(unread_query)
-    unread_count = unread_result.scalar()
+    unread_count = await db.scalar(unread_query)
     
     # Pagination
     offset = (page - 1) * per_page
-    query = base_query.order_by(Tip.created_at.desc()).offset(offset).limit(per_page)
+    query = select(*columns).where(*filters).order_by(
+        Tip.created_at.desc()
+    ).offset(offset).limit(per_page)
     
     result = await db.execute(query)
-    tips = result.scalars().all()
-    
-    items = [TipAdminResponse(
-        id=t.id,
-        declaration_id=t.declaration_id,
-        tipster_phone=t.tipster_phone,
-        description=t.description,
-        attachments=t.attachments,
-        is_read=bool(t.is_read),
-        is_useful=bool(t.is_useful) if t.is_useful is not None else None,
-        admin_notes=t.admin_notes,
-        metadata=t.metadata,
-        created_at=t.created_at,
-        reviewed_at=t.reviewed_at,
-        reviewed_by=t.reviewed_by,
-    ) for t in tips]
-    
-    return TipListResponse(
-        items=items,
-        total=total,
-        unread_count=unread_count,
-    )
+    items = row_dicts(result.mappings())
+    for item in items:
+        if "is_read" in item:
+            item["is_read"] = bool(item["is_read"])
+        if item.get("is_useful") is not None:
+            item["is_useful"] = bool(item["is_useful"])
+    
+    return ORJSONResponse({
+        "items": items,
+        "total": total,
+        "unread_count": unread_count,
+    })
 
 
 @router.get("/admin/{tip_id}", response_model=TipAdminResponse)
@@ -189,19 +241,104 @@ async def get_tip(
             detail="Indice non trouvé"
         )
     
-    return TipAdminResponse(
-        id=tip.id,
-        declaration_id=tip.declaration_id,
-        tipster_phone=tip.tipster_phone,
-        description=tip.description,
-        attachments=tip.attachments,
-        is_read=bool(tip.is_read),
-        is_useful=bool(tip.is_useful) if tip.is_useful is not None else None,
-        admin_notes=tip.admin_notes,
-        metadata=tip.metadata,
-        created_at=tip.created_at,
-        reviewed_at=tip.reviewed_at,
-        reviewed_by=tip.reviewed_by,
+    return _tip_response(tip)
+
+
+@router.get("/admin/{tip_id}/candidates", response_model=TipCandidatesResponse)
+async def get_tip_candidates(
+    tip_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(require_moderator_or_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Autres pertes validées auxquelles l'indice pourrait correspondre (admin).
+    Classement TF-IDF sur l'index en mémoire (catégorie, lieu, description);
+    seules les déclarations retenues sont lues, par clé primaire.
+    """
+    result = await db.execute(
+        select(Tip.id, Tip.declaration_id, Tip.description).where(Tip.id == tip_id)
+    )
+    tip = result.one_or_none()
+    
+    if not tip:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Indice non trouvé"
+        )
+    
+    # La catégorie de la déclaration liée oriente la recherche
+    category = await db.scalar(
+        select(Declaration.category).where(Declaration.id == tip.declaration_id)
+    )
+    ranked = match_index.search(
+        tip.description, category=category, limit=limit, exclude=tip.declaration_id
+    )
+    
+    items = []
+    if ranked:
+        result = await db.execute(
+            select(
+                Declaration.id,
+                Declaration.tracking_code,
+                Declaration.category,
+                Declaration.location,
+                Declaration.created_at,
+            ).where(Declaration.id.in_([declaration_id for declaration_id, _, _ in ranked]))
+        )
+        rows = {row.id: row for row in result.all()}
+        items = [
+            TipCandidate(
+                declaration_id=declaration_id,
+                tracking_code=row.tracking_code,
+                category=row.category,
+                location=row.location,
+                created_at=row.created_at,
+                score=score,
+                matched_terms=terms,
+            )
+            for declaration_id, score, terms in ranked
+            if (row := rows.get(declaration_id)) is not None
+        ]
+    
+    return TipCandidatesResponse(tip_id=tip.id, declaration_id=tip.declaration_id, items=items)
+
+
+@router.patch("/admin/bulk", response_model=BulkUpdateResponse)
+async def bulk_update_tips_route(
+    update_data: TipBulkUpdate,
+    request: Request,
+    current_user: User = Depends(require_moderator_or_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Marque comme lus et/ou évalue plusieurs indices (admin).
+    Une seule transaction; résultat par identifiant.
+    """
+    if len(update_data.ids) > settings.MODERATION_BULK_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Au plus {settings.MODERATION_BULK_MAX_IDS} indices par requête"
+        )
+    if update_data.is_read is None and update_data.is_useful is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Aucune modification demandée"
+        )
+    
+    results = await bulk_update_tips(
+        db,
+        update_data.ids,
+        current_user,
+        get_client_info(request),
+        is_read=update_data.is_read,
+        is_useful=update_data.is_useful,
+    )
+    await db.commit()
+    
+    return BulkUpdateResponse(
+        results=[BulkItemResult(id=i, result=r) for i, r in results.items()],
+        updated=sum(r == UPDATED for r in results.values()),
     )
 
 
@@ -227,6 +364,10 @@ async def update_tip(
             detail="Indice non trouvé"
         )
     
+    stats = StatsDelta()
+    stats.tip(state_of_tip(tip), -1)
+    was_read = tip.is_read
+    
     # Marquer comme lu
     if update_data.is_read is not None:
         tip.is_read = 1 if update_data.is_read else 0
@@ -261,9 +402,16 @@ async def update_tip(
     
     # Notes admin
     if update_data.admin_notes is not None:
-        tip.admin_notes = sanitize_input(update_data.admin_notes, 1000)
+        tip.admin_notes = update_data.admin_notes
+    
+    stats.tip(state_of_tip(tip))
+    await stats.apply(db)
+    
+    counters = TipCounterDelta()
+    counters.read_changed(tip.declaration_id, was_read, tip.is_read)
+    await counters.apply(db)
     
     await db.commit()
-    await db.refresh(tip)
     
-    return await get_tip(tip_id, current_user, db)
+    # État à jour en mémoire (expire_on_commit=False): pas de relecture
+    return _tip_response(tip)
@@ -0,0 +1,201 @@
+"""
+Commandes d'administration en ligne de commande.
+
+Usage:
+    python -m app.cli import declarations data.ndjson [--batch-size 1000]
+    python -m app.cli import tips indices.csv --format csv
+    python -m app.cli import --resume <job_id>
+    python -m app.cli backup [--list]
+    python -m app.cli restore <fichier.db.gz> --yes
+    python -m app.cli rebuild-stats
+    python -m app.cli archive-logs
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, init_db, close_db
+from app.models.import_job import ImportJob, ImportStatus
+from app.services.backup import (
+    BackupError,
+    backup_directory,
+    database_path,
+    list_snapshots,
+    restore_snapshot,
+    run_backup,
+)
+from app.services.stats import rebuild_stats
+from app.services.activity_archive import run_archive
+from app.services.importer import IMPORT_DATASETS, IMPORT_FORMATS, run_import, shutdown_import_executor
+
+settings = get_settings()
+
+
+async def import_command(args: argparse.Namespace) -> int:
+    await init_db()
+    try:
+        async with AsyncSessionLocal() as db:
+            if args.resume:
+                job = await db.get(ImportJob, args.resume)
+                if job is None:
+                    print(f"Import introuvable: {args.resume}", file=sys.stderr)
+                    return 1
+            else:
+                source = Path(args.path).resolve()
+                fmt = args.format or IMPORT_FORMATS.get(source.suffix.lower())
+                if not source.is_file() or fmt is None:
+                    print("Fichier introuvable ou format non reconnu", file=sys.stderr)
+                    return 1
+                # Le fichier est lu sur place: il doit rester disponible pour une reprise
+                job = ImportJob(
+                    dataset=args.dataset,
+                    format=fmt,
+                    source_path=str(source),
+                    batch_size=args.batch_size or settings.IMPORT_BATCH_SIZE,
+                )
+                db.add(job)
+                await db.commit()
+            job_id = job.id
+
+        print(f"Import {job_id} ({job.dataset}, {job.format})")
+        await run_import(job_id)
+
+        async with AsyncSessionLocal() as db:
+            job = await db.get(ImportJob, job_id)
+        print(
+            f"{job.status.value}: {job.rows_processed} lignes traitées, "
+            f"{job.rows_inserted} insérées, {job.rows_failed} en erreur"
+        )
+        for error in (job.errors or [])[:20]:
+            print(f"  ligne {error['row']}: {error['errors']}")
+        if job.error_message:
+            print(f"Erreur: {job.error_message}", file=sys.stderr)
+            print(f"Reprise: python -m app.cli import --resume {job_id}", file=sys.stderr)
+        return 0 if job.status == ImportStatus.COMPLETED else 1
+    finally:
+        shutdown_import_executor()
+        await close_db()
+
+
+async def backup_command(args: argparse.Namespace) -> int:
+    if args.list:
+        for snapshot in list_snapshots(backup_directory()):
+            print(
+                f"{snapshot['filename']}  {snapshot['compressed_bytes']} octets  "
+                f"{snapshot['created_at']:%Y-%m-%d %H:%M:%S}"
+            )
+        return 0
+
+    await init_db()
+    try:
+        report = await run_backup()
+    except BackupError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    finally:
+        await close_db()
+    print(
+        f"{report['filename']}: {report['size_bytes']} octets "
+        f"({report['compressed_bytes']} compressés) en {report['duration_seconds']}s, "
+        f"{report['throughput_mb_s']} Mo/s"
+    )
+    for name in report["removed"]:
+        print(f"  supprimée (rétention): {name}")
+    return 0
+
+
+async def restore_command(args: argparse.Namespace) -> int:
+    archive = Path(args.archive)
+    if not archive.exists():
+        archive = backup_directory() / args.archive
+    db_path = database_path()
+    if not args.yes:
+        print(
+            f"La base {db_path} va être remplacée par {archive.name}. "
+            "Arrêter l'application puis relancer avec --yes.",
+            file=sys.stderr,
+        )
+        return 1
+
+    try:
+        # Sauvegarde de l'état courant avant écrasement
+        if db_path.exists():
+            await init_db()
+            try:
+                previous = await run_backup(keep_all=True)
+            finally:
+                await close_db()
+            print(f"État courant sauvegardé: {previous['filename']}")
+        report = restore_snapshot(archive, db_path)
+    except BackupError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print(f"Restauré depuis {report['filename']} en {report['duration_seconds']}s")
+    return 0
+
+
+async def rebuild_stats_command(args: argparse.Namespace) -> int:
+    await init_db()
+    try:
+        async with AsyncSessionLocal() as db:
+            await rebuild_stats(db)
+    finally:
+        await close_db()
+    print("Statistiques reconstruites")
+    return 0
+
+
+async def archive_logs_command(args: argparse.Namespace) -> int:
+    await init_db()
+    try:
+        report = await run_archive()
+    finally:
+        await close_db()
+    for name in report["segments"]:
+        print(f"Segment scellé: {name}")
+    print(f"{report['rows_archived']} lignes archivées, {report['rows_purged']} supprimées de la table")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="Import en masse (NDJSON ou CSV)")
+    import_parser.add_argument("dataset", nargs="?", choices=IMPORT_DATASETS)
+    import_parser.add_argument("path", nargs="?")
+    import_parser.add_argument("--format", choices=("ndjson", "csv"))
+    import_parser.add_argument("--batch-size", type=int)
+    import_parser.add_argument("--resume", metavar="JOB_ID", help="Reprendre un import interrompu")
+    import_parser.set_defaults(handler=import_command)
+
+    backup_parser = commands.add_parser("backup", help="Sauvegarde à chaud de la base")
+    backup_parser.add_argument("--list", action="store_true", help="Lister les sauvegardes")
+    backup_parser.set_defaults(handler=backup_command)
+
+    restore_parser = commands.add_parser("restore", help="Restaurer une sauvegarde (application arrêtée)")
+    restore_parser.add_argument("archive", help="Fichier .db.gz (chemin ou nom dans BACKUP_DIR)")
+    restore_parser.add_argument("--yes", action="store_true", help="Confirmer le remplacement de la base")
+    restore_parser.set_defaults(handler=restore_command)
+
+    stats_parser = commands.add_parser("rebuild-stats", help="Recalculer les statistiques agrégées")
+    stats_parser.set_defaults(handler=rebuild_stats_command)
+
+    archive_parser = commands.add_parser("archive-logs", help="Archiver les mois clos du journal d'activité")
+    archive_parser.set_defaults(handler=archive_logs_command)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "import" and not args.resume and not (args.dataset and args.path):
+        parser.error("dataset et path sont requis (ou --resume JOB_ID)")
+    return asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
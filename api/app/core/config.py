@@ -52,6 +52,72 @@ class Settings(BaseSettings):
     # Répertoire d'upload
     UPLOAD_DIR: str = "./data/uploads"
     
+    # Nombre d'entrées du cache de métadonnées des fichiers servis
+    FILE_INFO_CACHE_SIZE: int = 4096
+    
+    # Variantes d'images (miniatures, WebP)
+    DERIVATIVES_DIR: str = "./data/derivatives"
+    DERIVATIVES_MAX_BYTES: int = 512 * 1024 * 1024
+    IMAGE_DERIVATIVE_WIDTHS: list[int] = [160, 320, 640, 1280]
+    IMAGE_QUALITY: int = 80
+    IMAGE_WORKERS: int = 2
+    
+    # Optimisation des images à l'upload (ré-encodage, suppression EXIF)
+    IMAGE_OPTIMIZE_ON_UPLOAD: bool = True
+    IMAGE_MAX_DIMENSION: int = 2048
+    
+    # Uploads reprenables (données partielles et expiration des sessions)
+    PARTIAL_UPLOAD_DIR: str = "./data/partial_uploads"
+    RESUMABLE_UPLOAD_EXPIRY_HOURS: int = 24
+    RESUMABLE_UPLOAD_CLEANUP_INTERVAL: int = 900  # secondes
+    
+    # Ramasse-miettes des fichiers non référencés
+    UPLOAD_GC_GRACE_HOURS: int = 48
+    UPLOAD_GC_INTERVAL_HOURS: int = 24
+    UPLOAD_GC_BATCH_SIZE: int = 200
+    UPLOAD_GC_BATCH_PAUSE: float = 0.5  # secondes entre deux lots
+    # Passage planifié en simulation tant que la suppression n'est pas activée
+    UPLOAD_GC_SCHEDULED_DELETE: bool = False
+    
+    # Import en masse
+    IMPORT_DIR: str = "./data/imports"
+    IMPORT_BATCH_SIZE: int = 1000
+    IMPORT_WORKERS: int = 2
+    IMPORT_MAX_ERRORS: int = 1000  # erreurs par ligne conservées par import
+    
+    # Sauvegardes à chaud de la base
+    BACKUP_DIR: str = "./data/backups"
+    BACKUP_INTERVAL_HOURS: int = 24  # 0 = pas de sauvegarde planifiée
+    BACKUP_RETENTION_COUNT: int = 14  # sauvegardes conservées
+    BACKUP_PAGES_PER_STEP: int = 256  # pages copiées par étape
+    BACKUP_STEP_PAUSE: float = 0.01  # secondes entre deux étapes
+    BACKUP_MAX_RESTARTS: int = 3  # reprises tolérées avant la copie en une seule étape
+    
+    # Archivage mensuel du journal d'activité
+    ACTIVITY_ARCHIVE_DIR: str = "./data/activity_archive"
+    ACTIVITY_LOG_HOT_MONTHS: int = 2  # mois gardés dans la table (dont le mois courant)
+    ACTIVITY_ARCHIVE_INTERVAL_HOURS: int = 24
+    ACTIVITY_ARCHIVE_BATCH_SIZE: int = 2000  # lignes supprimées par transaction
+    ACTIVITY_ARCHIVE_CACHE_BYTES: int = 64 * 1024 * 1024  # lignes de segments gardées en mémoire
+    
+    # Statistiques du tableau de bord
+    STATS_CACHE_SECONDS: int = 10
+    
+    # Modération groupée
+    MODERATION_BULK_MAX_IDS: int = 200  # identifiants par requête groupée
+    MODERATION_LEASE_MINUTES: int = 15  # durée d'un bail de la file de modération
+    
+    # Détection des quasi-doublons (MinHash/LSH)
+    DUPLICATE_THRESHOLD: float = 0.6  # similarité estimée minimale signalée
+    DUPLICATE_MAX_FLAGS: int = 5  # doublons probables retenus par déclaration
+    
+    # Suggestions de saisie (catégorie, lieu)
+    SUGGEST_TOP_K: int = 10  # valeurs gardées par préfixe court
+    SUGGEST_MIN_COUNT: int = 3  # occurrences minimales d'une valeur suggérée
+    
+    # Listes paginées
+    LIST_PREVIEW_LENGTH: int = 160  # caractères de description_preview
+    
     # Mobile Money Configuration
     FLOOZ_API_URL: str = ""
     FLOOZ_MERCHANT_ID: str = ""
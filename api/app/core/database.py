@@ -7,7 +7,7 @@ from pathlib import Path
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import event
+from sqlalchemy import event, text
 
 from app.core.config import get_settings
 
@@ -26,6 +26,27 @@ engine = create_async_engine(
     pool_pre_ping=True,
 )
 
+
+class _SQLiteCompiler(engine.dialect.statement_compiler):
+    """Active les indications de table (with_hint) pour "INDEXED BY"."""
+
+    def get_from_hint_text(self, table, text):
+        return text
+
+
+engine.dialect.statement_compiler = _SQLiteCompiler
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Paramètres SQLite propres à chaque connexion."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA secure_delete=ON")
+    cursor.close()
+
+
 # Session factory async
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -62,16 +83,16 @@ async def init_db():
     """
     async with engine.begin() as conn:
         # Importer tous les modèles pour les enregistrer
-        from app.models import user, declaration, tip, activity_log
+        from app.models import user, declaration, tip, activity_log, import_job, stats
         
-        # Créer les tables
+        # Créer les tables puis appliquer les évolutions de schéma
+        from app.core.migrations import run_migrations
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
         
-        # Configurer les paramètres de sécurité SQLite
-        await conn.execute("PRAGMA journal_mode=WAL")
-        await conn.execute("PRAGMA synchronous=NORMAL")
-        await conn.execute("PRAGMA foreign_keys=ON")
-        await conn.execute("PRAGMA secure_delete=ON")
+        # Mode WAL (persistant dans le fichier de base)
+        # Les autres paramètres sont appliqués à chaque connexion
+        await conn.execute(text("PRAGMA journal_mode=WAL"))
 
 
 async def close_db():
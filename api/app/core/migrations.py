@@ -0,0 +1,304 @@
+"""
+Migrations de schéma légères pour SQLite.
+create_all crée les tables et index manquants; les évolutions d'un schéma
+existant (index redéfinis, colonnes ajoutées, reprises de données) sont
+appliquées ici une seule fois, dans l'ordre de déclaration, et
+enregistrées dans la table schema_migrations.
+"""
+from datetime import datetime, timezone
+from typing import Callable
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+MIGRATIONS: list[tuple[str, Callable[[Connection], None]]] = []
+
+
+def migration(name: str):
+    """Déclare une migration (exécutée après create_all, dans l'ordre)."""
+    def register(func: Callable[[Connection], None]):
+        MIGRATIONS.append((name, func))
+        return func
+    return register
+
+
+def column_exists(conn: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+
+def add_column(conn: Connection, table: str, column: str, ddl: str) -> bool:
+    """Ajoute une colonne si elle n'existe pas. Retourne True si elle a été ajoutée."""
+    if column_exists(conn, table, column):
+        return False
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return True
+
+
+def recreate_indexes(conn: Connection, table, names: tuple[str, ...]) -> None:
+    """Recrée des index dont la définition a changé dans le modèle."""
+    for index in table.indexes:
+        if index.name in names:
+            index.drop(conn, checkfirst=True)
+            index.create(conn)
+
+
+def convert_binary_ids(conn: Connection) -> None:
+    """
+    Identifiants texte (36 caractères) convertis en UUID binaire de 16
+    octets, sur place: une colonne déclarée CHAR(36) conserve les BLOB tels
+    quels. Clés primaires et étrangères changent dans la même transaction:
+    contrôle des clés étrangères reporté à la validation. Sans effet sur
+    une base déjà convertie.
+    """
+    from app.core.database import Base
+    from app.core.ids import BinaryUUID, id_bytes
+    conn.connection.dbapi_connection.create_function("id_bytes", 1, id_bytes, deterministic=True)
+    # Le pilote n'ouvre la transaction qu'avant une écriture; hors
+    # transaction, le report serait annulé dès la fin de l'instruction
+    conn.execute(text("UPDATE schema_migrations SET name = name WHERE 0"))
+    conn.execute(text("PRAGMA defer_foreign_keys = ON"))
+    existing = set(inspect(conn).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        columns = [
+            c.name for c in table.columns
+            if isinstance(c.type, BinaryUUID) and column_exists(conn, table.name, c.name)
+        ]
+        if not columns:
+            continue
+        # Une valeur qui n'est pas un UUID reste en texte
+        conn.execute(text(
+            f"UPDATE {table.name} SET "
+            + ", ".join(f"{c} = coalesce(id_bytes({c}), {c})" for c in columns)
+            + " WHERE " + " OR ".join(f"typeof({c}) = 'text'" for c in columns)
+        ))
+
+
+def run_migrations(conn: Connection) -> None:
+    """Applique les migrations non encore enregistrées (appelée par init_db)."""
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "name VARCHAR(100) PRIMARY KEY, applied_at DATETIME NOT NULL)"
+    ))
+    applied = set(conn.execute(text("SELECT name FROM schema_migrations")).scalars())
+    for name, func in MIGRATIONS:
+        if name in applied:
+            continue
+        func(conn)
+        conn.execute(
+            text("INSERT INTO schema_migrations (name, applied_at) VALUES (:name, :applied_at)"),
+            {"name": name, "applied_at": datetime.now(timezone.utc).isoformat()},
+        )
+
+
+# === Migrations ===
+
+@migration("0001_activity_log_keyset_indexes")
+def _activity_log_keyset_indexes(conn: Connection) -> None:
+    # Index composites terminés par (created_at, id): filtre et tri par le même index
+    from app.models.activity_log import ActivityLog
+    recreate_indexes(conn, ActivityLog.__table__, (
+        "idx_activity_action",
+        "idx_activity_user",
+        "idx_activity_target",
+        "idx_activity_created",
+    ))
+
+
+@migration("0002_declaration_status_events")
+def _declaration_status_events(conn: Connection) -> None:
+    # Reprise de l'ancienne colonne JSON status_history dans la table d'événements
+    import json
+    import sqlite3
+
+    from app.core.ids import new_id
+    from app.models.declaration import DeclarationStatus, DeclarationStatusEvent
+
+    if not column_exists(conn, "declarations", "status_history"):
+        return
+
+    def parse_timestamp(value, default):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return default
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+
+    # Événements écrits avec des identifiants binaires (voir 0008_binary_ids)
+    convert_binary_ids(conn)
+    table = DeclarationStatusEvent.__table__
+    rows = conn.execute(text(
+        "SELECT id, status_history, created_at FROM declarations "
+        "WHERE status_history IS NOT NULL"
+    ))
+    batch = []
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for declaration_id, history, created_at in rows:
+        # Requête textuelle: les dates arrivent sous forme de chaînes
+        created_at = parse_timestamp(created_at, now)
+        try:
+            entries = json.loads(history) if isinstance(history, str) else history
+        except ValueError:
+            continue
+        for entry in entries or []:
+            try:
+                status = DeclarationStatus(entry.get("status"))
+            except ValueError:
+                continue
+            batch.append({
+                "id": new_id(),
+                "declaration_id": declaration_id,
+                "status": status,
+                "comment": entry.get("comment") or None,
+                "changed_by": entry.get("changed_by"),
+                "created_at": parse_timestamp(entry.get("timestamp"), created_at),
+            })
+        if len(batch) >= 1000:
+            conn.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        conn.execute(table.insert(), batch)
+
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        conn.execute(text("ALTER TABLE declarations DROP COLUMN status_history"))
+    else:
+        conn.execute(text("UPDATE declarations SET status_history = NULL"))
+
+
+@migration("0003_message_counters")
+def _message_counters(conn: Connection) -> None:
+    # Compteurs de messagerie sur les déclarations, recalculés une fois ici
+    from app.models.declaration import Declaration, Message
+    for column in ("messages_count", "unread_messages_count", "declarant_unread_count"):
+        add_column(conn, "declarations", column, "INTEGER NOT NULL DEFAULT 0")
+    add_column(conn, "declarations", "last_message_at", "DATETIME")
+    conn.execute(text("""
+        UPDATE declarations SET
+            messages_count = (
+                SELECT count(*) FROM messages AS m WHERE m.declaration_id = declarations.id
+            ),
+            unread_messages_count = (
+                SELECT count(*) FROM messages AS m
+                WHERE m.declaration_id = declarations.id
+                  AND m.sender_type = 'declarant' AND m.is_read = 0
+            ),
+            declarant_unread_count = (
+                SELECT count(*) FROM messages AS m
+                WHERE m.declaration_id = declarations.id
+                  AND m.sender_type = 'admin' AND m.is_read = 0
+            ),
+            last_message_at = (
+                SELECT max(m.created_at) FROM messages AS m WHERE m.declaration_id = declarations.id
+            )
+        WHERE EXISTS (SELECT 1 FROM messages AS m WHERE m.declaration_id = declarations.id)
+    """))
+    recreate_indexes(conn, Message.__table__, ("idx_message_declaration", "idx_message_read"))
+    recreate_indexes(conn, Declaration.__table__, ("idx_declaration_inbox",))
+
+
+@migration("0004_tip_counters")
+def _tip_counters(conn: Connection) -> None:
+    # Compteurs d'indices sur les déclarations, recalculés une fois ici
+    add_column(conn, "declarations", "tips_count", "INTEGER NOT NULL DEFAULT 0")
+    add_column(conn, "declarations", "unread_tips_count", "INTEGER NOT NULL DEFAULT 0")
+    conn.execute(text("""
+        UPDATE declarations SET
+            tips_count = (
+                SELECT count(*) FROM tips AS t WHERE t.declaration_id = declarations.id
+            ),
+            unread_tips_count = (
+                SELECT count(*) FROM tips AS t
+                WHERE t.declaration_id = declarations.id AND coalesce(t.is_read, 0) = 0
+            )
+        WHERE EXISTS (SELECT 1 FROM tips AS t WHERE t.declaration_id = declarations.id)
+    """))
+
+
+@migration("0005_moderation_queue")
+def _moderation_queue(conn: Connection) -> None:
+    # Rang de priorité et bail de modération, index partiels de la file
+    from app.models.declaration import PRIORITY_RANK, Declaration
+    if add_column(conn, "declarations", "priority_rank", "INTEGER NOT NULL DEFAULT 1"):
+        for priority, rank in PRIORITY_RANK.items():
+            conn.execute(
+                text("UPDATE declarations SET priority_rank = :rank WHERE priority = :priority"),
+                {"rank": rank, "priority": priority.name},
+            )
+    add_column(conn, "declarations", "claimed_by", "CHAR(36)")
+    add_column(conn, "declarations", "claim_expires_at", "DATETIME")
+    recreate_indexes(conn, Declaration.__table__, ("idx_declaration_queue", "idx_declaration_claims"))
+
+
+@migration("0006_categories")
+def _categories(conn: Connection) -> None:
+    # Référentiel des catégories: catalogue initial, rattachement des
+    # déclarations existantes, statistiques regroupées par identifiant
+    from app.models.category import Category, CategorySynonym
+    from app.models.declaration import Declaration
+    from app.models.stats import DeclarationDailyStat
+    from app.services.categories import CATALOG, category_key
+
+    categories, synonyms = Category.__table__, CategorySynonym.__table__
+    known = dict(conn.execute(text("SELECT key, category_id FROM category_synonyms")).all())
+
+    def create(label: str) -> int:
+        category_id = conn.execute(
+            categories.insert().values(name=label, created_at=datetime.now(timezone.utc))
+        ).inserted_primary_key[0]
+        known[category_key(label)] = category_id
+        conn.execute(synonyms.insert().values(key=category_key(label), category_id=category_id))
+        return category_id
+
+    for name, variants in CATALOG.items():
+        category_id = known.get(category_key(name)) or create(name)
+        for variant in variants:
+            if category_key(variant) not in known:
+                known[category_key(variant)] = category_id
+                conn.execute(synonyms.insert().values(key=category_key(variant), category_id=category_id))
+
+    add_column(conn, "declarations", "category_id", "INTEGER REFERENCES categories(id)")
+    # Libellés distincts rattachés une fois, puis une seule passe sur la table
+    labels = conn.execute(text(
+        "SELECT category, count(*) FROM declarations WHERE category_id IS NULL "
+        "GROUP BY category ORDER BY count(*) DESC"
+    )).all()
+    if labels:
+        conn.execute(text(
+            "CREATE TEMP TABLE category_backfill (label TEXT PRIMARY KEY, category_id INTEGER NOT NULL)"
+        ))
+        conn.execute(
+            text("INSERT INTO category_backfill (label, category_id) VALUES (:label, :category_id)"),
+            [
+                # Libellé le plus fréquent d'une forme inconnue: nom de la catégorie créée
+                {"label": label, "category_id": known.get(category_key(label)) or create(label)}
+                for label, _ in labels
+            ],
+        )
+        conn.execute(text("""
+            UPDATE declarations SET category_id = (
+                SELECT b.category_id FROM category_backfill AS b WHERE b.label = declarations.category
+            )
+            WHERE category_id IS NULL
+        """))
+        conn.execute(text("DROP TABLE category_backfill"))
+    recreate_indexes(conn, Declaration.__table__, ("idx_declaration_category",))
+
+    # Statistiques regroupées par libellé: table recréée, recalculée au démarrage
+    if column_exists(conn, "declaration_daily_stats", "category"):
+        DeclarationDailyStat.__table__.drop(conn)
+        DeclarationDailyStat.__table__.create(conn)
+
+
+@migration("0007_public_listing_index")
+def _public_listing_index(conn: Connection) -> None:
+    # Liste publique triée par rang de priorité sans tri temporaire
+    from app.models.declaration import Declaration
+    recreate_indexes(conn, Declaration.__table__, ("idx_declaration_public",))
+
+
+@migration("0008_binary_ids")
+def _binary_ids(conn: Connection) -> None:
+    convert_binary_ids(conn)
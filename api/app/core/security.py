@@ -7,6 +7,7 @@ import string
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
+import bleach
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError, InvalidHash
 from jose import JWTError, jwt
@@ -123,15 +124,31 @@ def generate_otp_code() -> str:
     return ''.join(secrets.choice(string.digits) for _ in range(6))
 
 
+# Octets que bleach.clean modifie dans un texte: balisage et entités (& < >),
+# caractères de contrôle autres que tabulation et saut de ligne. En UTF-8,
+# aucun caractère multi-octet ne contient d'octet inférieur à 0x80.
+_UNSAFE_BYTES = bytes(range(0x00, 0x09)) + bytes(range(0x0B, 0x20)) + b"&<>"
+
+
+def _needs_cleaning(text: str) -> bool:
+    try:
+        raw = text.encode()
+    except UnicodeEncodeError:  # Surrogates isolés
+        return True
+    # Filtrage en C sur tout le texte: la longueur change si un octet sensible est présent
+    return len(raw.translate(None, _UNSAFE_BYTES)) != len(raw)
+
+
 def sanitize_input(text: str, max_length: int = 1000) -> str:
     """
     Nettoie une entrée utilisateur.
     Supprime les caractères dangereux et limite la longueur.
+    Un texte sans balisage ni caractère de contrôle ressort inchangé de
+    bleach: il n'y passe pas. À appeler une seule fois par champ (validateurs
+    des schémas), le nettoyage n'étant pas idempotent (& devient &amp;).
     """
-    import bleach
-    
-    # Nettoyer le HTML
-    cleaned = bleach.clean(text, tags=[], strip=True)
+    if _needs_cleaning(text):
+        text = bleach.clean(text, tags=[], strip=True)
     
     # Limiter la longueur
-    return cleaned[:max_length].strip()
+    return text[:max_length].strip()
@@ -0,0 +1,37 @@
+"""
+Tâches périodiques exécutées dans la boucle de l'application.
+Démarrées et arrêtées par le lifespan de FastAPI.
+"""
+import asyncio
+from typing import Awaitable, Callable
+
+import structlog
+
+_tasks: dict[str, asyncio.Task] = {}
+
+
+async def _run_periodic(name: str, func: Callable[[], Awaitable], interval: float) -> None:
+    logger = structlog.get_logger()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await logger.aerror("Échec de la tâche périodique", task=name, error=str(e))
+
+
+def start_periodic(name: str, func: Callable[[], Awaitable], interval: float) -> None:
+    """Exécute func toutes les `interval` secondes (première exécution après un intervalle)."""
+    if name in _tasks:
+        return
+    _tasks[name] = asyncio.create_task(_run_periodic(name, func, interval), name=name)
+
+
+async def stop_periodic_tasks() -> None:
+    """Annule toutes les tâches périodiques."""
+    for task in _tasks.values():
+        task.cancel()
+    await asyncio.gather(*_tasks.values(), return_exceptions=True)
+    _tasks.clear()
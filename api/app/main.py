@@ -7,11 +7,29 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from app.core.config import get_settings
-from app.core.database import init_db, close_db
-from app.api.routes import auth_router, declarations_router, tips_router, payments_router, files_router
+from app.core.database import init_db, close_db, AsyncSessionLocal
+from app.core.tasks import start_periodic, stop_periodic_tasks
+from app.services.images import shutdown_executor
+from app.services.importer import shutdown_import_executor
+from app.services.categories import load_categories
+from app.services.duplicates import load_duplicate_index
+from app.services.matching import load_match_index
+from app.services.suggestions import load_suggestions
+from app.services.stats import rebuild_stats, stats_need_rebuild
+from app.api.routes import (
+    auth_router,
+    declarations_router,
+    tips_router,
+    messages_router,
+    payments_router,
+    files_router,
+    admin_router,
+)
+from app.api.routes.files import cleanup_upload_sessions, run_scheduled_upload_gc
+from app.api.routes.admin import run_scheduled_backup, run_scheduled_archive
 from app.middleware.security import (
     SecurityHeadersMiddleware,
     RateLimitMiddleware,
@@ -54,9 +72,57 @@ async def lifespan(app: FastAPI):
     await init_db()
     await logger.ainfo("Base de données initialisée")
     
+    # Correspondances libellé -> catégorie du référentiel
+    indexed = await load_categories()
+    await logger.ainfo("Référentiel des catégories chargé", synonyms=indexed)
+    
+    # Statistiques agrégées absentes (premier démarrage): recalcul complet
+    async with AsyncSessionLocal() as db:
+        if await stats_need_rebuild(db):
+            await rebuild_stats(db)
+            await logger.ainfo("Statistiques reconstruites")
+    
+    # Index des quasi-doublons (signatures enregistrées, manquantes calculées)
+    indexed = await load_duplicate_index()
+    await logger.ainfo("Index des doublons chargé", declarations=indexed)
+    
+    # Index de rapprochement indices / pertes validées
+    indexed = await load_match_index()
+    await logger.ainfo("Index de rapprochement chargé", declarations=indexed)
+    
+    # Suggestions de saisie (catégorie, lieu)
+    indexed = await load_suggestions()
+    await logger.ainfo("Index des suggestions chargé", values=indexed)
+    
+    # Tâches de maintenance
+    start_periodic(
+        "cleanup_upload_sessions",
+        cleanup_upload_sessions,
+        settings.RESUMABLE_UPLOAD_CLEANUP_INTERVAL,
+    )
+    start_periodic(
+        "upload_gc",
+        run_scheduled_upload_gc,
+        settings.UPLOAD_GC_INTERVAL_HOURS * 3600,
+    )
+    start_periodic(
+        "activity_log_archive",
+        run_scheduled_archive,
+        settings.ACTIVITY_ARCHIVE_INTERVAL_HOURS * 3600,
+    )
+    if settings.BACKUP_INTERVAL_HOURS > 0:
+        start_periodic(
+            "database_backup",
+            run_scheduled_backup,
+            settings.BACKUP_INTERVAL_HOURS * 3600,
+        )
+    
     yield
     
     # Arrêt
+    await stop_periodic_tasks()
+    shutdown_executor()
+    shutdown_import_executor()
     await close_db()
     await logger.ainfo("Application arrêtée")
 
@@ -70,6 +136,8 @@ app = FastAPI(
     redoc_url="/redoc" if settings.DEBUG else None,
     openapi_url="/openapi.json" if settings.DEBUG else None,
     lifespan=lifespan,
+    # Sérialisation par orjson (listes: voir app/api/responses.py)
+    default_response_class=ORJSONResponse,
 )
 
 # === Middlewares (ordre important: dernier ajouté = premier exécuté) ===
@@ -81,7 +149,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
-    expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"],
+    expose_headers=[
+        "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset",
+        "Location", "Upload-Offset", "Upload-Length", "Upload-Expires",
+    ],
 )
 
 # Rate limiting
@@ -99,8 +170,10 @@ app.add_middleware(RequestLoggingMiddleware)
 app.include_router(auth_router, prefix="/api/v1")
 app.include_router(declarations_router, prefix="/api/v1")
 app.include_router(tips_router, prefix="/api/v1")
+app.include_router(messages_router, prefix="/api/v1")
 app.include_router(payments_router, prefix="/api/v1/payments", tags=["payments"])
 app.include_router(files_router, prefix="/api/v1/files", tags=["files"])
+app.include_router(admin_router, prefix="/api/v1")
 
 
 # === Endpoints de base ===
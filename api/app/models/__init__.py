@@ -2,20 +2,40 @@
 Exports des modèles de l'application.
 """
 from app.models.user import User, UserRole, UserRoleAssociation
-from app.models.declaration import Declaration, DeclarationType, DeclarationStatus, DeclarationPriority, Message
+from app.models.category import Category, CategorySynonym
+from app.models.declaration import (
+    Declaration,
+    DeclarationType,
+    DeclarationStatus,
+    DeclarationPriority,
+    DeclarationStatusEvent,
+    DeclarationSignature,
+    Message,
+)
 from app.models.tip import Tip
-from app.models.activity_log import ActivityLog, ActivityAction
+from app.models.activity_log import ActivityLog, ActivityAction, ActivityLogSegment
+from app.models.import_job import ImportJob, ImportStatus
+from app.models.stats import DeclarationDailyStat, TipDailyStat
 
 __all__ = [
     "User",
     "UserRole", 
     "UserRoleAssociation",
+    "Category",
+    "CategorySynonym",
     "Declaration",
     "DeclarationType",
     "DeclarationStatus",
     "DeclarationPriority",
+    "DeclarationStatusEvent",
+    "DeclarationSignature",
     "Message",
     "Tip",
     "ActivityLog",
     "ActivityAction",
+    "ActivityLogSegment",
+    "ImportJob",
+    "ImportStatus",
+    "DeclarationDailyStat",
+    "TipDailyStat",
 ]
@@ -4,13 +4,12 @@ Trace toutes les actions pour l'audit et la sécurité.
 """
 from datetime import datetime, timezone
 from enum import Enum as PyEnum
-import uuid
 
-from sqlalchemy import Column, String, Text, DateTime, Enum, JSON, Index, ForeignKey
-from sqlalchemy.dialects.sqlite import CHAR
+from sqlalchemy import Column, String, Text, DateTime, Enum, JSON, Index, Integer, ForeignKey
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
+from app.core.ids import BinaryUUID, new_id
 
 
 class ActivityAction(str, PyEnum):
@@ -57,18 +56,18 @@ class ActivityLog(Base):
     """Journal d'activité pour l'audit."""
     __tablename__ = "activity_logs"
     
-    id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
     
     # Action
     action = Column(Enum(ActivityAction), nullable=False)
     
     # Acteur (peut être null pour les actions anonymes)
-    user_id = Column(CHAR(36), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    user_id = Column(BinaryUUID, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     username = Column(String(50), nullable=True)  # Copie pour historique si user supprimé
     
     # Cible de l'action
     target_type = Column(String(50), nullable=True)  # "declaration", "user", "tip", etc.
-    target_id = Column(CHAR(36), nullable=True)
+    target_id = Column(BinaryUUID, nullable=True)
     
     # Détails additionnels
     details = Column(JSON, default=dict)
@@ -83,9 +82,42 @@ class ActivityLog(Base):
     # Relation
     user = relationship("User", back_populates="activity_logs")
     
+    # Chaque index se termine par (created_at, id): un filtre d'égalité,
+    # la période et la pagination par curseur parcourent le même index
     __table_args__ = (
-        Index('idx_activity_action', 'action'),
-        Index('idx_activity_user', 'user_id'),
-        Index('idx_activity_target', 'target_type', 'target_id'),
-        Index('idx_activity_created', 'created_at'),
+        Index('idx_activity_action', 'action', 'created_at', 'id'),
+        Index('idx_activity_user', 'user_id', 'created_at', 'id'),
+        Index('idx_activity_target', 'target_type', 'target_id', 'created_at', 'id'),
+        Index('idx_activity_ip', 'ip_address', 'created_at', 'id'),
+        Index('idx_activity_created', 'created_at', 'id'),
+    )
+
+
+class ActivityLogSegment(Base):
+    """
+    Segment d'archive du journal d'activité (un mois clos, ou un complément
+    pour des lignes tardives). Le fichier NDJSON compressé n'est jamais réécrit.
+    """
+    __tablename__ = "activity_log_segments"
+    
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
+    
+    month = Column(String(7), nullable=False)  # "AAAA-MM"
+    part = Column(Integer, nullable=False, default=1)
+    filename = Column(String(255), unique=True, nullable=False)
+    
+    # Contenu et intégrité
+    row_count = Column(Integer, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    first_created_at = Column(DateTime(timezone=True), nullable=False)
+    last_created_at = Column(DateTime(timezone=True), nullable=False)
+    
+    # Scellé puis purgé de la table activity_logs
+    sealed_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    purged_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        Index('idx_segment_month', 'month', 'part'),
+        Index('idx_segment_range', 'last_created_at', 'first_created_at'),
     )
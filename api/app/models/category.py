@@ -0,0 +1,35 @@
+"""
+Référentiel des catégories de déclaration.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Index
+
+from app.core.database import Base
+
+
+class Category(Base):
+    """Catégorie canonique (identifiant entier utilisé pour filtrer et agréger)."""
+    __tablename__ = "categories"
+    # AUTOINCREMENT: un identifiant n'est jamais réattribué (caches en mémoire)
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class CategorySynonym(Base):
+    """
+    Forme normalisée (minuscules, sans accents) d'un libellé rattaché à une
+    catégorie. Le nom canonique de chaque catégorie y figure aussi.
+    """
+    __tablename__ = "category_synonyms"
+
+    key = Column(String(100), primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
+
+    __table_args__ = (
+        Index('idx_category_synonym_category', 'category_id'),
+    )
@@ -3,13 +3,12 @@ Modèle pour les déclarations (pertes et plaintes).
 """
 from datetime import datetime, timezone
 from enum import Enum as PyEnum
-import uuid
 
-from sqlalchemy import Column, String, Text, DateTime, Enum, JSON, Index, Integer
-from sqlalchemy.dialects.sqlite import CHAR
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, DateTime, Enum, JSON, Index, Integer, ForeignKey, LargeBinary, text
+from sqlalchemy.orm import relationship, validates
 
 from app.core.database import Base
+from app.core.ids import BinaryUUID, new_id
 
 
 class DeclarationType(str, PyEnum):
@@ -36,16 +35,31 @@ class DeclarationPriority(str, PyEnum):
     URGENTE = "urgente"
 
 
+# Rang numérique de la priorité (tri par urgence servi par un index)
+PRIORITY_RANK = {
+    DeclarationPriority.BASSE: 0,
+    DeclarationPriority.MOYENNE: 1,
+    DeclarationPriority.IMPORTANTE: 2,
+    DeclarationPriority.URGENTE: 3,
+}
+
+# Condition des index partiels sur les déclarations en attente. Écrite en
+# littéral: SQLite n'utilise un index partiel que si la requête reprend
+# la même condition sans paramètre lié.
+PENDING_CONDITION = "status = 'EN_ATTENTE'"
+
+
 class Declaration(Base):
     """Modèle principal pour les déclarations."""
     __tablename__ = "declarations"
     
-    id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
     tracking_code = Column(String(20), unique=True, nullable=False, index=True)
     
     # Type et catégorie
     type = Column(Enum(DeclarationType), nullable=False)
-    category = Column(String(100), nullable=False)
+    category = Column(String(100), nullable=False)  # Libellé saisi, affiché tel quel
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)  # Référentiel (filtres, statistiques)
     
     # Détails
     description = Column(Text, nullable=False)
@@ -63,19 +77,34 @@ class Declaration(Base):
     # Statut et priorité
     status = Column(Enum(DeclarationStatus), default=DeclarationStatus.EN_ATTENTE)
     priority = Column(Enum(DeclarationPriority), default=DeclarationPriority.MOYENNE)
+    priority_rank = Column(
+        Integer, nullable=False,
+        default=PRIORITY_RANK[DeclarationPriority.MOYENNE], server_default="1",
+    )
+    
+    # Bail de modération (file de travail): modérateur et échéance
+    claimed_by = Column(BinaryUUID, nullable=True)
+    claim_expires_at = Column(DateTime(timezone=True), nullable=True)
     
     # Pièces jointes (stockées en JSON pour SQLite)
     attachments = Column(JSON, default=list)
     
-    # Métadonnées techniques
-    metadata = Column(JSON, default=dict)
-    
-    # Historique des changements de statut
-    status_history = Column(JSON, default=list)
+    # Métadonnées techniques ("metadata" est réservé par SQLAlchemy)
+    metadata_ = Column("metadata", JSON, default=dict)
     
     # Notes administratives (jamais exposées publiquement)
     admin_notes = Column(Text, nullable=True)
     
+    # Compteurs d'indices, tenus à jour à l'écriture (voir services/tip_counters.py)
+    tips_count = Column(Integer, nullable=False, default=0, server_default="0")
+    unread_tips_count = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    # Compteurs de messagerie, tenus à jour à l'écriture (voir services/messages.py)
+    messages_count = Column(Integer, nullable=False, default=0, server_default="0")
+    unread_messages_count = Column(Integer, nullable=False, default=0, server_default="0")  # Non lus par l'équipe
+    declarant_unread_count = Column(Integer, nullable=False, default=0, server_default="0")  # Non lus par le déclarant
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    
     # Timestamps
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime(timezone=True), onupdate=lambda: datetime.now(timezone.utc))
@@ -83,6 +112,16 @@ class Declaration(Base):
     # Relations
     tips = relationship("Tip", back_populates="declaration", cascade="all, delete-orphan")
     messages = relationship("Message", back_populates="declaration", cascade="all, delete-orphan")
+    status_events = relationship(
+        "DeclarationStatusEvent", back_populates="declaration",
+        cascade="all, delete-orphan", passive_deletes=True,
+    )
+    
+    @validates('priority')
+    def _sync_priority_rank(self, key, value):
+        if value is not None:
+            self.priority_rank = PRIORITY_RANK[DeclarationPriority(value)]
+        return value
     
     # Index pour les recherches fréquentes
     __table_args__ = (
@@ -91,6 +130,24 @@ class Declaration(Base):
         Index('idx_declaration_priority', 'priority'),
         Index('idx_declaration_created', 'created_at'),
         Index('idx_declaration_type_status', 'type', 'status'),
+        Index('idx_declaration_category', 'category_id', 'created_at'),
+        # Liste publique: filtre statut/type et tri par urgence puis date
+        Index('idx_declaration_public', 'status', 'type', 'priority_rank', 'created_at'),
+        # File de modération: déclarations en attente, par urgence puis ancienneté
+        Index(
+            'idx_declaration_queue',
+            priority_rank.desc(), 'created_at', 'id', 'claim_expires_at',
+            sqlite_where=text(PENDING_CONDITION),
+        ),
+        Index(
+            'idx_declaration_claims', 'claimed_by',
+            sqlite_where=text('claimed_by IS NOT NULL'),
+        ),
+        # Boîte de réception: seules les déclarations avec des messages non lus
+        Index(
+            'idx_declaration_inbox', 'last_message_at', 'id',
+            sqlite_where=text('unread_messages_count > 0'),
+        ),
     )
 
 
@@ -98,15 +155,15 @@ class Message(Base):
     """Messages liés à une déclaration (communication admin-déclarant)."""
     __tablename__ = "messages"
     
-    id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    declaration_id = Column(CHAR(36), ForeignKey("declarations.id", ondelete="CASCADE"), nullable=False)
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
+    declaration_id = Column(BinaryUUID, ForeignKey("declarations.id", ondelete="CASCADE"), nullable=False)
     
     # Contenu
     content = Column(Text, nullable=False)
     
     # Expéditeur
     sender_type = Column(String(20), nullable=False)  # "admin" ou "declarant"
-    sender_id = Column(CHAR(36), nullable=True)  # ID de l'admin si applicable
+    sender_id = Column(BinaryUUID, nullable=True)  # ID de l'admin si applicable
     
     # Statut
     is_read = Column(Integer, default=0)  # SQLite n'a pas de vrai Boolean
@@ -118,6 +175,45 @@ class Message(Base):
     declaration = relationship("Declaration", back_populates="messages")
     
     __table_args__ = (
-        Index('idx_message_declaration', 'declaration_id'),
-        Index('idx_message_read', 'is_read'),
+        # Fil paginé par curseur (created_at, id)
+        Index('idx_message_declaration', 'declaration_id', 'created_at', 'id'),
+        # Marquage groupé comme lu
+        Index('idx_message_read', 'declaration_id', 'sender_type', 'is_read'),
+    )
+
+
+class DeclarationStatusEvent(Base):
+    """
+    Historique des statuts d'une déclaration, en ajout seul:
+    un changement de statut est une insertion, quelle que soit la longueur de l'historique.
+    """
+    __tablename__ = "declaration_status_events"
+    
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
+    declaration_id = Column(BinaryUUID, ForeignKey("declarations.id", ondelete="CASCADE"), nullable=False)
+    
+    status = Column(Enum(DeclarationStatus), nullable=False)
+    comment = Column(Text, nullable=True)  # Jamais exposé publiquement
+    changed_by = Column(String(50), nullable=True)  # Nom de l'admin (NULL: déclarant ou import)
+    
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    
+    # Relation
+    declaration = relationship("Declaration", back_populates="status_events")
+    
+    __table_args__ = (
+        Index('idx_status_event_declaration', 'declaration_id', 'created_at'),
+    )
+
+
+class DeclarationSignature(Base):
+    """
+    Signature MinHash d'une déclaration (détection des quasi-doublons).
+    L'index LSH en mémoire est reconstruit à partir de cette table au démarrage.
+    """
+    __tablename__ = "declaration_signatures"
+    
+    declaration_id = Column(
+        BinaryUUID, ForeignKey("declarations.id", ondelete="CASCADE"), primary_key=True
     )
+    signature = Column(LargeBinary, nullable=False)
@@ -0,0 +1,49 @@
+"""
+Modèle pour le suivi des imports en masse.
+Le point de reprise est mis à jour dans la même transaction que chaque lot inséré.
+"""
+from datetime import datetime, timezone
+from enum import Enum as PyEnum
+
+from sqlalchemy import Column, String, Text, DateTime, Enum, JSON, Integer, ForeignKey
+
+from app.core.database import Base
+from app.core.ids import BinaryUUID, new_id
+
+
+class ImportStatus(str, PyEnum):
+    """États d'un import."""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ImportJob(Base):
+    """Import en masse de déclarations ou d'indices."""
+    __tablename__ = "import_jobs"
+    
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
+    
+    # Source
+    dataset = Column(String(20), nullable=False)  # "declarations" ou "tips"
+    format = Column(String(10), nullable=False)  # "ndjson" ou "csv"
+    source_path = Column(String(500), nullable=False)
+    batch_size = Column(Integer, nullable=False, default=1000)
+    
+    # Avancement (point de reprise: nombre de lignes déjà traitées)
+    status = Column(Enum(ImportStatus), default=ImportStatus.PENDING, nullable=False)
+    rows_processed = Column(Integer, default=0, nullable=False)
+    rows_inserted = Column(Integer, default=0, nullable=False)
+    rows_failed = Column(Integer, default=0, nullable=False)
+    
+    # Erreurs par ligne (plafonnées) et erreur fatale éventuelle
+    errors = Column(JSON, default=list)
+    error_message = Column(Text, nullable=True)
+    
+    created_by = Column(BinaryUUID, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), onupdate=lambda: datetime.now(timezone.utc))
+    finished_at = Column(DateTime(timezone=True), nullable=True)
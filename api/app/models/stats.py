@@ -0,0 +1,35 @@
+"""
+Tables de statistiques agrégées (tableau de bord admin).
+Mises à jour de façon incrémentale par les routes d'écriture,
+reconstruites entièrement par app.services.stats.rebuild_stats.
+"""
+from sqlalchemy import Column, Date, Enum, Integer, Float
+
+from app.core.database import Base
+from app.models.declaration import DeclarationType, DeclarationStatus, DeclarationPriority
+
+
+class DeclarationDailyStat(Base):
+    """Nombre de déclarations par jour de création × type × statut × priorité × catégorie."""
+    __tablename__ = "declaration_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    type = Column(Enum(DeclarationType), primary_key=True)
+    status = Column(Enum(DeclarationStatus), primary_key=True)
+    priority = Column(Enum(DeclarationPriority), primary_key=True)
+    category_id = Column(Integer, primary_key=True)
+
+    count = Column(Integer, nullable=False, default=0)
+    # Somme des délais de première décision (déclarations traitées du groupe)
+    processing_seconds = Column(Float, nullable=False, default=0)
+
+
+class TipDailyStat(Base):
+    """Compteurs d'indices par jour de création."""
+    __tablename__ = "tip_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    unread = Column(Integer, nullable=False, default=0)
+    useful = Column(Integer, nullable=False, default=0)
+    not_useful = Column(Integer, nullable=False, default=0)
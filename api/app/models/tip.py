@@ -2,21 +2,20 @@
 Modèle pour les indices/signalements soumis par les citoyens.
 """
 from datetime import datetime, timezone
-import uuid
 
 from sqlalchemy import Column, String, Text, DateTime, JSON, Index, Integer, ForeignKey
-from sqlalchemy.dialects.sqlite import CHAR
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
+from app.core.ids import BinaryUUID, new_id
 
 
 class Tip(Base):
     """Indices soumis pour une déclaration."""
     __tablename__ = "tips"
     
-    id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    declaration_id = Column(CHAR(36), ForeignKey("declarations.id", ondelete="CASCADE"), nullable=False)
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
+    declaration_id = Column(BinaryUUID, ForeignKey("declarations.id", ondelete="CASCADE"), nullable=False)
     
     # Informations du tipster (anonymisées)
     tipster_phone = Column(String(20), nullable=True)
@@ -34,13 +33,13 @@ class Tip(Base):
     # Notes admin
     admin_notes = Column(Text, nullable=True)
     
-    # Métadonnées techniques
-    metadata = Column(JSON, default=dict)
+    # Métadonnées techniques ("metadata" est réservé par SQLAlchemy)
+    metadata_ = Column("metadata", JSON, default=dict)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     reviewed_at = Column(DateTime(timezone=True), nullable=True)
-    reviewed_by = Column(CHAR(36), ForeignKey("users.id"), nullable=True)
+    reviewed_by = Column(BinaryUUID, ForeignKey("users.id"), nullable=True)
     
     # Relations
     declaration = relationship("Declaration", back_populates="tips")
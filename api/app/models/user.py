@@ -5,13 +5,12 @@ Les rôles sont stockés dans une table séparée pour éviter les attaques d'es
 from datetime import datetime, timezone
 from enum import Enum as PyEnum
 from typing import Optional
-import uuid
 
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Enum, Index
-from sqlalchemy.dialects.sqlite import CHAR
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Enum, Index, Integer
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
+from app.core.ids import BinaryUUID, new_id
 
 
 class UserRole(str, PyEnum):
@@ -25,7 +24,7 @@ class User(Base):
     """Modèle utilisateur pour les administrateurs."""
     __tablename__ = "users"
     
-    id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
     username = Column(String(50), unique=True, nullable=False, index=True)
     email = Column(String(255), unique=True, nullable=False, index=True)
     hashed_password = Column(String(255), nullable=False)
@@ -49,7 +48,12 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=lambda: datetime.now(timezone.utc))
     
     # Relations
-    roles = relationship("UserRoleAssociation", back_populates="user", cascade="all, delete-orphan")
+    roles = relationship(
+        "UserRoleAssociation",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        foreign_keys="UserRoleAssociation.user_id",
+    )
     activity_logs = relationship("ActivityLog", back_populates="user")
     
     # Index pour les recherches fréquentes
@@ -65,12 +69,12 @@ class UserRoleAssociation(Base):
     """
     __tablename__ = "user_roles"
     
-    id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(CHAR(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
+    user_id = Column(BinaryUUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     role = Column(Enum(UserRole), nullable=False)
     
     # Qui a attribué ce rôle
-    granted_by = Column(CHAR(36), ForeignKey("users.id"), nullable=True)
+    granted_by = Column(BinaryUUID, ForeignKey("users.id"), nullable=True)
     granted_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     
     # Relation
@@ -81,6 +85,3 @@ class UserRoleAssociation(Base):
         Index('idx_user_role', 'user_id', 'role', unique=True),
     )
 
-
-# Import nécessaire pour SQLAlchemy
-from sqlalchemy import Integer
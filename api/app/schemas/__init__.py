@@ -13,6 +13,7 @@ from app.schemas.user import (
 )
 from app.schemas.declaration import (
     DeclarationCreate,
+    DeclarationImport,
     DeclarationUpdate,
     DeclarationPublicResponse,
     DeclarationAdminResponse,
@@ -22,11 +23,23 @@ from app.schemas.declaration import (
 )
 from app.schemas.tip import (
     TipCreate,
+    TipImport,
     TipPublicResponse,
     TipAdminResponse,
     TipUpdate,
     TipListResponse,
 )
+from app.schemas.admin import (
+    ImportJobResponse,
+    ImportJobDetailResponse,
+    BackupResponse,
+    BackupFile,
+    StatsResponse,
+    ActivityLogResponse,
+    ActivityLogPage,
+    ActivityLogSegmentResponse,
+    ActivityArchiveResponse,
+)
 
 __all__ = [
     # User
@@ -40,6 +53,7 @@ __all__ = [
     "TokenRefresh",
     # Declaration
     "DeclarationCreate",
+    "DeclarationImport",
     "DeclarationUpdate",
     "DeclarationPublicResponse",
     "DeclarationAdminResponse",
@@ -48,8 +62,19 @@ __all__ = [
     "AttachmentBase",
     # Tip
     "TipCreate",
+    "TipImport",
     "TipPublicResponse",
     "TipAdminResponse",
     "TipUpdate",
     "TipListResponse",
+    # Administration
+    "ImportJobResponse",
+    "ImportJobDetailResponse",
+    "BackupResponse",
+    "BackupFile",
+    "StatsResponse",
+    "ActivityLogResponse",
+    "ActivityLogPage",
+    "ActivityLogSegmentResponse",
+    "ActivityArchiveResponse",
 ]
@@ -0,0 +1,129 @@
+"""
+Schémas Pydantic des routes d'administration: imports, sauvegardes,
+statistiques et journal d'activité.
+"""
+from datetime import date, datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+from app.models.activity_log import ActivityAction
+from app.models.import_job import ImportStatus
+
+
+class ImportJobResponse(BaseModel):
+    """État d'un import en masse."""
+    id: str
+    dataset: str
+    format: str
+    batch_size: int
+    status: ImportStatus
+    rows_processed: int
+    rows_inserted: int
+    rows_failed: int
+    error_message: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class ImportJobDetailResponse(ImportJobResponse):
+    """État d'un import avec les erreurs par ligne."""
+    errors: list[dict[str, Any]] = []
+
+
+class BackupResponse(BaseModel):
+    """Rapport d'une sauvegarde."""
+    filename: str
+    size_bytes: int
+    compressed_bytes: int
+    steps: int
+    restarts: int = 0
+    single_step: bool = False
+    copy_seconds: float
+    duration_seconds: float
+    throughput_mb_s: Optional[float] = None
+    removed: list[str] = []
+
+
+class BackupFile(BaseModel):
+    """Sauvegarde disponible."""
+    filename: str
+    compressed_bytes: int
+    created_at: datetime
+
+
+class DailyCount(BaseModel):
+    date: date
+    count: int
+
+
+class TipStats(BaseModel):
+    total: int
+    unread: int
+    useful: int
+    not_useful: int
+
+
+class ActivityLogResponse(BaseModel):
+    """Entrée du journal d'activité."""
+    id: str
+    action: ActivityAction
+    user_id: Optional[str] = None
+    username: Optional[str] = None
+    target_type: Optional[str] = None
+    target_id: Optional[str] = None
+    details: Optional[dict[str, Any]] = None
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class ActivityLogPage(BaseModel):
+    """Page du journal d'activité (pagination par curseur)."""
+    items: list[ActivityLogResponse]
+    next_cursor: Optional[str] = None
+
+
+class ActivityLogSegmentResponse(BaseModel):
+    """Segment d'archive du journal d'activité."""
+    month: str
+    part: int
+    filename: str
+    row_count: int
+    size_bytes: int
+    sha256: str
+    first_created_at: datetime
+    last_created_at: datetime
+    sealed_at: datetime
+    purged_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class ActivityArchiveResponse(BaseModel):
+    """Résultat d'un passage d'archivage."""
+    segments: list[str]
+    rows_archived: int
+    rows_purged: int
+
+
+class StatsResponse(BaseModel):
+    """Statistiques du tableau de bord."""
+    total: int
+    by_status: dict[str, int]
+    by_type: dict[str, int]
+    by_priority: dict[str, int]
+    by_category: dict[str, int]
+    last_7_days: int
+    validation_rate: float
+    avg_processing_hours: float
+    daily: list[DailyCount]
+    tips: TipStats
+    generated_at: datetime
@@ -3,11 +3,12 @@ Schémas Pydantic pour les déclarations.
 Validation stricte pour la sécurité et l'intégrité des données.
 """
 from datetime import datetime
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Literal
 import re
 
 from pydantic import BaseModel, Field, field_validator
 
+from app.core.security import sanitize_input
 from app.models.declaration import DeclarationType, DeclarationStatus, DeclarationPriority
 
 
@@ -21,6 +22,13 @@ class AttachmentBase(BaseModel):
     content_type: str
     size: int
     data: Optional[str] = None  # Base64 encoded
+    # Nom du fichier stocké, renvoyé par /files/upload (référence pour le ramasse-miettes)
+    stored_name: Optional[str] = Field(None, pattern=r'^\d{8}_[0-9a-f]{32}\.(jpg|png|webp|pdf)$')
+    
+    @field_validator('filename')
+    @classmethod
+    def sanitize_filename(cls, v: str) -> str:
+        return sanitize_input(v, 255)
 
 
 class DeclarationBase(BaseModel):
@@ -31,20 +39,35 @@ class DeclarationBase(BaseModel):
     incident_date: Optional[datetime] = None
     location: Optional[str] = Field(None, max_length=500)
     
+    # Texte libre nettoyé ici, une seule fois: les routes l'utilisent tel quel
+    @field_validator('category')
+    @classmethod
+    def sanitize_category(cls, v: str) -> str:
+        v = sanitize_input(v, 100)
+        if not v:
+            raise ValueError('La catégorie est vide')
+        return v
+    
     @field_validator('description')
     @classmethod
     def sanitize_description(cls, v: str) -> str:
         # Supprimer les balises HTML potentielles
-        import bleach
-        return bleach.clean(v, tags=[], strip=True)[:5000]
+        return sanitize_input(v, 5000)
     
     @field_validator('location')
     @classmethod
     def sanitize_location(cls, v: Optional[str]) -> Optional[str]:
-        if v:
-            import bleach
-            return bleach.clean(v, tags=[], strip=True)[:500]
-        return v
+        return sanitize_input(v, 500) or None if v else v
+    
+    @field_validator('reward', check_fields=False)
+    @classmethod
+    def sanitize_reward(cls, v: Optional[str]) -> Optional[str]:
+        return sanitize_input(v, 100) or None if v else v
+    
+    @field_validator('declarant_name', check_fields=False)
+    @classmethod
+    def sanitize_declarant_name(cls, v: Optional[str]) -> Optional[str]:
+        return sanitize_input(v, 255) or None if v else v
 
 
 class DeclarationCreate(DeclarationBase):
@@ -75,12 +98,64 @@ class DeclarationCreate(DeclarationBase):
         return v
 
 
+class DeclarationImport(DeclarationBase):
+    """Schéma d'une ligne d'import (déclarations historiques, sans captcha)."""
+    declarant_name: Optional[str] = Field(None, max_length=255)
+    declarant_phone: Optional[str] = Field(None, max_length=20)
+    declarant_email: Optional[str] = Field(None, max_length=255)
+    reward: Optional[str] = Field(None, max_length=100)
+    status: DeclarationStatus = DeclarationStatus.EN_ATTENTE
+    priority: DeclarationPriority = DeclarationPriority.MOYENNE
+    created_at: Optional[datetime] = None
+    
+    @field_validator('declarant_phone')
+    @classmethod
+    def validate_phone(cls, v: Optional[str]) -> Optional[str]:
+        if v and not PHONE_REGEX.match(v):
+            raise ValueError('Le numéro de téléphone doit être au format +228XXXXXXXX')
+        return v
+
+
 class DeclarationUpdate(BaseModel):
     """Schéma pour la mise à jour admin d'une déclaration."""
     status: Optional[DeclarationStatus] = None
     priority: Optional[DeclarationPriority] = None
     admin_notes: Optional[str] = Field(None, max_length=2000)
     status_comment: Optional[str] = Field(None, max_length=500)
+    
+    @field_validator('admin_notes')
+    @classmethod
+    def sanitize_admin_notes(cls, v: Optional[str]) -> Optional[str]:
+        return sanitize_input(v, 2000) if v is not None else v
+    
+    @field_validator('status_comment')
+    @classmethod
+    def sanitize_status_comment(cls, v: Optional[str]) -> Optional[str]:
+        return sanitize_input(v, 500) if v else v
+
+
+class DeclarationBulkUpdate(BaseModel):
+    """Mise à jour groupée: mêmes changements appliqués à chaque déclaration."""
+    ids: List[str] = Field(..., min_length=1)
+    status: Optional[DeclarationStatus] = None
+    priority: Optional[DeclarationPriority] = None
+    status_comment: Optional[str] = Field(None, max_length=500)
+    
+    @field_validator('status_comment')
+    @classmethod
+    def sanitize_status_comment(cls, v: Optional[str]) -> Optional[str]:
+        return sanitize_input(v, 500) if v else v
+
+
+class BulkItemResult(BaseModel):
+    """Résultat d'une mise à jour groupée pour un identifiant."""
+    id: str
+    result: Literal["updated", "unchanged", "not_found"]
+
+
+class BulkUpdateResponse(BaseModel):
+    results: List[BulkItemResult]
+    updated: int
 
 
 class DeclarationPublicResponse(BaseModel):
@@ -90,6 +165,7 @@ class DeclarationPublicResponse(BaseModel):
     type: DeclarationType
     category: str
     description: str
+    description_preview: Optional[str] = None  # Listes: demandé par fields=
     incident_date: Optional[datetime]
     location: Optional[str]  # Version tronquée/anonymisée
     reward: Optional[str]
@@ -103,6 +179,7 @@ class DeclarationPublicResponse(BaseModel):
 
 class DeclarationAdminResponse(DeclarationPublicResponse):
     """Schéma de réponse admin (toutes les données)."""
+    category_id: Optional[int] = None
     declarant_name: Optional[str]
     declarant_phone: Optional[str]
     declarant_email: Optional[str]
@@ -115,6 +192,19 @@ class DeclarationAdminResponse(DeclarationPublicResponse):
     unread_tips_count: int = 0
     messages_count: int = 0
     unread_messages_count: int = 0
+    claimed_by: Optional[str] = None
+    claim_expires_at: Optional[datetime] = None
+
+
+class QueueClaimResponse(BaseModel):
+    """Déclaration réservée dans la file de modération (None si la file est vide)."""
+    declaration: Optional[DeclarationAdminResponse] = None
+    lease_expires_at: Optional[datetime] = None
+
+
+class LeaseResponse(BaseModel):
+    declaration_id: str
+    lease_expires_at: datetime
 
 
 class DeclarationTrackResponse(BaseModel):
@@ -136,3 +226,15 @@ class DeclarationListResponse(BaseModel):
     page: int
     per_page: int
     pages: int
+
+
+class SuggestionItem(BaseModel):
+    """Valeur suggérée et nombre de déclarations qui l'utilisent."""
+    value: str
+    count: int
+
+
+class SuggestionResponse(BaseModel):
+    """Suggestions de saisie, les plus fréquentes d'abord."""
+    field: str
+    items: List[SuggestionItem]
@@ -0,0 +1,68 @@
+"""
+Schémas Pydantic pour la messagerie équipe ↔ déclarant.
+"""
+from datetime import datetime
+from typing import Optional, List
+
+from pydantic import BaseModel, Field, field_validator
+
+from app.core.security import sanitize_input
+from app.models.declaration import DeclarationType, DeclarationStatus
+
+
+class MessageCreate(BaseModel):
+    """Schéma pour l'envoi d'un message."""
+    content: str = Field(..., min_length=1, max_length=2000)
+
+    @field_validator('content')
+    @classmethod
+    def sanitize_content(cls, v: str) -> str:
+        v = sanitize_input(v, 2000)
+        if not v:
+            raise ValueError('Le message est vide')
+        return v
+
+
+class MessageMarkRead(BaseModel):
+    """Marquage comme lu: les messages indiqués, ou tous ceux du fil."""
+    message_ids: Optional[List[str]] = Field(None, max_length=500)
+
+
+class MessageResponse(BaseModel):
+    """Message d'un fil (sender_id n'est exposé qu'à l'équipe)."""
+    id: str
+    sender_type: str
+    sender_id: Optional[str] = None
+    content: str
+    is_read: bool
+    created_at: datetime
+
+
+class MessageThreadResponse(BaseModel):
+    """Page d'un fil, du plus récent au plus ancien."""
+    items: List[MessageResponse]
+    next_cursor: Optional[str] = None
+    messages_count: int
+    unread_count: int
+
+
+class MessageReadResult(BaseModel):
+    marked: int
+    unread_count: int
+
+
+class InboxItem(BaseModel):
+    """Déclaration ayant des messages non lus par l'équipe."""
+    declaration_id: str
+    tracking_code: str
+    type: DeclarationType
+    category: str
+    status: DeclarationStatus
+    messages_count: int
+    unread_messages_count: int
+    last_message_at: datetime
+
+
+class InboxResponse(BaseModel):
+    items: List[InboxItem]
+    next_cursor: Optional[str] = None
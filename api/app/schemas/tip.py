@@ -5,8 +5,9 @@ from datetime import datetime
 from typing import Optional, List
 import re
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
+from app.core.security import sanitize_input
 from app.schemas.declaration import AttachmentBase
 
 
@@ -35,8 +36,7 @@ class TipCreate(BaseModel):
     @field_validator('description')
     @classmethod
     def sanitize_description(cls, v: str) -> str:
-        import bleach
-        return bleach.clean(v, tags=[], strip=True)[:2000]
+        return sanitize_input(v, 2000)
     
     @field_validator('captcha_answer')
     @classmethod
@@ -47,6 +47,36 @@ class TipCreate(BaseModel):
         return v
 
 
+class TipImport(BaseModel):
+    """Schéma d'une ligne d'import d'indice (par id ou code de suivi)."""
+    declaration_id: Optional[str] = None
+    tracking_code: Optional[str] = Field(None, max_length=20)
+    tipster_phone: Optional[str] = Field(None, max_length=20)
+    description: str = Field(..., min_length=10, max_length=2000)
+    is_useful: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    
+    @field_validator('tipster_phone')
+    @classmethod
+    def validate_phone(cls, v: Optional[str]) -> Optional[str]:
+        if v and not PHONE_REGEX.match(v):
+            raise ValueError('Le numéro de téléphone doit être au format +228XXXXXXXX')
+        return v
+    
+    @field_validator('description')
+    @classmethod
+    def sanitize_description(cls, v: str) -> str:
+        return sanitize_input(v, 2000)
+    
+    @model_validator(mode='after')
+    def validate_reference(self) -> 'TipImport':
+        if not self.declaration_id and not self.tracking_code:
+            raise ValueError('declaration_id ou tracking_code requis')
+        if self.tracking_code:
+            self.tracking_code = self.tracking_code.upper()
+        return self
+
+
 class TipPublicResponse(BaseModel):
     """Schéma de réponse publique (confirmation)."""
     id: str
@@ -61,6 +91,7 @@ class TipAdminResponse(BaseModel):
     declaration_id: str
     tipster_phone: Optional[str]
     description: str
+    description_preview: Optional[str] = None  # Listes: demandé par fields=
     attachments: List[dict]
     is_read: bool
     is_useful: Optional[bool]
@@ -79,6 +110,18 @@ class TipUpdate(BaseModel):
     is_read: Optional[bool] = None
     is_useful: Optional[bool] = None
     admin_notes: Optional[str] = Field(None, max_length=1000)
+    
+    @field_validator('admin_notes')
+    @classmethod
+    def sanitize_admin_notes(cls, v: Optional[str]) -> Optional[str]:
+        return sanitize_input(v, 1000) if v is not None else v
+
+
+class TipBulkUpdate(BaseModel):
+    """Mise à jour groupée: mêmes changements appliqués à chaque indice."""
+    ids: List[str] = Field(..., min_length=1)
+    is_read: Optional[bool] = None
+    is_useful: Optional[bool] = None
 
 
 class TipListResponse(BaseModel):
@@ -86,3 +129,21 @@ class TipListResponse(BaseModel):
     items: List[TipAdminResponse]
     total: int
     unread_count: int
+
+
+class TipCandidate(BaseModel):
+    """Perte validée susceptible de correspondre à un indice."""
+    declaration_id: str
+    tracking_code: str
+    category: str
+    location: Optional[str]
+    created_at: datetime
+    score: float
+    matched_terms: List[str]
+
+
+class TipCandidatesResponse(BaseModel):
+    """Candidats classés par score décroissant."""
+    tip_id: str
+    declaration_id: str
+    items: List[TipCandidate]
@@ -0,0 +1,3 @@
+"""
+Services applicatifs partagés par les routes (fichiers, images, stockage...).
+"""
@@ -0,0 +1,429 @@
+"""
+Partitionnement mensuel du journal d'activité.
+La table activity_logs ne garde que les mois récents (partition chaude):
+son volume, et donc le coût de chaque insertion, reste borné.
+Les mois clos sont scellés dans des segments NDJSON compressés en ajout
+seul: un segment n'est jamais réécrit, des lignes tardives d'un mois déjà
+scellé forment un segment supplémentaire. L'empreinte SHA-256 de chaque
+segment est vérifiée à chaque lecture.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+import anyio
+import structlog
+from sqlalchemy import delete, func, select
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.activity_log import ActivityLog, ActivityAction, ActivityLogSegment
+from app.services.activity_logs import ActivityLogFilters
+
+settings = get_settings()
+
+SEGMENT_COLUMNS = (
+    "id", "action", "user_id", "username", "target_type", "target_id",
+    "details", "ip_address", "user_agent", "created_at",
+)
+
+# Lignes lues par lot pendant le scellement
+READ_BATCH_SIZE = 1000
+
+# Coût mémoire estimé d'une ligne en cache, hors ligne JSON brute
+ROW_OVERHEAD_BYTES = 400
+
+_archive_lock = asyncio.Lock()
+
+
+class SegmentCorrupted(Exception):
+    """Segment absent ou dont l'empreinte ne correspond plus."""
+
+
+def archive_directory() -> Path:
+    directory = Path(settings.ACTIVITY_ARCHIVE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # Les dates sont stockées en UTC sans fuseau par SQLite
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _add_months(month_start: datetime, months: int) -> datetime:
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return month_start.replace(year=index // 12, month=index % 12 + 1)
+
+
+def hot_cutoff(now: Optional[datetime] = None) -> datetime:
+    """Début de la partition chaude: les lignes antérieures appartiennent à des mois clos."""
+    now = _naive_utc(now or datetime.now(timezone.utc))
+    current = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return _add_months(current, -(max(settings.ACTIVITY_LOG_HOT_MONTHS, 1) - 1))
+
+
+def _serialize(log: ActivityLog) -> bytes:
+    row = {}
+    for column in SEGMENT_COLUMNS:
+        value = getattr(log, column)
+        if isinstance(value, ActivityAction):
+            value = value.value
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        row[column] = value
+    return (json.dumps(row, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def seal_month(db, month_start: datetime, end: datetime) -> Optional[ActivityLogSegment]:
+    """
+    Écrit les lignes [month_start, end) dans un nouveau segment et l'enregistre.
+    Les lignes restent dans la table jusqu'à la purge du segment.
+    """
+    month = month_start.strftime("%Y-%m")
+    part = (await db.scalar(
+        select(func.max(ActivityLogSegment.part)).where(ActivityLogSegment.month == month)
+    ) or 0) + 1
+    # Un fichier sans enregistrement (arrêt avant l'enregistrement) n'est pas réutilisé
+    while True:
+        filename = f"activity_logs_{month}.{part:04d}.ndjson.gz"
+        path = archive_directory() / filename
+        if not path.exists():
+            break
+        part += 1
+    tmp_path = path.with_name(filename + ".tmp")
+
+    query = (
+        select(ActivityLog)
+        .where(ActivityLog.created_at >= month_start, ActivityLog.created_at < end)
+        .order_by(ActivityLog.created_at, ActivityLog.id)
+        .execution_options(yield_per=READ_BATCH_SIZE)
+    )
+    row_count = 0
+    first_created_at = last_created_at = None
+    out = await anyio.to_thread.run_sync(lambda: gzip.open(tmp_path, "wb", compresslevel=9))
+    try:
+        result = await db.stream(query)
+        async for partition in result.scalars().partitions():
+            if first_created_at is None:
+                first_created_at = partition[0].created_at
+            last_created_at = partition[-1].created_at
+            row_count += len(partition)
+            data = b"".join(_serialize(log) for log in partition)
+            await anyio.to_thread.run_sync(out.write, data)
+        await anyio.to_thread.run_sync(out.close)
+
+        if not row_count:
+            os.remove(tmp_path)
+            return None
+
+        def finalize() -> tuple[str, int]:
+            with open(tmp_path, "rb") as f:
+                os.fsync(f.fileno())
+            # Ajout seul: jamais d'écrasement d'un segment existant
+            if path.exists():
+                raise FileExistsError(path)
+            os.replace(tmp_path, path)
+            return _sha256(path), path.stat().st_size
+
+        sha256, size_bytes = await anyio.to_thread.run_sync(finalize)
+    except BaseException:
+        out.close()
+        if tmp_path.exists():
+            os.remove(tmp_path)
+        raise
+
+    segment = ActivityLogSegment(
+        month=month,
+        part=part,
+        filename=filename,
+        row_count=row_count,
+        size_bytes=size_bytes,
+        sha256=sha256,
+        first_created_at=first_created_at,
+        last_created_at=last_created_at,
+    )
+    db.add(segment)
+    await db.commit()
+    return segment
+
+
+def _segment_ids(path: Path) -> list[str]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line)["id"] for line in f if line.strip()]
+
+
+async def purge_segment(db, segment: ActivityLogSegment) -> int:
+    """
+    Supprime de la table les lignes archivées dans le segment, par lots
+    (transactions courtes). Reprenable: seuls les identifiants du segment sont visés.
+    """
+    path = archive_directory() / segment.filename
+    ids = await anyio.to_thread.run_sync(_segment_ids, path)
+    deleted = 0
+    batch_size = settings.ACTIVITY_ARCHIVE_BATCH_SIZE
+    for i in range(0, len(ids), batch_size):
+        result = await db.execute(
+            delete(ActivityLog).where(ActivityLog.id.in_(ids[i:i + batch_size]))
+        )
+        await db.commit()
+        deleted += result.rowcount
+        # Laisser passer les écritures de l'application entre deux lots
+        await asyncio.sleep(0)
+    segment.purged_at = datetime.now(timezone.utc)
+    await db.commit()
+    return deleted
+
+
+async def run_archive(now: Optional[datetime] = None) -> dict:
+    """Scelle et purge tous les mois clos encore présents dans la table."""
+    logger = structlog.get_logger()
+    report = {"segments": [], "rows_archived": 0, "rows_purged": 0}
+    async with _archive_lock, AsyncSessionLocal() as db:
+        # Purges interrompues (arrêt pendant une exécution précédente)
+        result = await db.execute(
+            select(ActivityLogSegment).where(ActivityLogSegment.purged_at.is_(None))
+        )
+        for segment in result.scalars().all():
+            report["rows_purged"] += await purge_segment(db, segment)
+
+        cutoff = hot_cutoff(now)
+        while True:
+            oldest = await db.scalar(
+                select(func.min(ActivityLog.created_at)).where(ActivityLog.created_at < cutoff)
+            )
+            if oldest is None:
+                break
+            month_start = _naive_utc(oldest).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            end = min(_add_months(month_start, 1), cutoff)
+            segment = await seal_month(db, month_start, end)
+            if segment is None:
+                break
+            report["segments"].append(segment.filename)
+            report["rows_archived"] += segment.row_count
+            report["rows_purged"] += await purge_segment(db, segment)
+
+    if report["segments"]:
+        await logger.ainfo("Journal d'activité archivé", **report)
+    return report
+
+
+class SegmentRow(NamedTuple):
+    """
+    Ligne compacte d'un segment: colonnes filtrables et ligne JSON brute,
+    décodée en ActivityLog seulement si elle entre dans la page.
+    """
+    created_at: datetime
+    id: str
+    action: str
+    user_id: Optional[str]
+    target_type: Optional[str]
+    target_id: Optional[str]
+    ip_address: Optional[str]
+    line: bytes
+
+    @classmethod
+    def parse(cls, line: bytes) -> "SegmentRow":
+        row = json.loads(line)
+        return cls(
+            _naive_utc(datetime.fromisoformat(row["created_at"])),
+            row["id"],
+            row["action"],
+            row.get("user_id"),
+            row.get("target_type"),
+            row.get("target_id"),
+            row.get("ip_address"),
+            line,
+        )
+
+    def to_log(self) -> ActivityLog:
+        row = json.loads(self.line)
+        row["action"] = ActivityAction(row["action"])
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+        return ActivityLog(**row)
+
+    @property
+    def nbytes(self) -> int:
+        # Estimation: ligne brute et objets Python (tuple, date, chaînes)
+        return len(self.line) + ROW_OVERHEAD_BYTES
+
+
+class SegmentCache:
+    """Lignes compactes des segments récemment lus (LRU, borné en octets)."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: OrderedDict[str, tuple[list[SegmentRow], int]] = OrderedDict()
+
+    def get(self, segment: ActivityLogSegment) -> Optional[list[SegmentRow]]:
+        entry = self._entries.get(segment.filename)
+        if entry is None:
+            return None
+        self._entries.move_to_end(segment.filename)
+        return entry[0]
+
+    def put(self, segment: ActivityLogSegment, rows: list[SegmentRow], nbytes: int) -> None:
+        if nbytes > self.max_bytes or segment.filename in self._entries:
+            return
+        self._entries[segment.filename] = (rows, nbytes)
+        self.total_bytes += nbytes
+        while self.total_bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.total_bytes -= evicted
+
+
+segment_cache = SegmentCache(settings.ACTIVITY_ARCHIVE_CACHE_BYTES)
+
+
+class _HashingReader:
+    """Fichier lu en flux dont l'empreinte SHA-256 est calculée au passage."""
+
+    def __init__(self, f):
+        self._f = f
+        self.digest = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        self.digest.update(data)
+        return data
+
+
+def read_segment(
+    path: Path,
+    sha256: str,
+    keep: Callable[[SegmentRow], bool],
+    max_bytes: int,
+) -> tuple[list[SegmentRow], bool]:
+    """
+    Lit un segment ligne à ligne, sans le décompresser en entier (bloquant).
+    Toutes les lignes sont gardées tant qu'elles tiennent dans max_bytes
+    (segment complet, mis en cache); au-delà, seules celles retenues par
+    keep. L'empreinte est vérifiée avant de retourner quoi que ce soit.
+    Retourne les lignes, du plus récent au plus ancien, et si le segment est complet.
+    """
+    rows, nbytes, complete = [], 0, True
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        raise SegmentCorrupted(f"Segment introuvable: {path.name}")
+    with f:
+        reader = _HashingReader(f)
+        try:
+            with gzip.GzipFile(fileobj=reader, mode="rb") as lines:
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    row = SegmentRow.parse(line)
+                    if complete:
+                        nbytes += row.nbytes
+                        if nbytes > max_bytes:
+                            # Trop gros pour le cache: filtrer dès maintenant
+                            complete = False
+                            rows = [r for r in rows if keep(r)]
+                    if complete or keep(row):
+                        rows.append(row)
+            while reader.read(1024 * 1024):
+                pass
+        except (OSError, EOFError, ValueError, KeyError):
+            raise SegmentCorrupted(f"Segment illisible: {path.name}")
+    if reader.digest.hexdigest() != sha256:
+        raise SegmentCorrupted(f"Empreinte invalide: {path.name}")
+    # Du plus récent au plus ancien, comme la requête sur la table
+    rows.reverse()
+    return rows, complete
+
+
+async def load_segment(
+    segment: ActivityLogSegment,
+    keep: Callable[[SegmentRow], bool],
+) -> list[SegmentRow]:
+    """Lignes d'un segment retenues par keep (segment mis en cache s'il y tient)."""
+    rows = segment_cache.get(segment)
+    if rows is None:
+        rows, complete = await anyio.to_thread.run_sync(
+            read_segment,
+            archive_directory() / segment.filename,
+            segment.sha256,
+            keep,
+            segment_cache.max_bytes,
+        )
+        if not complete:
+            return rows
+        segment_cache.put(segment, rows, sum(row.nbytes for row in rows))
+    return [row for row in rows if keep(row)]
+
+
+def _matches(row, filters: ActivityLogFilters, cursor: Optional[tuple]) -> bool:
+    for name, value in filters.equalities().items():
+        if getattr(row, name) != value:
+            return False
+    created_at = _naive_utc(row.created_at)
+    if filters.date_from and created_at < _naive_utc(filters.date_from):
+        return False
+    if filters.date_to and created_at >= _naive_utc(filters.date_to):
+        return False
+    if cursor and (created_at, row.id) >= cursor:
+        return False
+    return True
+
+
+def _key(row) -> tuple:
+    return (_naive_utc(row.created_at), row.id)
+
+
+async def merge_archived(
+    db,
+    filters: ActivityLogFilters,
+    limit: int,
+    cursor: Optional[tuple[datetime, str]],
+    hot_rows: list,
+) -> list:
+    """
+    Complète une page de la table avec les segments archivés.
+    Les segments ne sont lus que s'ils peuvent contenir des lignes de la page;
+    seules les lignes archivées retenues dans la page deviennent des ActivityLog.
+    """
+    rows = list(hot_rows)
+    if cursor:
+        cursor = (_naive_utc(cursor[0]), cursor[1])
+
+    query = select(ActivityLogSegment).order_by(ActivityLogSegment.last_created_at.desc())
+    if filters.date_from:
+        query = query.where(ActivityLogSegment.last_created_at >= filters.date_from)
+    if filters.date_to:
+        query = query.where(ActivityLogSegment.first_created_at < filters.date_to)
+    if cursor:
+        query = query.where(ActivityLogSegment.first_created_at <= cursor[0])
+
+    # Un segment en cours de purge a encore des lignes dans la table
+    seen = {log.id for log in rows}
+    result = await db.execute(query)
+    for segment in result.scalars().all():
+        # Page complète et segment entièrement plus ancien: rien à ajouter
+        if len(rows) > limit and _naive_utc(segment.last_created_at) < _key(rows[limit])[0]:
+            break
+        archived = await load_segment(segment, lambda row: _matches(row, filters, cursor))
+        for row in archived:
+            if row.id not in seen:
+                seen.add(row.id)
+                rows.append(row)
+        rows.sort(key=_key, reverse=True)
+        del rows[limit + 1:]
+    return [row.to_log() if isinstance(row, SegmentRow) else row for row in rows]
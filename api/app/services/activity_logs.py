@@ -0,0 +1,97 @@
+"""
+Consultation du journal d'activité.
+Pagination par curseur sur (created_at, id), du plus récent au plus ancien.
+L'index est choisi explicitement selon le filtre le plus sélectif: chaque
+index se termine par (created_at, id), donc filtre, période et tri sont
+servis par un seul parcours d'index, sans tri temporaire.
+"""
+import base64
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, tuple_
+
+from app.models.activity_log import ActivityLog, ActivityAction
+
+# Filtres d'égalité par ordre de sélectivité décroissante, avec leur index
+INDEX_BY_FILTER = (
+    (("target_type", "target_id"), "idx_activity_target"),
+    (("user_id",), "idx_activity_user"),
+    (("ip_address",), "idx_activity_ip"),
+    (("action",), "idx_activity_action"),
+)
+DEFAULT_INDEX = "idx_activity_created"
+
+
+class InvalidCursor(ValueError):
+    """Curseur de pagination illisible."""
+
+
+@dataclass
+class ActivityLogFilters:
+    action: Optional[ActivityAction] = None
+    user_id: Optional[str] = None
+    target_type: Optional[str] = None
+    target_id: Optional[str] = None
+    ip_address: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+    def equalities(self) -> dict:
+        return {
+            name: getattr(self, name)
+            for name in ("action", "user_id", "target_type", "target_id", "ip_address")
+            if getattr(self, name) is not None
+        }
+
+
+def encode_cursor(created_at: datetime, log_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{log_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, log_id = raw.split("|", 1)
+        # Identifiant comparé en binaire: il doit être un UUID
+        return datetime.fromisoformat(created_at), str(uuid.UUID(log_id))
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Curseur invalide")
+
+
+def choose_index(filters: ActivityLogFilters) -> str:
+    """
+    Index du filtre d'égalité le plus sélectif, sinon index chronologique.
+    target_type seul (peu sélectif) passe aussi par l'index chronologique:
+    l'index cible imposerait un tri de toutes les lignes du type.
+    """
+    present = filters.equalities()
+    for columns, index in INDEX_BY_FILTER:
+        if all(c in present for c in columns):
+            return index
+    return DEFAULT_INDEX
+
+
+def build_activity_query(
+    filters: ActivityLogFilters,
+    limit: int,
+    cursor: Optional[str] = None,
+):
+    """Requête d'une page (limit + 1 lignes pour détecter la page suivante)."""
+    index = choose_index(filters)
+    query = select(ActivityLog).with_hint(ActivityLog, f"INDEXED BY {index}", "sqlite")
+
+    for name, value in filters.equalities().items():
+        query = query.where(getattr(ActivityLog, name) == value)
+    if filters.date_from:
+        query = query.where(ActivityLog.created_at >= filters.date_from)
+    if filters.date_to:
+        query = query.where(ActivityLog.created_at < filters.date_to)
+    if cursor:
+        created_at, log_id = decode_cursor(cursor)
+        query = query.where(tuple_(ActivityLog.created_at, ActivityLog.id) < (created_at, log_id))
+
+    return query.order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()).limit(limit + 1)
@@ -0,0 +1,273 @@
+"""
+Sauvegarde à chaud de la base SQLite.
+Copie via l'API de sauvegarde en ligne de SQLite, par petits paquets de pages
+avec une pause entre chaque étape: les écritures de l'application ne sont
+pas bloquées pendant la copie. L'instantané est vérifié, compressé (gzip),
+puis les sauvegardes les plus anciennes sont supprimées.
+
+Une écriture d'une autre connexion (celle de l'application, qui journalise
+presque chaque requête) fait reprendre la copie depuis la première page.
+Après BACKUP_MAX_RESTARTS reprises, la copie incrémentale est abandonnée
+et la base est copiée en une seule étape: une seule transaction de lecture,
+qui ne bloque pas les écritures en mode WAL et ne peut plus reprendre.
+"""
+import asyncio
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import anyio
+import structlog
+from sqlalchemy.engine import make_url
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.activity_log import ActivityLog, ActivityAction
+
+settings = get_settings()
+
+BACKUP_SUFFIX = ".db.gz"
+
+# Une seule sauvegarde à la fois dans ce processus
+_backup_lock = asyncio.Lock()
+
+
+class BackupError(Exception):
+    """Sauvegarde ou restauration impossible."""
+
+
+class _TooManyRestarts(Exception):
+    """Copie incrémentale reprise trop souvent (levée depuis le rappel de progression)."""
+
+
+def database_path() -> Path:
+    """Chemin du fichier de base de données (depuis DATABASE_URL)."""
+    return Path(make_url(settings.DATABASE_URL).database)
+
+
+def backup_directory() -> Path:
+    directory = Path(settings.BACKUP_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def _check_integrity(connection: sqlite3.Connection) -> None:
+    result = connection.execute("PRAGMA quick_check").fetchone()[0]
+    if result != "ok":
+        raise BackupError(f"Contrôle d'intégrité en échec: {result}")
+
+
+def _compress(source: Path, target: Path) -> None:
+    """Compression gzip avec écriture atomique."""
+    tmp_path = target.with_name(target.name + ".tmp")
+    try:
+        with open(source, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as out:
+            shutil.copyfileobj(src, out, 1024 * 1024)
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, target)
+    except BaseException:
+        if tmp_path.exists():
+            os.remove(tmp_path)
+        raise
+
+
+def create_snapshot(
+    db_path: Path,
+    directory: Path,
+    pages_per_step: int,
+    step_pause: float,
+    max_restarts: int,
+) -> dict:
+    """
+    Crée une sauvegarde compressée (bloquant, à exécuter dans un thread).
+    Retourne le nom du fichier, les tailles, la durée, le débit, le nombre
+    de reprises de la copie et si elle a fini en une seule étape.
+    """
+    if not db_path.exists():
+        raise BackupError("Base de données introuvable")
+
+    started = time.monotonic()
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S_%f")
+    target = directory / f"{db_path.stem}_{timestamp}{BACKUP_SUFFIX}"
+    snapshot = directory / f".{target.name}.snapshot"
+    steps = restarts = 0
+    last_remaining = None
+    single_step = False
+
+    def pause_between_steps(status, remaining, total):
+        # Entre deux étapes aucun verrou n'est tenu: les écritures passent
+        nonlocal steps, restarts, last_remaining
+        steps += 1
+        # Sans reprise, chaque étape fait baisser le nombre de pages restantes
+        if last_remaining is not None and remaining >= last_remaining:
+            restarts += 1
+            if restarts > max_restarts:
+                raise _TooManyRestarts
+        last_remaining = remaining
+        if remaining and step_pause:
+            time.sleep(step_pause)
+
+    try:
+        source = sqlite3.connect(db_path)
+        destination = sqlite3.connect(snapshot)
+        try:
+            try:
+                source.backup(destination, pages=pages_per_step, progress=pause_between_steps)
+            except _TooManyRestarts:
+                single_step = True
+                source.backup(destination, pages=-1)
+            # Instantané autonome (sans fichier -wal) et vérifié avant compression
+            destination.execute("PRAGMA journal_mode=DELETE")
+            _check_integrity(destination)
+        finally:
+            destination.close()
+            source.close()
+
+        copied_at = time.monotonic()
+        _compress(snapshot, target)
+        size_bytes = snapshot.stat().st_size
+    finally:
+        if snapshot.exists():
+            os.remove(snapshot)
+
+    duration = time.monotonic() - started
+    return {
+        "filename": target.name,
+        "size_bytes": size_bytes,
+        "compressed_bytes": target.stat().st_size,
+        "steps": steps,
+        "restarts": restarts,
+        "single_step": single_step,
+        "copy_seconds": round(copied_at - started, 3),
+        "duration_seconds": round(duration, 3),
+        "throughput_mb_s": round(size_bytes / duration / 1_000_000, 2) if duration else None,
+    }
+
+
+def list_snapshots(directory: Path) -> list[dict]:
+    """Sauvegardes disponibles, de la plus récente à la plus ancienne."""
+    snapshots = []
+    for path in sorted(directory.glob(f"*{BACKUP_SUFFIX}"), reverse=True):
+        st = path.stat()
+        snapshots.append({
+            "filename": path.name,
+            "compressed_bytes": st.st_size,
+            "created_at": datetime.fromtimestamp(st.st_mtime, timezone.utc),
+        })
+    return snapshots
+
+
+def apply_retention(directory: Path, prefix: str, keep: int) -> list[str]:
+    """Supprime les sauvegardes au-delà des `keep` plus récentes."""
+    # L'horodatage dans le nom donne l'ordre chronologique
+    snapshots = sorted(directory.glob(f"{prefix}_*{BACKUP_SUFFIX}"), reverse=True)
+    removed = []
+    for path in snapshots[max(keep, 1):]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        removed.append(path.name)
+    return removed
+
+
+def restore_snapshot(archive: Path, db_path: Path) -> dict:
+    """
+    Restaure une sauvegarde dans la base (bloquant).
+    L'instantané est décompressé et vérifié, puis recopié via l'API de
+    sauvegarde: le fichier -wal de la base cible reste cohérent.
+    À exécuter application arrêtée.
+    """
+    if not archive.is_file():
+        raise BackupError(f"Sauvegarde introuvable: {archive}")
+
+    started = time.monotonic()
+    snapshot = db_path.with_name(f".{db_path.name}.restore")
+    try:
+        with gzip.open(archive, "rb") as src, open(snapshot, "wb") as out:
+            shutil.copyfileobj(src, out, 1024 * 1024)
+
+        source = sqlite3.connect(snapshot)
+        destination = sqlite3.connect(db_path)
+        try:
+            _check_integrity(source)
+            source.backup(destination)
+        finally:
+            destination.close()
+            source.close()
+        size_bytes = snapshot.stat().st_size
+    except (OSError, EOFError, sqlite3.DatabaseError) as e:
+        raise BackupError(f"Restauration impossible: {e}")
+    finally:
+        if snapshot.exists():
+            os.remove(snapshot)
+
+    return {
+        "filename": archive.name,
+        "size_bytes": size_bytes,
+        "duration_seconds": round(time.monotonic() - started, 3),
+    }
+
+
+def is_backup_running() -> bool:
+    return _backup_lock.locked()
+
+
+async def run_backup(
+    user_id: Optional[str] = None,
+    username: Optional[str] = None,
+    client_info: Optional[dict] = None,
+    keep_all: bool = False,
+) -> dict:
+    """
+    Sauvegarde complète: instantané, rétention et journalisation.
+    Utilisée par la route d'administration, la tâche planifiée et la CLI.
+    keep_all désactive la rétention (ex: avant une restauration).
+    """
+    logger = structlog.get_logger()
+    async with _backup_lock:
+        db_path = database_path()
+        directory = backup_directory()
+        try:
+            report = await anyio.to_thread.run_sync(
+                create_snapshot,
+                db_path,
+                directory,
+                settings.BACKUP_PAGES_PER_STEP,
+                settings.BACKUP_STEP_PAUSE,
+                settings.BACKUP_MAX_RESTARTS,
+            )
+        except (OSError, sqlite3.Error) as e:
+            raise BackupError(f"Sauvegarde impossible: {e}")
+        report["removed"] = [] if keep_all else await anyio.to_thread.run_sync(
+            apply_retention, directory, db_path.stem, settings.BACKUP_RETENTION_COUNT
+        )
+
+    async with AsyncSessionLocal() as db:
+        db.add(ActivityLog(
+            action=ActivityAction.DATA_BACKUP,
+            user_id=user_id,
+            username=username,
+            target_type="database",
+            details=report,
+            **(client_info or {})
+        ))
+        await db.commit()
+
+    await logger.ainfo(
+        "Sauvegarde terminée",
+        filename=report["filename"],
+        size_bytes=report["size_bytes"],
+        compressed_bytes=report["compressed_bytes"],
+        duration_seconds=report["duration_seconds"],
+        restarts=report["restarts"],
+        single_step=report["single_step"],
+        throughput_mb_s=report["throughput_mb_s"],
+    )
+    return report
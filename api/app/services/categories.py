@@ -0,0 +1,126 @@
+"""
+Rattachement des catégories saisies au référentiel.
+Le libellé saisi reste affiché tel quel; sa forme normalisée (voir
+normalize.fold) désigne une catégorie canonique par la table des synonymes.
+Un libellé inconnu crée sa propre catégorie, que les synonymes permettront
+de regrouper. La correspondance forme -> identifiant est gardée en mémoire:
+la soumission ne lit la base que pour un libellé jamais vu.
+"""
+from typing import Iterable, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import AsyncSessionLocal
+from app.models.category import Category, CategorySynonym
+from app.services.normalize import fold
+
+# Catégories proposées par le formulaire de soumission et leurs variantes courantes
+CATALOG: dict[str, tuple[str, ...]] = {
+    # Pertes
+    "Carte d'identité": ("CNI", "Carte nationale d'identité", "Pièce d'identité"),
+    "Passeport": (),
+    "Permis de conduire": ("Permis",),
+    "Carte bancaire": ("Carte de crédit", "Carte de débit", "Carte Visa", "Carte bleue"),
+    "Téléphone": ("Téléphone portable", "Portable", "Smartphone", "Cellulaire", "Mobile"),
+    "Portefeuille": ("Porte-monnaie", "Porte-feuille"),
+    "Clés": ("Clé", "Clef", "Clefs", "Trousseau de clés"),
+    "Documents officiels": ("Documents", "Papiers", "Papiers officiels"),
+    "Bijoux": ("Bijou",),
+    "Autre objet": ("Autre",),
+    # Plaintes
+    "Agression physique": ("Agression", "Coups et blessures"),
+    "Vol avec violence": ("Vol à main armée", "Braquage"),
+    "Harcèlement": (),
+    "Escroquerie": ("Arnaque", "Fraude"),
+    "Vandalisme": ("Dégradation", "Dégradation de biens"),
+    "Discrimination": (),
+    "Autre plainte": (),
+}
+
+# Forme normalisée -> identifiant, pour les rattachements déjà validés en base
+_by_key: dict[str, int] = {}
+
+
+def category_key(label: str) -> str:
+    return fold(label)[:100]
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_created(session) -> None:
+    # Catégories créées par la transaction: connues seulement une fois validées
+    _by_key.update(session.info.pop("created_categories", {}))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_created(session) -> None:
+    session.info.pop("created_categories", None)
+
+
+async def _lookup(db: AsyncSession, keys: Iterable[str]) -> dict[str, int]:
+    keys = list(keys)
+    if not keys:
+        return {}
+    result = await db.execute(
+        select(CategorySynonym.key, CategorySynonym.category_id).where(CategorySynonym.key.in_(keys))
+    )
+    found = dict(result.all())
+    created = db.sync_session.info.get("created_categories", {})
+    _by_key.update({k: v for k, v in found.items() if k not in created})
+    return found
+
+
+async def _create(db: AsyncSession, label: str, key: str) -> int:
+    result = await db.execute(
+        sqlite_insert(Category).values(name=label).returning(Category.id)
+    )
+    category_id = result.scalar_one()
+    # Libellé rattaché entre-temps par une autre requête: on se range derrière elle
+    result = await db.execute(
+        sqlite_insert(CategorySynonym)
+        .values(key=key, category_id=category_id)
+        .on_conflict_do_nothing()
+        .returning(CategorySynonym.category_id)
+    )
+    if result.scalar_one_or_none() is None:
+        await db.execute(Category.__table__.delete().where(Category.id == category_id))
+        return (await _lookup(db, [key]))[key]
+    db.sync_session.info.setdefault("created_categories", {})[key] = category_id
+    return category_id
+
+
+async def resolve_categories(db: AsyncSession, labels: Iterable[str]) -> dict[str, int]:
+    """Identifiant de catégorie de chaque libellé, créé au besoin (dans la transaction de l'appelant)."""
+    keys = {label: category_key(label) for label in dict.fromkeys(labels)}
+    created = db.sync_session.info.get("created_categories", {})
+    known = {key: _by_key.get(key) or created.get(key) for key in set(keys.values())}
+    known.update(await _lookup(db, [k for k, v in known.items() if v is None]))
+    resolved = {}
+    for label, key in keys.items():
+        if known.get(key) is None:
+            known[key] = await _create(db, label, key)
+        resolved[label] = known[key]
+    return resolved
+
+
+async def resolve_category(db: AsyncSession, label: str) -> int:
+    return (await resolve_categories(db, [label]))[label]
+
+
+async def find_category(db: AsyncSession, label: str) -> Optional[int]:
+    """Catégorie d'un libellé de filtre, sans rien créer. None si inconnue."""
+    key = category_key(label)
+    if key in _by_key:
+        return _by_key[key]
+    return (await _lookup(db, [key])).get(key)
+
+
+async def load_categories() -> int:
+    """Charge toutes les correspondances au démarrage."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(CategorySynonym.key, CategorySynonym.category_id))
+        _by_key.clear()
+        _by_key.update(result.all())
+    return len(_by_key)
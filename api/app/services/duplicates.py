@@ -0,0 +1,214 @@
+"""
+Détection des quasi-doublons de déclarations (MinHash + LSH).
+Chaque déclaration reçoit une signature MinHash de ses bigrammes de mots
+(description), de sa catégorie et des mots de son lieu. L'index LSH en
+mémoire range les signatures par bandes: une nouvelle déclaration n'est
+comparée qu'aux déclarations du même type partageant au moins une bande,
+jamais à toute la table.
+Les signatures sont enregistrées dans declaration_signatures: au démarrage
+l'index est rechargé sans recalcul, seules les signatures manquantes sont
+calculées.
+"""
+import hashlib
+import random
+from array import array
+from collections import Counter, defaultdict
+from typing import Optional
+
+import anyio
+import structlog
+from sqlalchemy import insert, select
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.declaration import Declaration, DeclarationSignature, DeclarationType
+from app.services.normalize import fold, tokenize
+
+settings = get_settings()
+
+# 16 bandes de 4 valeurs: seuil de détection autour de 0,5 de similarité
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Candidats comparés au plus par recherche (les plus de bandes communes)
+MAX_CANDIDATES = 200
+
+# Déclarations sans signature calculées par lot au démarrage
+SYNC_BATCH_SIZE = 1000
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+# Permutations fixes: les signatures enregistrées restent comparables
+_rng = random.Random(0x6D696E68)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def _hash64(value: bytes) -> int:
+    # hash() est salé par processus: inutilisable pour des signatures persistées
+    return int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), "little")
+
+
+def shingles(description: str, category: str, location: Optional[str]) -> set[str]:
+    words = tokenize(description)
+    result = set(words)
+    result.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    result.add("c:" + fold(category))
+    if location:
+        result.update("l:" + w for w in tokenize(location))
+    return result
+
+
+def compute_signature(description: str, category: str, location: Optional[str]) -> bytes:
+    """Signature MinHash (NUM_PERM entiers 32 bits), vide si aucun mot."""
+    hashes = [_hash64(s.encode()) for s in shingles(description, category, location)]
+    if not hashes:
+        return b""
+    return array("I", (
+        min((a * h + b) % _PRIME for h in hashes) & _MASK
+        for a, b in _PERMUTATIONS
+    )).tobytes()
+
+
+def similarity(signature_a: bytes, signature_b: bytes) -> float:
+    """Similarité de Jaccard estimée (part des valeurs égales)."""
+    a, b = array("I", signature_a), array("I", signature_b)
+    if len(a) != NUM_PERM or len(b) != NUM_PERM:
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def _band_keys(declaration_type: DeclarationType, signature: bytes) -> list[int]:
+    # Le type fait partie de la clé: une perte n'est jamais rapprochée d'une plainte
+    prefix = declaration_type.name.encode()
+    width = ROWS * 4
+    return [
+        _hash64(prefix + bytes([band]) + signature[band * width:(band + 1) * width])
+        for band in range(BANDS)
+    ]
+
+
+class DuplicateIndex:
+    """Index LSH en mémoire: clé de bande -> identifiants des déclarations."""
+
+    def __init__(self):
+        self._buckets: dict[int, list[str]] = defaultdict(list)
+        self.size = 0
+
+    def add(self, declaration_id: str, declaration_type: DeclarationType, signature: bytes) -> None:
+        if not signature:
+            return
+        for key in _band_keys(declaration_type, signature):
+            self._buckets[key].append(declaration_id)
+        self.size += 1
+
+    def candidates(self, declaration_type: DeclarationType, signature: bytes) -> list[str]:
+        """Déclarations partageant au moins une bande, les plus proches d'abord."""
+        if not signature:
+            return []
+        shared = Counter()
+        for key in _band_keys(declaration_type, signature):
+            bucket = self._buckets.get(key)
+            if bucket:
+                shared.update(bucket)
+        return [declaration_id for declaration_id, _ in shared.most_common(MAX_CANDIDATES)]
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self.size = 0
+
+
+duplicate_index = DuplicateIndex()
+
+
+async def find_duplicates(db, declaration_type: DeclarationType, signature: bytes) -> list[dict]:
+    """
+    Doublons probables: candidats LSH dont la similarité estimée atteint
+    DUPLICATE_THRESHOLD. Seules les signatures des candidats sont lues (par clé primaire).
+    """
+    candidate_ids = duplicate_index.candidates(declaration_type, signature)
+    if not candidate_ids:
+        return []
+    result = await db.execute(
+        select(DeclarationSignature.declaration_id, DeclarationSignature.signature)
+        .where(DeclarationSignature.declaration_id.in_(candidate_ids))
+    )
+    matches = [
+        {"id": declaration_id, "similarity": round(score, 2)}
+        for declaration_id, other in result.all()
+        if (score := similarity(signature, other)) >= settings.DUPLICATE_THRESHOLD
+    ]
+    matches.sort(key=lambda m: m["similarity"], reverse=True)
+    return matches[:settings.DUPLICATE_MAX_FLAGS]
+
+
+def store_signature(db, declaration_id: str, declaration_type: DeclarationType, signature: bytes) -> None:
+    """Enregistre la signature (au prochain flush) et l'ajoute à l'index."""
+    db.add(DeclarationSignature(declaration_id=declaration_id, signature=signature))
+    duplicate_index.add(declaration_id, declaration_type, signature)
+
+
+async def store_signatures(db, rows: list[dict]) -> None:
+    """Version par lot: rows = [{declaration_id, type, signature}]."""
+    if not rows:
+        return
+    await db.execute(insert(DeclarationSignature), [
+        {"declaration_id": r["declaration_id"], "signature": r["signature"]} for r in rows
+    ])
+    for r in rows:
+        duplicate_index.add(r["declaration_id"], r["type"], r["signature"])
+
+
+def _compute_batch(rows: list) -> list[dict]:
+    return [
+        {
+            "declaration_id": row.id,
+            "type": row.type,
+            "signature": compute_signature(row.description, row.category, row.location),
+        }
+        for row in rows
+    ]
+
+
+async def load_duplicate_index() -> int:
+    """
+    Recharge l'index depuis les signatures enregistrées, puis calcule par
+    lots celles qui manquent (déclarations antérieures à la détection).
+    """
+    logger = structlog.get_logger()
+    duplicate_index.clear()
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            select(DeclarationSignature.declaration_id, Declaration.type, DeclarationSignature.signature)
+            .join(Declaration, Declaration.id == DeclarationSignature.declaration_id)
+            .execution_options(yield_per=5000)
+        )
+        async for partition in result.partitions():
+            for declaration_id, declaration_type, signature in partition:
+                duplicate_index.add(declaration_id, declaration_type, signature)
+
+        computed = 0
+        while True:
+            result = await db.execute(
+                select(
+                    Declaration.id,
+                    Declaration.type,
+                    Declaration.description,
+                    Declaration.category,
+                    Declaration.location,
+                )
+                .outerjoin(DeclarationSignature, DeclarationSignature.declaration_id == Declaration.id)
+                .where(DeclarationSignature.declaration_id.is_(None))
+                .limit(SYNC_BATCH_SIZE)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            signatures = await anyio.to_thread.run_sync(_compute_batch, rows)
+            await store_signatures(db, signatures)
+            await db.commit()
+            computed += len(rows)
+
+    if computed:
+        await logger.ainfo("Signatures de doublons calculées", count=computed)
+    return duplicate_index.size
@@ -0,0 +1,189 @@
+"""
+Export en flux des données (NDJSON ou CSV, gzip optionnel).
+Les lignes sont lues par lots via un curseur côté serveur et sérialisées
+au fil de l'eau: la mémoire reste constante quelle que soit la taille des tables.
+"""
+import csv
+import io
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Optional
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.activity_log import ActivityLog
+from app.models.declaration import Declaration, DeclarationStatusEvent
+from app.models.tip import Tip
+
+# Nombre de lignes lues par lot et regroupées par envoi
+EXPORT_BATCH_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class ExportDataset:
+    """Définition d'un jeu de données exportable."""
+    model: Any
+    columns: tuple[str, ...]
+    default_columns: tuple[str, ...]
+    date_column: str = "created_at"
+
+
+EXPORT_DATASETS = {
+    "declarations": ExportDataset(
+        model=Declaration,
+        columns=(
+            "id", "tracking_code", "type", "category", "description",
+            "incident_date", "location", "reward", "declarant_name",
+            "declarant_phone", "declarant_email", "status", "priority",
+            "attachments", "metadata", "admin_notes",
+            "created_at", "updated_at",
+        ),
+        # Les pièces jointes (base64) ne sont exportées que sur demande
+        default_columns=(
+            "id", "tracking_code", "type", "category", "description",
+            "incident_date", "location", "reward", "declarant_name",
+            "declarant_phone", "declarant_email", "status", "priority",
+            "created_at", "updated_at",
+        ),
+    ),
+    "status_events": ExportDataset(
+        model=DeclarationStatusEvent,
+        columns=(
+            "id", "declaration_id", "status", "comment", "changed_by", "created_at",
+        ),
+        default_columns=(
+            "id", "declaration_id", "status", "comment", "changed_by", "created_at",
+        ),
+    ),
+    "tips": ExportDataset(
+        model=Tip,
+        columns=(
+            "id", "declaration_id", "tipster_phone", "description",
+            "attachments", "is_read", "is_useful", "admin_notes", "metadata",
+            "created_at", "reviewed_at", "reviewed_by",
+        ),
+        default_columns=(
+            "id", "declaration_id", "tipster_phone", "description",
+            "is_read", "is_useful", "admin_notes", "created_at",
+            "reviewed_at", "reviewed_by",
+        ),
+    ),
+    "activity_logs": ExportDataset(
+        model=ActivityLog,
+        columns=(
+            "id", "action", "user_id", "username", "target_type", "target_id",
+            "details", "ip_address", "user_agent", "created_at",
+        ),
+        default_columns=(
+            "id", "action", "user_id", "username", "target_type", "target_id",
+            "details", "ip_address", "created_at",
+        ),
+    ),
+}
+
+
+def _model_column(model, name: str):
+    # "metadata" est mappé sur l'attribut metadata_ (nom réservé par SQLAlchemy)
+    return getattr(model, "metadata_" if name == "metadata" else name)
+
+
+def resolve_columns(dataset: ExportDataset, fields: Optional[str]) -> list[str]:
+    """Valide la sélection de colonnes (liste séparée par des virgules)."""
+    if not fields:
+        return list(dataset.default_columns)
+    columns = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [c for c in columns if c not in dataset.columns]
+    if unknown or not columns:
+        raise ValueError(f"Colonnes inconnues: {', '.join(unknown) or fields}")
+    return columns
+
+
+def build_export_query(
+    dataset: ExportDataset,
+    columns: list[str],
+    filters: dict,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    """Projection limitée aux colonnes demandées, filtres d'égalité et période."""
+    model = dataset.model
+    query = select(*[_model_column(model, c).label(c) for c in columns])
+    for name, value in filters.items():
+        if value is not None:
+            query = query.where(getattr(model, name) == value)
+    date_column = getattr(model, dataset.date_column)
+    if date_from:
+        query = query.where(date_column >= date_from)
+    if date_to:
+        query = query.where(date_column < date_to)
+    return query.order_by(date_column, model.id)
+
+
+def _plain(value):
+    """Convertit une valeur de colonne en type JSON natif."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def stream_rows(query) -> AsyncIterator[list[tuple]]:
+    """
+    Lit le résultat par lots avec une session dédiée.
+    La session de la requête est fermée avant l'envoi d'une réponse en flux.
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for partition in result.partitions():
+            yield partition
+
+
+async def ndjson_chunks(query, columns: list[str]) -> AsyncIterator[bytes]:
+    """Une ligne JSON par enregistrement."""
+    async for rows in stream_rows(query):
+        lines = [
+            json.dumps(
+                {c: _plain(v) for c, v in zip(columns, row)},
+                ensure_ascii=False,
+                default=str,
+            )
+            for row in rows
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+async def csv_chunks(query, columns: list[str]) -> AsyncIterator[bytes]:
+    """CSV avec en-tête; les valeurs structurées sont encodées en JSON."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for rows in stream_rows(query):
+        for row in rows:
+            writer.writerow([
+                json.dumps(v, ensure_ascii=False, default=str) if isinstance(v, (dict, list))
+                else "" if v is None
+                else _plain(v)
+                for v in row
+            ])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compression gzip à la volée."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
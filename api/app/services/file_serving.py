@@ -0,0 +1,309 @@
+"""
+Service de fichiers statiques pour les pièces jointes.
+ETag basé sur le contenu, requêtes conditionnelles, requêtes partielles (Range)
+et envoi zéro-copie lorsque le serveur ASGI le supporte.
+"""
+import hashlib
+import os
+import secrets
+import stat
+from collections import OrderedDict
+from email.utils import formatdate
+from pathlib import Path
+from threading import Lock
+from typing import NamedTuple, Optional
+
+import anyio
+from fastapi import Request
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+# Nombre maximal d'intervalles acceptés dans un en-tête Range
+MAX_RANGES = 16
+
+# Taille des blocs lus pour le calcul du hash
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class FileInfo(NamedTuple):
+    """Métadonnées d'un fichier servi (mises en cache)."""
+    path: Path
+    stat: os.stat_result
+    etag: str
+    media_type: str
+
+    @property
+    def size(self) -> int:
+        return self.stat.st_size
+
+
+class RangeNotSatisfiable(Exception):
+    """Aucun intervalle demandé ne recoupe le fichier."""
+
+
+def make_etag(checksum: str) -> str:
+    """ETag fort construit à partir du SHA-256 du contenu."""
+    return f'"{checksum}"'
+
+
+def hash_file(path: Path) -> str:
+    """Calcule le SHA-256 d'un fichier par blocs."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_file_info(path: Path, media_type: str, checksum: Optional[str] = None) -> FileInfo:
+    """
+    Lit les métadonnées d'un fichier (bloquant, à exécuter dans un thread).
+    Lève FileNotFoundError si le chemin n'est pas un fichier régulier.
+    """
+    stat_result = os.stat(path)
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise FileNotFoundError(str(path))
+    if checksum is None:
+        checksum = hash_file(path)
+    return FileInfo(path, stat_result, make_etag(checksum), media_type)
+
+
+class FileInfoCache:
+    """
+    Cache LRU en mémoire des métadonnées de fichiers.
+    Les fichiers uploadés ont des noms uniques et ne sont publiés qu'une
+    fois optimisés (écriture sous un nom temporaire puis renommage), jamais
+    réécrits ensuite: une entrée reste valide jusqu'à la suppression du
+    fichier. Les variantes d'images sont invalidées à leur éviction.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, FileInfo] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, path: Path) -> Optional[FileInfo]:
+        key = str(path)
+        with self._lock:
+            info = self._entries.get(key)
+            if info is not None:
+                self._entries.move_to_end(key)
+            return info
+
+    def put(self, info: FileInfo) -> None:
+        key = str(info.path)
+        with self._lock:
+            self._entries[key] = info
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, path: Path) -> None:
+        with self._lock:
+            self._entries.pop(str(path), None)
+
+    def prime(self, path: Path, media_type: str, checksum: str) -> FileInfo:
+        """Enregistre un fichier dont le checksum est déjà connu (upload)."""
+        info = read_file_info(path, media_type, checksum)
+        self.put(info)
+        return info
+
+    async def load(self, path: Path, media_type: str) -> Optional[FileInfo]:
+        """Retourne les métadonnées du fichier, ou None s'il n'existe pas."""
+        info = self.get(path)
+        if info is not None:
+            return info
+        try:
+            info = await anyio.to_thread.run_sync(read_file_info, path, media_type)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        self.put(info)
+        return info
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Comparaison faible d'un en-tête If-None-Match avec l'ETag courant."""
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def parse_range_header(header: str, size: int) -> Optional[list[tuple[int, int]]]:
+    """
+    Analyse un en-tête Range (RFC 9110).
+    Retourne la liste triée et fusionnée des intervalles (bornes incluses),
+    None si l'en-tête doit être ignoré (syntaxe invalide, trop d'intervalles).
+    Lève RangeNotSatisfiable si aucun intervalle n'est satisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+
+    parts = spec.split(",")
+    if len(parts) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for part in parts:
+        start_s, sep, end_s = part.strip().partition("-")
+        if not sep:
+            return None
+        start_s, end_s = start_s.strip(), end_s.strip()
+        if not (start_s.isdigit() or start_s == "") or not (end_s.isdigit() or end_s == ""):
+            return None
+        if start_s == "":
+            # Suffixe: les N derniers octets
+            if end_s == "":
+                return None
+            length = int(end_s)
+            if length == 0:
+                continue
+            ranges.append((max(size - length, 0), size - 1))
+            continue
+        start = int(start_s)
+        if end_s and int(end_s) < start:
+            return None
+        if start >= size:
+            continue
+        end = int(end_s) if end_s else size - 1
+        ranges.append((start, min(end, size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    # Fusionner les intervalles qui se chevauchent ou se touchent
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class FileRangeResponse(Response):
+    """
+    Réponse 206 pour un ou plusieurs intervalles d'un fichier.
+    Plusieurs intervalles sont renvoyés en multipart/byteranges.
+    Utilise l'extension ASGI "http.response.zerocopysend" si disponible.
+    """
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        info: FileInfo,
+        ranges: list[tuple[int, int]],
+        headers: Optional[dict] = None,
+    ):
+        self.info = info
+        self.status_code = 206
+        self.background = None
+        self.media_type = None
+        self.init_headers(headers)
+        self.headers["accept-ranges"] = "bytes"
+        self.headers["etag"] = info.etag
+        self.headers["last-modified"] = formatdate(info.stat.st_mtime, usegmt=True)
+
+        size = info.size
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            self.parts = [(b"", start, end)]
+            self.trailer = b""
+            self.headers["content-type"] = info.media_type
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+        else:
+            boundary = secrets.token_hex(16)
+            self.parts = []
+            for start, end in ranges:
+                separator = "\r\n" if self.parts else ""
+                part_header = (
+                    f"{separator}--{boundary}\r\n"
+                    f"Content-Type: {info.media_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+                )
+                self.parts.append((part_header.encode("latin-1"), start, end))
+            self.trailer = f"\r\n--{boundary}--\r\n".encode("latin-1")
+            self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+
+        content_length = sum(len(h) + end - start + 1 for h, start, end in self.parts)
+        self.headers["content-length"] = str(content_length + len(self.trailer))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        zerocopy = "http.response.zerocopysend" in scope.get("extensions", {})
+        async with await anyio.open_file(self.info.path, mode="rb") as file:
+            for index, (part_header, start, end) in enumerate(self.parts):
+                last = index == len(self.parts) - 1 and not self.trailer
+                if part_header:
+                    await send({"type": "http.response.body", "body": part_header, "more_body": True})
+                if zerocopy:
+                    await send({
+                        "type": "http.response.zerocopysend",
+                        "file": file.wrapped,
+                        "offset": start,
+                        "count": end - start + 1,
+                        "more_body": not last,
+                    })
+                    continue
+                await file.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": not (last and remaining <= 0),
+                    })
+        if self.trailer:
+            await send({"type": "http.response.body", "body": self.trailer, "more_body": False})
+
+
+def build_file_response(request: Request, info: FileInfo, headers: dict) -> Response:
+    """
+    Construit la réponse adaptée à la requête: 304, 206, 416 ou 200.
+    Le 200 passe par FileResponse (envoi "pathsend" si le serveur le supporte).
+    """
+    headers = {**headers, "ETag": info.etag, "Accept-Ranges": "bytes"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and etag_matches(if_none_match, info.etag):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == info.etag):
+        try:
+            ranges = parse_range_header(range_header, info.size)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{info.size}"},
+            )
+        if ranges is not None:
+            return FileRangeResponse(info, ranges, headers=headers)
+
+    return FileResponse(
+        info.path,
+        media_type=info.media_type,
+        headers=headers,
+        stat_result=info.stat,
+    )
@@ -0,0 +1,249 @@
+"""
+Traitement des images uploadées.
+Optimisation à l'ingestion (redimensionnement, suppression des métadonnées)
+et génération de variantes (miniatures, WebP) dans un pool de processus,
+avec un cache disque borné (éviction LRU par taille).
+"""
+import asyncio
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Formats de sortie: nom Pillow, type MIME, extension
+IMAGE_FORMATS = {
+    'jpeg': ('JPEG', 'image/jpeg', '.jpg'),
+    'png': ('PNG', 'image/png', '.png'),
+    'webp': ('WEBP', 'image/webp', '.webp'),
+}
+
+# Format de sortie par défaut selon l'extension de l'original
+FORMAT_BY_EXTENSION = {ext: name for name, (_, _, ext) in IMAGE_FORMATS.items()}
+
+# Orientations EXIF qui échangent largeur et hauteur
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+# Métadonnées retirées par l'optimisation, en plus de l'EXIF et des textes PNG
+_METADATA_KEYS = ('xmp', 'XML:com.adobe.xmp', 'comment')
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Pool de processus partagé pour le traitement d'images (créé à la demande)."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Arrête le pool de traitement d'images."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def render_derivative(source: str, target: str, width: Optional[int], fmt: str, quality: int) -> int:
+    """
+    Génère une variante d'image (exécuté dans un processus du pool).
+    L'écriture est atomique (fichier temporaire puis renommage).
+    Les métadonnées (EXIF, GPS...) ne sont pas recopiées.
+    Retourne la taille du fichier produit.
+    """
+    from PIL import Image, ImageOps
+
+    pil_format = IMAGE_FORMATS[fmt][0]
+    with Image.open(source) as img:
+        if width is not None:
+            # La largeur demandée s'entend après application de l'orientation EXIF
+            orientation = img.getexif().get(0x0112, 1)
+            if orientation in _TRANSPOSED_ORIENTATIONS:
+                box = (img.width, width)
+            else:
+                box = (width, img.height)
+            # thumbnail() utilise le décodage réduit (draft) pour les JPEG
+            img.thumbnail(box, Image.Resampling.LANCZOS)
+        img = ImageOps.exif_transpose(img)
+        if pil_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        try:
+            img.save(tmp_path, pil_format, quality=quality, optimize=True)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return os.path.getsize(target)
+
+
+def optimize_image(path: str, max_dimension: int, quality: int) -> tuple[int, int]:
+    """
+    Ré-encode une image uploadée à sa place (exécuté dans un processus du pool).
+    - Applique l'orientation EXIF puis supprime toutes les métadonnées (GPS...)
+    - Limite la plus grande dimension à max_dimension
+    Un original sans métadonnées ni redimensionnement est conservé si le
+    ré-encodage est plus lourd.
+    Retourne la taille avant et après optimisation.
+    """
+    from PIL import Image, ImageOps
+
+    size_before = os.path.getsize(path)
+    with Image.open(path) as img:
+        pil_format = img.format
+        original_size = img.size
+        has_metadata = (
+            bool(img.getexif())
+            or any(key in img.info for key in _METADATA_KEYS)
+            or bool(getattr(img, 'text', None))
+        )
+        img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+        resized = img.size != original_size
+        img = ImageOps.exif_transpose(img)
+        if pil_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            img.save(tmp_path, pil_format, quality=quality, optimize=True)
+            if not has_metadata and not resized and os.path.getsize(tmp_path) >= size_before:
+                os.remove(tmp_path)
+                return size_before, size_before
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return size_before, os.path.getsize(path)
+
+
+class SingleFlight:
+    """
+    Déduplique les calculs concurrents d'une même clé:
+    les appelants simultanés attendent le même résultat.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]):
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        # shield: l'annulation d'un client n'interrompt pas la génération partagée
+        return await asyncio.shield(future)
+
+
+class DerivativeStore:
+    """
+    Cache disque des variantes d'images, borné en taille totale.
+    L'ordre LRU est reconstruit au démarrage à partir des dates de modification.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int,
+        on_evict: Optional[Callable[[Path], None]] = None,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.total_bytes = 0
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._flight = SingleFlight()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._scan()
+
+    def _scan(self) -> None:
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                st = entry.stat()
+                files.append((st.st_mtime, entry.name, st.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.total_bytes += size
+        self._evict()
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            path = self.directory / name
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            if self.on_evict:
+                self.on_evict(path)
+
+    def _add(self, name: str, size: int) -> None:
+        previous = self._entries.pop(name, None)
+        if previous is not None:
+            self.total_bytes -= previous
+        self._entries[name] = size
+        self.total_bytes += size
+        self._evict()
+
+    def discard_sources(self, source_names: list[str]) -> int:
+        """Supprime les variantes des originaux donnés. Retourne le nombre supprimé."""
+        stems = {Path(name).stem for name in source_names}
+        if not stems:
+            return 0
+        doomed = [
+            name for name in self._entries
+            if Path(name).stem.rsplit("_w", 1)[0] in stems or Path(name).stem in stems
+        ]
+        for name in doomed:
+            self.total_bytes -= self._entries.pop(name)
+            path = self.directory / name
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            if self.on_evict:
+                self.on_evict(path)
+        return len(doomed)
+
+    @staticmethod
+    def derivative_name(source_name: str, width: Optional[int], fmt: str) -> str:
+        stem = Path(source_name).stem
+        suffix = f"_w{width}" if width else ""
+        return f"{stem}{suffix}{IMAGE_FORMATS[fmt][2]}"
+
+    async def get(self, source: Path, width: Optional[int], fmt: str) -> Path:
+        """
+        Retourne le chemin de la variante, en la générant si nécessaire.
+        Les demandes concurrentes d'une même variante partagent une seule génération.
+        """
+        name = self.derivative_name(source.name, width, fmt)
+        if name in self._entries:
+            self._entries.move_to_end(name)
+            return self.directory / name
+        return await self._flight.do(name, lambda: self._generate(source, name, width, fmt))
+
+    async def _generate(self, source: Path, name: str, width: Optional[int], fmt: str) -> Path:
+        target = self.directory / name
+        loop = asyncio.get_running_loop()
+        size = await loop.run_in_executor(
+            get_executor(),
+            render_derivative,
+            str(source),
+            str(target),
+            width,
+            fmt,
+            settings.IMAGE_QUALITY,
+        )
+        self._add(name, size)
+        return target
@@ -0,0 +1,347 @@
+"""
+Import en masse de déclarations et d'indices (NDJSON ou CSV).
+- Lecture en flux du fichier source
+- Validation des lots en parallèle (schémas Pydantic, texte nettoyé par leurs validateurs)
+- Codes de suivi alloués par lot, insertion en executemany
+- Point de reprise enregistré dans la transaction de chaque lot
+"""
+import asyncio
+import csv
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Iterator, Optional
+
+import anyio
+import structlog
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.core.ids import new_id
+from app.core.security import generate_tracking_code
+from app.models.activity_log import ActivityLog, ActivityAction
+from app.models.declaration import (
+    PRIORITY_RANK,
+    Declaration,
+    DeclarationStatus,
+    DeclarationStatusEvent,
+)
+from app.models.import_job import ImportJob, ImportStatus
+from app.models.tip import Tip
+from app.services.categories import resolve_categories
+from app.services.duplicates import compute_signature, store_signatures
+from app.services.matching import match_index
+from app.services.suggestions import add_suggestions
+from app.services.stats import StatsDelta, declaration_state, tip_state
+from app.services.tip_counters import TipCounterDelta
+from app.schemas.declaration import DeclarationImport
+from app.schemas.tip import TipImport
+
+settings = get_settings()
+
+IMPORT_DATASETS = ("declarations", "tips")
+
+# Format du fichier source selon son extension
+IMPORT_FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+# Imports en cours dans ce processus (évite une double reprise)
+_running_jobs: set[str] = set()
+
+
+def get_import_executor() -> ProcessPoolExecutor:
+    """Pool de processus pour la validation des lots (créé à la demande)."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.IMPORT_WORKERS)
+    return _executor
+
+
+def shutdown_import_executor() -> None:
+    """Arrête le pool de validation."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def is_import_running(job_id: str) -> bool:
+    return job_id in _running_jobs
+
+
+def read_records(path: str, fmt: str) -> Iterator[dict]:
+    """Lit les enregistrements du fichier source un par un."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                # Les cellules vides valent "absent"
+                yield {k: v for k, v in row.items() if k and v not in ("", None)}
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                yield record if isinstance(record, dict) else {"_invalid": line[:200]}
+
+
+def _format_errors(e: ValidationError) -> list[dict]:
+    return [
+        {"field": ".".join(str(p) for p in err["loc"]), "message": err["msg"]}
+        for err in e.errors()
+    ]
+
+
+def validate_import_batch(dataset: str, records: list[dict], first_row: int) -> tuple[list[dict], list[dict]]:
+    """
+    Valide un lot (exécuté dans un processus du pool).
+    Retourne les lignes prêtes à insérer et les erreurs par numéro de ligne.
+    """
+    now = datetime.now(timezone.utc)
+    valid, errors = [], []
+    for offset, record in enumerate(records):
+        row_number = first_row + offset + 1
+        if "_invalid" in record:
+            errors.append({"row": row_number, "errors": [{"field": "", "message": "JSON invalide"}]})
+            continue
+        try:
+            if dataset == "declarations":
+                data = DeclarationImport.model_validate(record)
+                created_at = data.created_at or now
+                valid.append({
+                    "type": data.type,
+                    "category": data.category,
+                    "description": data.description,
+                    "incident_date": data.incident_date,
+                    "location": data.location,
+                    "reward": data.reward,
+                    "declarant_name": data.declarant_name,
+                    "declarant_phone": data.declarant_phone,
+                    "declarant_email": data.declarant_email.lower() if data.declarant_email else None,
+                    "status": data.status,
+                    "priority": data.priority,
+                    "attachments": [],
+                    "created_at": created_at,
+                    # Signature de doublons calculée ici, dans le pool de processus
+                    "_signature": compute_signature(data.description, data.category, data.location),
+                })
+            else:
+                data = TipImport.model_validate(record)
+                valid.append({
+                    "row": row_number,
+                    "declaration_id": data.declaration_id,
+                    "tracking_code": data.tracking_code,
+                    "tipster_phone": data.tipster_phone,
+                    "description": data.description,
+                    "is_useful": None if data.is_useful is None else int(data.is_useful),
+                    "is_read": 1,
+                    "attachments": [],
+                    "created_at": data.created_at or now,
+                })
+        except ValidationError as e:
+            errors.append({"row": row_number, "errors": _format_errors(e)})
+    return valid, errors
+
+
+async def allocate_tracking_codes(db, count: int) -> list[str]:
+    """Alloue `count` codes de suivi uniques avec une requête de vérification par tour."""
+    codes: set[str] = set()
+    while len(codes) < count:
+        candidates = {generate_tracking_code() for _ in range(count - len(codes))} - codes
+        result = await db.execute(
+            select(Declaration.tracking_code).where(Declaration.tracking_code.in_(candidates))
+        )
+        codes |= candidates - set(result.scalars().all())
+    return list(codes)
+
+
+async def _insert_declarations(db, job: ImportJob, rows: list[dict]) -> tuple[int, list[dict]]:
+    codes = await allocate_tracking_codes(db, len(rows))
+    category_ids = await resolve_categories(db, (row["category"] for row in rows))
+    stats = StatsDelta()
+    events, signatures = [], []
+    for row, code in zip(rows, codes):
+        row["id"] = new_id()
+        row["tracking_code"] = code
+        row["metadata_"] = {"imported": True, "import_job": job.id}
+        row["priority_rank"] = PRIORITY_RANK[row["priority"]]
+        row["category_id"] = category_ids[row["category"]]
+        signatures.append({
+            "declaration_id": row["id"],
+            "type": row["type"],
+            "signature": row.pop("_signature"),
+        })
+        events.append({
+            "id": new_id(),
+            "declaration_id": row["id"],
+            "status": row["status"],
+            "comment": "Déclaration importée",
+            "created_at": row["created_at"],
+        })
+        # Statut importé tel quel: décision datée de la création
+        decided_at = None if row["status"] == DeclarationStatus.EN_ATTENTE else row["created_at"]
+        stats.declaration(declaration_state(
+            row["created_at"], row["type"], row["status"], row["priority"],
+            row["category_id"], decided_at,
+        ))
+    await db.execute(insert(Declaration), rows)
+    await db.execute(insert(DeclarationStatusEvent), events)
+    await store_signatures(db, signatures)
+    await stats.apply(db)
+    return len(rows), []
+
+
+def _index_declarations(rows: list[dict]) -> None:
+    """Index en mémoire (rapprochement, suggestions), après validation du lot."""
+    for row in rows:
+        match_index.sync(
+            row["id"], row["type"], row["status"], row["category"], row["location"], row["description"],
+        )
+        add_suggestions(row["category"], row["location"])
+
+
+async def _insert_tips(db, job: ImportJob, rows: list[dict]) -> tuple[int, list[dict]]:
+    """Résout les références (id ou code de suivi) en une requête par lot."""
+    errors = []
+    codes = {r["tracking_code"] for r in rows if r["tracking_code"]}
+    ids = {r["declaration_id"] for r in rows if r["declaration_id"]}
+    by_code, known_ids = {}, set()
+    if codes:
+        result = await db.execute(
+            select(Declaration.tracking_code, Declaration.id).where(Declaration.tracking_code.in_(codes))
+        )
+        by_code = dict(result.all())
+    if ids:
+        result = await db.execute(select(Declaration.id).where(Declaration.id.in_(ids)))
+        known_ids = set(result.scalars().all())
+
+    to_insert = []
+    stats = StatsDelta()
+    counters = TipCounterDelta()
+    for row in rows:
+        row_number = row.pop("row")
+        tracking_code = row.pop("tracking_code")
+        declaration_id = row["declaration_id"] if row["declaration_id"] in known_ids else by_code.get(tracking_code)
+        if declaration_id is None:
+            errors.append({"row": row_number, "errors": [{"field": "declaration_id", "message": "Déclaration introuvable"}]})
+            continue
+        row["declaration_id"] = declaration_id
+        row["id"] = new_id()
+        row["metadata_"] = {"imported": True, "import_job": job.id}
+        to_insert.append(row)
+        stats.tip(tip_state(row["created_at"], row["is_read"], row["is_useful"]))
+        counters.tip(declaration_id, row["is_read"])
+
+    if to_insert:
+        await db.execute(insert(Tip), to_insert)
+        await stats.apply(db)
+        await counters.apply(db)
+    return len(to_insert), errors
+
+
+async def _process(db, job: ImportJob) -> None:
+    loop = asyncio.get_running_loop()
+    executor = get_import_executor()
+    window = max(settings.IMPORT_WORKERS, 1) * 2
+    insert_batch = _insert_declarations if job.dataset == "declarations" else _insert_tips
+
+    records = read_records(job.source_path, job.format)
+    # Reprise: ignorer les lignes déjà traitées
+    await anyio.to_thread.run_sync(lambda: deque(islice(records, job.rows_processed), maxlen=0))
+
+    next_row = job.rows_processed
+    pending: deque = deque()
+    exhausted = False
+    while True:
+        # Garder plusieurs lots en validation pendant l'insertion du lot courant
+        while not exhausted and len(pending) < window:
+            batch = await anyio.to_thread.run_sync(lambda: list(islice(records, job.batch_size)))
+            if not batch:
+                exhausted = True
+                break
+            future = loop.run_in_executor(executor, validate_import_batch, job.dataset, batch, next_row)
+            pending.append((next_row + len(batch), future))
+            next_row += len(batch)
+        if not pending:
+            break
+
+        rows_done, future = pending.popleft()
+        valid, errors = await future
+        inserted = 0
+        if valid:
+            inserted, insert_errors = await insert_batch(db, job, valid)
+            errors += insert_errors
+
+        # Point de reprise dans la même transaction que les insertions
+        job.rows_processed = rows_done
+        job.rows_inserted += inserted
+        job.rows_failed += len(errors)
+        room = settings.IMPORT_MAX_ERRORS - len(job.errors or [])
+        if errors and room > 0:
+            job.errors = (job.errors or []) + errors[:room]
+        await db.commit()
+        # Un lot annulé ne doit laisser aucune trace dans les index en mémoire
+        if inserted and job.dataset == "declarations":
+            _index_declarations(valid)
+
+
+async def run_import(job_id: str) -> None:
+    """Exécute (ou reprend) un import jusqu'à la fin du fichier source."""
+    logger = structlog.get_logger()
+    if job_id in _running_jobs:
+        return
+    _running_jobs.add(job_id)
+    try:
+        async with AsyncSessionLocal() as db:
+            job = await db.get(ImportJob, job_id)
+            if job is None or job.status == ImportStatus.COMPLETED:
+                return
+            job.status = ImportStatus.RUNNING
+            job.error_message = None
+            await db.commit()
+
+            started = datetime.now(timezone.utc)
+            try:
+                await _process(db, job)
+            except Exception as e:
+                await db.rollback()
+                job = await db.get(ImportJob, job_id)
+                job.status = ImportStatus.FAILED
+                job.error_message = str(e)[:1000]
+                await db.commit()
+                await logger.aerror("Échec de l'import", job_id=job_id, error=str(e))
+                return
+
+            job.status = ImportStatus.COMPLETED
+            job.finished_at = datetime.now(timezone.utc)
+            db.add(ActivityLog(
+                action=ActivityAction.DATA_IMPORTED,
+                user_id=job.created_by,
+                target_type=job.dataset,
+                target_id=job.id,
+                details={
+                    "rows_processed": job.rows_processed,
+                    "rows_inserted": job.rows_inserted,
+                    "rows_failed": job.rows_failed,
+                },
+            ))
+            await db.commit()
+
+            elapsed = (job.finished_at - started).total_seconds()
+            await logger.ainfo(
+                "Import terminé",
+                job_id=job_id,
+                rows_inserted=job.rows_inserted,
+                rows_failed=job.rows_failed,
+                rows_per_minute=int(job.rows_processed / elapsed * 60) if elapsed else None,
+            )
+    finally:
+        _running_jobs.discard(job_id)
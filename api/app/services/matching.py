@@ -0,0 +1,186 @@
+"""
+Rapprochement des indices avec les déclarations de perte validées.
+Index inversé en mémoire: terme -> {déclaration: fréquence}, sur trois
+champs (catégorie, mots du lieu, mots de la description). Le texte d'un
+indice est cherché dans les trois champs et les candidats sont classés
+par TF-IDF pondéré par champ. L'index ne contient que les pertes
+validées; il suit les changements de statut (update_declaration, mises à
+jour groupées, import): une recherche ne parcourt jamais la table.
+"""
+import math
+from collections import Counter, defaultdict
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.declaration import Declaration, DeclarationStatus, DeclarationType
+from app.services.normalize import tokenize
+
+# Poids des champs: une catégorie ou un lieu commun compte plus qu'un mot
+FIELD_WEIGHTS = {"c": 2.0, "l": 1.5, "d": 1.0}
+
+# Au-delà de cette part des déclarations indexées, un terme est « courant »
+COMMON_TERM_RATIO = 0.02
+MIN_COMMON_POSTINGS = 500
+
+
+def is_matchable(declaration_type, status) -> bool:
+    """Seules les pertes validées (publiques) sont proposées aux modérateurs."""
+    return declaration_type == DeclarationType.PERTE and status == DeclarationStatus.VALIDEE
+
+
+def document_terms(category: str, location: Optional[str], description: str) -> Counter:
+    terms = Counter("c:" + w for w in tokenize(category))
+    if location:
+        terms.update("l:" + w for w in tokenize(location))
+    terms.update("d:" + w for w in tokenize(description))
+    return terms
+
+
+class MatchIndex:
+    """Index inversé des pertes validées."""
+
+    def __init__(self):
+        self._postings: dict[str, dict[str, int]] = defaultdict(dict)
+        self._documents: dict[str, tuple[str, ...]] = {}
+        self._lengths: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, declaration_id: str) -> bool:
+        return declaration_id in self._documents
+
+    def add(self, declaration_id: str, category: str, location: Optional[str], description: str) -> None:
+        self.remove(declaration_id)
+        terms = document_terms(category, location, description)
+        for term, count in terms.items():
+            self._postings[term][declaration_id] = count
+        self._documents[declaration_id] = tuple(terms)
+        self._lengths[declaration_id] = math.sqrt(sum(terms.values())) or 1.0
+
+    def remove(self, declaration_id: str) -> None:
+        for term in self._documents.pop(declaration_id, ()):
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(declaration_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._lengths.pop(declaration_id, None)
+
+    def sync(self, declaration_id: str, declaration_type, status, category: str,
+             location: Optional[str], description: str) -> None:
+        """Ajoute ou retire une déclaration selon son type et son statut."""
+        if is_matchable(declaration_type, status):
+            self.add(declaration_id, category, location, description)
+        else:
+            self.remove(declaration_id)
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._documents.clear()
+        self._lengths.clear()
+
+    def search(
+        self,
+        text: str,
+        category: Optional[str] = None,
+        limit: int = 10,
+        exclude: Optional[str] = None,
+    ) -> list[tuple[str, float, list[str]]]:
+        """
+        Candidats pour un texte libre: (déclaration, score, mots communs).
+        Chaque mot du texte est cherché comme catégorie, lieu et description;
+        la catégorie éventuelle (celle de la déclaration liée à l'indice)
+        n'est cherchée que parmi les catégories.
+        """
+        total = len(self._documents)
+        if not total:
+            return []
+        query = Counter(
+            (f"{field}:{word}", word)
+            for word in tokenize(text)
+            for field in FIELD_WEIGHTS
+        )
+        if category:
+            query.update(("c:" + word, word) for word in tokenize(category))
+
+        # Termes rares d'abord: eux seuls ouvrent des candidats; un terme
+        # présent dans une grande part de l'index ne fait que renforcer
+        # les candidats déjà trouvés (pas de parcours de sa liste entière)
+        postings = sorted(
+            ((term, word, query_count, self._postings[term])
+             for (term, word), query_count in query.items() if term in self._postings),
+            key=lambda item: len(item[3]),
+        )
+        common = max(MIN_COMMON_POSTINGS, int(total * COMMON_TERM_RATIO))
+        scores: dict[str, float] = defaultdict(float)
+        matched: dict[str, set[str]] = defaultdict(set)
+        for term, word, query_count, posting in postings:
+            idf = math.log(1 + total / len(posting))
+            weight = FIELD_WEIGHTS[term[0]] * query_count * idf * idf
+            if len(posting) > common and scores:
+                hits = [(i, posting[i]) for i in scores if i in posting]
+            else:
+                hits = posting.items()
+            for declaration_id, count in hits:
+                scores[declaration_id] += weight * count
+                matched[declaration_id].add(word)
+        scores.pop(exclude, None)
+        ranked = sorted(
+            ((declaration_id, score / self._lengths[declaration_id]) for declaration_id, score in scores.items()),
+            key=lambda item: item[1],
+            reverse=True,
+        )[:limit]
+        return [
+            (declaration_id, round(score, 4), sorted(matched[declaration_id]))
+            for declaration_id, score in ranked
+        ]
+
+
+match_index = MatchIndex()
+
+_MATCH_COLUMNS = (
+    Declaration.id,
+    Declaration.type,
+    Declaration.status,
+    Declaration.category,
+    Declaration.location,
+    Declaration.description,
+)
+
+
+async def apply_status_change(db, declaration_ids: list[str], status: DeclarationStatus) -> None:
+    """
+    Répercute un changement de statut groupé. Une validation relit les
+    textes des déclarations concernées (par clé primaire); tout autre
+    statut les retire simplement de l'index.
+    """
+    if not declaration_ids:
+        return
+    if status != DeclarationStatus.VALIDEE:
+        for declaration_id in declaration_ids:
+            match_index.remove(declaration_id)
+        return
+    result = await db.execute(select(*_MATCH_COLUMNS).where(Declaration.id.in_(declaration_ids)))
+    for row in result.all():
+        match_index.sync(row.id, row.type, row.status, row.category, row.location, row.description)
+
+
+async def load_match_index() -> int:
+    """Construit l'index au démarrage à partir des pertes validées."""
+    match_index.clear()
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            select(*_MATCH_COLUMNS)
+            .where(
+                Declaration.type == DeclarationType.PERTE,
+                Declaration.status == DeclarationStatus.VALIDEE,
+            )
+            .execution_options(yield_per=5000)
+        )
+        async for partition in result.partitions():
+            for row in partition:
+                match_index.add(row.id, row.category, row.location, row.description)
+    return len(match_index)
@@ -0,0 +1,159 @@
+"""
+Messagerie entre l'équipe et le déclarant.
+Les compteurs (messages, non lus de chaque côté, dernier message) sont
+tenus sur la ligne de la déclaration, dans la transaction de chaque
+écriture: fiche admin et boîte de réception ne comptent jamais les messages.
+Les fils sont paginés par curseur sur (created_at, id).
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.ids import new_id
+from app.models.declaration import Declaration, Message
+from app.services.activity_logs import decode_cursor, encode_cursor
+
+SENDER_ADMIN = "admin"
+SENDER_DECLARANT = "declarant"
+
+# Compteur de non lus de chaque lecteur (messages envoyés par l'autre partie)
+_UNREAD_COUNTER = {
+    SENDER_ADMIN: Declaration.unread_messages_count,
+    SENDER_DECLARANT: Declaration.declarant_unread_count,
+}
+
+
+def _other(party: str) -> str:
+    return SENDER_DECLARANT if party == SENDER_ADMIN else SENDER_ADMIN
+
+
+async def post_message(
+    db: AsyncSession,
+    declaration_id: str,
+    sender_type: str,
+    content: str,
+    sender_id: Optional[str] = None,
+) -> Message:
+    """Ajoute un message et incrémente les compteurs de la déclaration."""
+    now = datetime.now(timezone.utc)
+    message = Message(
+        id=new_id(),
+        declaration_id=declaration_id,
+        content=content,
+        sender_type=sender_type,
+        sender_id=sender_id,
+        is_read=0,
+        created_at=now,
+    )
+    db.add(message)
+
+    # Incréments en SQL: pas de perte de mise à jour entre deux écritures
+    unread = _UNREAD_COUNTER[_other(sender_type)]
+    await db.execute(
+        update(Declaration)
+        .where(Declaration.id == declaration_id)
+        .values({
+            Declaration.messages_count: Declaration.messages_count + 1,
+            unread: unread + 1,
+            Declaration.last_message_at: now,
+        })
+    )
+    return message
+
+
+async def mark_read(
+    db: AsyncSession,
+    declaration_id: str,
+    reader_type: str,
+    message_ids: Optional[list[str]] = None,
+) -> int:
+    """
+    Marque comme lus les messages reçus par reader_type (tous, ou ceux indiqués)
+    en un seul UPDATE, puis décrémente son compteur du nombre de lignes modifiées.
+    """
+    query = update(Message).where(
+        Message.declaration_id == declaration_id,
+        Message.sender_type == _other(reader_type),
+        Message.is_read == 0,
+    )
+    if message_ids is not None:
+        query = query.where(Message.id.in_(message_ids))
+    result = await db.execute(
+        query.values(is_read=1).execution_options(synchronize_session=False)
+    )
+    marked = result.rowcount
+    if marked:
+        unread = _UNREAD_COUNTER[reader_type]
+        await db.execute(
+            update(Declaration)
+            .where(Declaration.id == declaration_id)
+            .values({unread: unread - marked})
+        )
+    return marked
+
+
+def unread_count(declaration: Declaration, reader_type: str) -> int:
+    return getattr(declaration, _UNREAD_COUNTER[reader_type].key)
+
+
+async def get_thread_page(
+    db: AsyncSession,
+    declaration_id: str,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> tuple[list[Message], Optional[str]]:
+    """Page d'un fil, du plus récent au plus ancien (index idx_message_declaration)."""
+    query = select(Message).where(Message.declaration_id == declaration_id)
+    if cursor:
+        created_at, message_id = decode_cursor(cursor)
+        query = query.where(tuple_(Message.created_at, Message.id) < (created_at, message_id))
+    query = query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit + 1)
+
+    result = await db.execute(query)
+    messages = list(result.scalars().all())
+    next_cursor = None
+    if len(messages) > limit:
+        del messages[limit:]
+        next_cursor = encode_cursor(messages[-1].created_at, messages[-1].id)
+    return messages, next_cursor
+
+
+async def get_inbox_page(
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> tuple[list, Optional[str]]:
+    """
+    Déclarations avec des messages non lus par l'équipe, les plus récentes
+    d'abord. Le filtre reprend la condition de l'index partiel idx_declaration_inbox.
+    """
+    # Colonnes utiles seulement (les pièces jointes sont stockées en base64)
+    query = select(
+        Declaration.id,
+        Declaration.tracking_code,
+        Declaration.type,
+        Declaration.category,
+        Declaration.status,
+        Declaration.messages_count,
+        Declaration.unread_messages_count,
+        Declaration.last_message_at,
+    ).where(Declaration.unread_messages_count > 0)
+    if cursor:
+        last_message_at, declaration_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(Declaration.last_message_at, Declaration.id) < (last_message_at, declaration_id)
+        )
+    query = (
+        query.order_by(Declaration.last_message_at.desc(), Declaration.id.desc())
+        .limit(limit + 1)
+    )
+
+    result = await db.execute(query)
+    rows = list(result.all())
+    next_cursor = None
+    if len(rows) > limit:
+        del rows[limit:]
+        next_cursor = encode_cursor(rows[-1].last_message_at, rows[-1].id)
+    return rows, next_cursor
@@ -0,0 +1,351 @@
+"""
+Modération des déclarations et des indices.
+- Mises à jour groupées: une seule transaction, lecture de l'état courant
+  en une requête, UPDATE ensemblistes par type de changement, puis
+  historique, journal et compteurs insérés par lots.
+- File de travail: chaque modérateur réserve la prochaine déclaration en
+  attente (urgence puis ancienneté) par un bail à durée limitée.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func, insert, or_, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.ids import canonical_id, new_id
+
+from app.models.activity_log import ActivityLog, ActivityAction
+from app.models.declaration import (
+    PENDING_CONDITION,
+    PRIORITY_RANK,
+    Declaration,
+    DeclarationPriority,
+    DeclarationStatus,
+    DeclarationStatusEvent,
+)
+from app.models.tip import Tip
+from app.models.user import User
+from app.services.stats import StatsDelta, declaration_state, tip_state
+from app.services.tip_counters import TipCounterDelta
+
+settings = get_settings()
+
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+NOT_FOUND = "not_found"
+
+
+def status_action(status: DeclarationStatus) -> ActivityAction:
+    """Action journalisée pour un changement de statut."""
+    if status == DeclarationStatus.VALIDEE:
+        return ActivityAction.DECLARATION_VALIDATED
+    if status == DeclarationStatus.REJETEE:
+        return ActivityAction.DECLARATION_REJECTED
+    return ActivityAction.DECLARATION_STATUS_CHANGED
+
+
+def _unique(ids: list[str]) -> list[str]:
+    # Forme canonique (celle des lignes lues): "ABC..." et "abc..." sont le même identifiant
+    return list(dict.fromkeys(canonical_id(i) for i in ids))
+
+
+def _log_row(action: ActivityAction, user: User, target_type: str, target_id: str,
+             details: Optional[dict], client_info: dict) -> dict:
+    return {
+        "id": new_id(),
+        "action": action,
+        "user_id": user.id,
+        "username": user.username,
+        "target_type": target_type,
+        "target_id": target_id,
+        "details": details,
+        "created_at": datetime.now(timezone.utc),
+        **client_info,
+    }
+
+
+async def bulk_update_declarations(
+    db: AsyncSession,
+    ids: list[str],
+    user: User,
+    client_info: dict,
+    status: Optional[DeclarationStatus] = None,
+    priority: Optional[DeclarationPriority] = None,
+    status_comment: Optional[str] = None,
+) -> dict[str, str]:
+    """
+    Applique statut et/ou priorité aux déclarations indiquées.
+    Retourne le résultat par identifiant canonique (dans l'ordre reçu).
+    Ne valide pas la transaction.
+    """
+    ids = _unique(ids)
+    result = await db.execute(
+        select(
+            Declaration.id,
+            Declaration.type,
+            Declaration.status,
+            Declaration.priority,
+            Declaration.category_id,
+            Declaration.created_at,
+        ).where(Declaration.id.in_(ids))
+    )
+    current = {row.id: row for row in result.all()}
+
+    # Date de première décision (statistiques de délai), en une requête
+    decided = {}
+    decided_ids = [i for i, row in current.items() if row.status != DeclarationStatus.EN_ATTENTE]
+    if decided_ids:
+        result = await db.execute(
+            select(DeclarationStatusEvent.declaration_id, func.min(DeclarationStatusEvent.created_at))
+            .where(
+                DeclarationStatusEvent.declaration_id.in_(decided_ids),
+                DeclarationStatusEvent.status != DeclarationStatus.EN_ATTENTE,
+            )
+            .group_by(DeclarationStatusEvent.declaration_id)
+        )
+        decided = dict(result.all())
+
+    now = datetime.now(timezone.utc)
+    status_ids, priority_ids = [], []
+    events, logs = [], []
+    stats = StatsDelta()
+    results = {}
+    for declaration_id in ids:
+        row = current.get(declaration_id)
+        if row is None:
+            results[declaration_id] = NOT_FOUND
+            continue
+        new_status = status if status and status != row.status else None
+        new_priority = priority if priority and priority != row.priority else None
+        if not new_status and not new_priority:
+            results[declaration_id] = UNCHANGED
+            continue
+        results[declaration_id] = UPDATED
+
+        decided_at = decided.get(declaration_id)
+        stats.declaration(declaration_state(
+            row.created_at, row.type, row.status, row.priority, row.category_id, decided_at
+        ), -1)
+
+        changes = {}
+        if new_status:
+            status_ids.append(declaration_id)
+            changes["status"] = {"old": row.status.value, "new": new_status.value}
+            events.append({
+                "id": new_id(),
+                "declaration_id": declaration_id,
+                "status": new_status,
+                "comment": status_comment or "",
+                "changed_by": user.username,
+                "created_at": now,
+            })
+            if new_status != DeclarationStatus.EN_ATTENTE and decided_at is None:
+                decided_at = now
+            logs.append(_log_row(
+                status_action(new_status), user, "declaration", declaration_id,
+                dict(changes), client_info,
+            ))
+        if new_priority:
+            priority_ids.append(declaration_id)
+            changes["priority"] = {"old": row.priority.value, "new": new_priority.value}
+            logs.append(_log_row(
+                ActivityAction.DECLARATION_PRIORITY_CHANGED, user, "declaration",
+                declaration_id, dict(changes), client_info,
+            ))
+
+        stats.declaration(declaration_state(
+            row.created_at, row.type, new_status or row.status,
+            new_priority or row.priority, row.category_id, decided_at,
+        ))
+
+    table = Declaration.__table__
+    if status_ids:
+        # Une déclaration décidée quitte la file: son bail est libéré
+        await db.execute(
+            update(table).where(table.c.id.in_(status_ids)).values(
+                status=status, updated_at=now, claimed_by=None, claim_expires_at=None,
+            )
+        )
+    if priority_ids:
+        await db.execute(
+            update(table).where(table.c.id.in_(priority_ids)).values(
+                priority=priority, priority_rank=PRIORITY_RANK[priority], updated_at=now,
+            )
+        )
+    if events:
+        await db.execute(insert(DeclarationStatusEvent), events)
+    if logs:
+        await db.execute(insert(ActivityLog), logs)
+    await stats.apply(db)
+    return results
+
+
+async def bulk_update_tips(
+    db: AsyncSession,
+    ids: list[str],
+    user: User,
+    client_info: dict,
+    is_read: Optional[bool] = None,
+    is_useful: Optional[bool] = None,
+) -> dict[str, str]:
+    """
+    Marque comme lus/non lus et/ou évalue les indices indiqués.
+    Retourne le résultat par identifiant canonique (dans l'ordre reçu).
+    Ne valide pas la transaction.
+    """
+    ids = _unique(ids)
+    result = await db.execute(
+        select(Tip.id, Tip.declaration_id, Tip.created_at, Tip.is_read, Tip.is_useful)
+        .where(Tip.id.in_(ids))
+    )
+    current = {row.id: row for row in result.all()}
+
+    now = datetime.now(timezone.utc)
+    read_value = None if is_read is None else int(is_read)
+    useful_value = None if is_useful is None else int(is_useful)
+    read_ids, useful_ids, logs = [], [], []
+    stats = StatsDelta()
+    counters = TipCounterDelta()
+    results = {}
+    for tip_id in ids:
+        row = current.get(tip_id)
+        if row is None:
+            results[tip_id] = NOT_FOUND
+            continue
+        was_read = int(bool(row.is_read))
+        new_read = read_value if read_value is not None and read_value != was_read else None
+        new_useful = useful_value if useful_value is not None and useful_value != row.is_useful else None
+        if new_read is None and new_useful is None:
+            results[tip_id] = UNCHANGED
+            continue
+        results[tip_id] = UPDATED
+
+        stats.tip(tip_state(row.created_at, row.is_read, row.is_useful), -1)
+        if new_read is not None:
+            read_ids.append(tip_id)
+            counters.read_changed(row.declaration_id, was_read, new_read)
+            if new_read:
+                logs.append(_log_row(ActivityAction.TIP_READ, user, "tip", tip_id, None, client_info))
+        if new_useful is not None:
+            useful_ids.append(tip_id)
+            logs.append(_log_row(
+                ActivityAction.TIP_EVALUATED, user, "tip", tip_id,
+                {"is_useful": bool(new_useful)}, client_info,
+            ))
+        stats.tip(tip_state(
+            row.created_at,
+            was_read if new_read is None else new_read,
+            row.is_useful if new_useful is None else new_useful,
+        ))
+
+    table = Tip.__table__
+    if read_ids:
+        await db.execute(update(table).where(table.c.id.in_(read_ids)).values(is_read=read_value))
+    if useful_ids:
+        await db.execute(
+            update(table).where(table.c.id.in_(useful_ids)).values(
+                is_useful=useful_value, reviewed_at=now, reviewed_by=user.id,
+            )
+        )
+    if logs:
+        await db.execute(insert(ActivityLog), logs)
+    await stats.apply(db)
+    await counters.apply(db)
+    return results
+
+
+# === File de modération ===
+
+# Un bail n'est pas une modification de la déclaration: updated_at
+# (dernière mise à jour montrée au déclarant) reste inchangé
+_KEEP_UPDATED_AT = {"updated_at": Declaration.__table__.c.updated_at}
+
+def lease_expiry(now: Optional[datetime] = None) -> datetime:
+    return (now or datetime.now(timezone.utc)) + timedelta(minutes=settings.MODERATION_LEASE_MINUTES)
+
+
+async def claim_next(db: AsyncSession, user: User) -> Optional[tuple[str, datetime]]:
+    """
+    Réserve une déclaration en attente pour le modérateur.
+    Un bail encore actif du modérateur est prolongé et renvoyé; sinon la
+    première déclaration libre (ou au bail expiré) de l'index partiel
+    idx_declaration_queue est réservée par un seul UPDATE ... RETURNING,
+    atomique face aux autres modérateurs (les écritures SQLite sont sérialisées).
+    Retourne (identifiant, échéance du bail) ou None si la file est vide.
+    """
+    table = Declaration.__table__
+    now = datetime.now(timezone.utc)
+    expires_at = lease_expiry(now)
+
+    result = await db.execute(
+        update(table)
+        .where(
+            table.c.id == select(table.c.id)
+            .with_hint(table, "INDEXED BY idx_declaration_claims", "sqlite")
+            .where(
+                table.c.claimed_by == user.id,
+                table.c.claim_expires_at > now,
+                text(PENDING_CONDITION),
+            )
+            .limit(1)
+            .scalar_subquery()
+        )
+        .values(claim_expires_at=expires_at, **_KEEP_UPDATED_AT)
+        .returning(table.c.id)
+    )
+    declaration_id = result.scalar_one_or_none()
+    if declaration_id is None:
+        next_pending = (
+            select(table.c.id)
+            .with_hint(table, "INDEXED BY idx_declaration_queue", "sqlite")
+            .where(
+                text(PENDING_CONDITION),
+                or_(table.c.claim_expires_at.is_(None), table.c.claim_expires_at <= now),
+            )
+            .order_by(table.c.priority_rank.desc(), table.c.created_at, table.c.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            update(table)
+            .where(table.c.id == next_pending)
+            .values(claimed_by=user.id, claim_expires_at=expires_at, **_KEEP_UPDATED_AT)
+            .returning(table.c.id)
+        )
+        declaration_id = result.scalar_one_or_none()
+    if declaration_id is None:
+        return None
+    return declaration_id, expires_at
+
+
+async def renew_lease(db: AsyncSession, declaration_id: str, user: User) -> Optional[datetime]:
+    """
+    Prolonge le bail du modérateur. None s'il ne le détient plus, y compris
+    si le bail a expiré (la déclaration a pu être réservée entre-temps).
+    """
+    table = Declaration.__table__
+    now = datetime.now(timezone.utc)
+    expires_at = lease_expiry(now)
+    result = await db.execute(
+        update(table)
+        .where(
+            table.c.id == declaration_id,
+            table.c.claimed_by == user.id,
+            table.c.claim_expires_at > now,
+            text(PENDING_CONDITION),
+        )
+        .values(claim_expires_at=expires_at, **_KEEP_UPDATED_AT)
+    )
+    return expires_at if result.rowcount else None
+
+
+async def release_lease(db: AsyncSession, declaration_id: str, user: User) -> bool:
+    """Rend la déclaration à la file. False si le modérateur ne la détenait pas."""
+    table = Declaration.__table__
+    result = await db.execute(
+        update(table)
+        .where(table.c.id == declaration_id, table.c.claimed_by == user.id)
+        .values(claimed_by=None, claim_expires_at=None, **_KEEP_UPDATED_AT)
+    )
+    return bool(result.rowcount)
@@ -0,0 +1,30 @@
+"""
+Normalisation du texte libre pour les index en mémoire
+(doublons, rapprochement indices/déclarations, suggestions).
+"""
+import re
+import unicodedata
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# Mots trop fréquents pour distinguer deux déclarations
+STOPWORDS = frozenset("""
+    a ai au aux avec ce ces cette d dans de des du elle en est et il ils j je
+    l la le les leur lui m ma mais me mes mon n ne nous on ou par pas pour qu
+    que qui s sa se ses son sur t ta te tes ton tu un une vers vos votre vous y
+""".split())
+
+
+def fold(text: str) -> str:
+    """Minuscules sans accents ni ponctuation, espaces simples."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", stripped).strip()
+
+
+def tokenize(text: str, drop_stopwords: bool = True) -> list[str]:
+    """Mots normalisés du texte, dans l'ordre."""
+    words = fold(text).split()
+    if drop_stopwords:
+        words = [w for w in words if w not in STOPWORDS]
+    return words
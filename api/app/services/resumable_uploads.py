@@ -0,0 +1,172 @@
+"""
+Uploads reprenables (protocole inspiré de tus.io).
+Les données partielles sont stockées sur disque avec un fichier de session
+JSON, ce qui permet la reprise après une coupure réseau ou un redémarrage.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import secrets
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+import anyio
+
+# Algorithmes acceptés pour l'en-tête Upload-Checksum
+CHECKSUM_ALGORITHMS = {"sha1", "sha256", "md5"}
+
+
+class UploadSessionError(Exception):
+    """Erreur de protocole d'upload (offset, checksum, taille...)."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def verify_chunk_checksum(data: bytes, header: str) -> bool:
+    """Vérifie un en-tête "Upload-Checksum: <algo> <base64>"."""
+    algorithm, _, encoded = header.strip().partition(" ")
+    algorithm = algorithm.lower()
+    if algorithm not in CHECKSUM_ALGORITHMS or not encoded:
+        raise UploadSessionError(400, "Algorithme de checksum non supporté")
+    try:
+        expected = base64.b64decode(encoded.strip(), validate=True)
+    except ValueError:
+        raise UploadSessionError(400, "Checksum mal formé")
+    return hashlib.new(algorithm, data).digest() == expected
+
+
+class UploadSessionStore:
+    """
+    Sessions d'upload reprenables.
+    Chaque session correspond à <id>.part (données) et <id>.json (métadonnées);
+    l'offset courant est la taille du fichier .part.
+    """
+
+    def __init__(self, directory: Path, expiry: timedelta):
+        self.directory = directory
+        self.expiry = expiry
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def _paths(self, session_id: str) -> tuple[Path, Path]:
+        # L'identifiant est hexadécimal: pas de traversée de répertoire possible
+        if not session_id.isalnum():
+            raise UploadSessionError(404, "Session d'upload introuvable")
+        return self.directory / f"{session_id}.part", self.directory / f"{session_id}.json"
+
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(session_id, asyncio.Lock())
+
+    def create(self, filename: str, content_type: str, length: int) -> dict:
+        """Crée une session vide et retourne ses métadonnées."""
+        session_id = secrets.token_hex(16)
+        now = datetime.now(timezone.utc)
+        session = {
+            "id": session_id,
+            "filename": filename,
+            "content_type": content_type,
+            "length": length,
+            "created_at": now.isoformat(),
+            "expires_at": (now + self.expiry).isoformat(),
+        }
+        part_path, meta_path = self._paths(session_id)
+        meta_path.write_text(json.dumps(session))
+        part_path.touch()
+        return {**session, "offset": 0}
+
+    def get(self, session_id: str) -> dict:
+        """Retourne les métadonnées et l'offset courant d'une session."""
+        part_path, meta_path = self._paths(session_id)
+        try:
+            session = json.loads(meta_path.read_text())
+            offset = part_path.stat().st_size
+        except (FileNotFoundError, ValueError):
+            raise UploadSessionError(404, "Session d'upload introuvable")
+        if datetime.fromisoformat(session["expires_at"]) < datetime.now(timezone.utc):
+            self.delete(session_id)
+            raise UploadSessionError(410, "Session d'upload expirée")
+        return {**session, "offset": offset}
+
+    async def append(
+        self,
+        session_id: str,
+        offset: int,
+        data: bytes,
+        checksum: Optional[str] = None,
+    ) -> dict:
+        """
+        Ajoute un bloc à la position indiquée.
+        Le bloc n'est écrit qu'après vérification de l'offset et du checksum:
+        une coupure en cours de transfert ne laisse jamais de données partielles.
+        """
+        async with self._lock(session_id):
+            session = self.get(session_id)
+            if offset != session["offset"]:
+                raise UploadSessionError(409, "Offset incorrect")
+            if offset + len(data) > session["length"]:
+                raise UploadSessionError(413, "Le bloc dépasse la taille annoncée")
+            if checksum is not None and not verify_chunk_checksum(data, checksum):
+                raise UploadSessionError(460, "Checksum du bloc invalide")
+
+            part_path, _ = self._paths(session_id)
+            await anyio.to_thread.run_sync(self._write_chunk, part_path, data)
+            session["offset"] = offset + len(data)
+            return session
+
+    @staticmethod
+    def _write_chunk(path: Path, data: bytes) -> None:
+        with open(path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @asynccontextmanager
+    async def completed(self, session_id: str) -> AsyncIterator[tuple[dict, bytes]]:
+        """
+        Données d'une session complète, verrou de la session tenu jusqu'à la
+        sortie du bloc: le stockage et la suppression de la session s'y font,
+        une finalisation concurrente trouve ensuite la session supprimée.
+        """
+        async with self._lock(session_id):
+            session = self.get(session_id)
+            if session["offset"] != session["length"]:
+                raise UploadSessionError(409, "Upload incomplet")
+            part_path, _ = self._paths(session_id)
+            data = await anyio.to_thread.run_sync(part_path.read_bytes)
+            yield session, data
+
+    def delete(self, session_id: str) -> None:
+        """Supprime une session et ses données."""
+        for path in self._paths(session_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._locks.pop(session_id, None)
+
+    def cleanup_expired(self) -> int:
+        """Supprime les sessions expirées. Retourne le nombre de sessions supprimées."""
+        now = datetime.now(timezone.utc)
+        removed = 0
+        for meta_path in self.directory.glob("*.json"):
+            try:
+                session = json.loads(meta_path.read_text())
+                expired = datetime.fromisoformat(session["expires_at"]) < now
+            except (FileNotFoundError, ValueError, KeyError):
+                expired = True
+            if expired:
+                self.delete(meta_path.stem)
+                removed += 1
+        # Données sans fichier de session (création interrompue)
+        for part_path in self.directory.glob("*.part"):
+            if not part_path.with_suffix(".json").exists():
+                self.delete(part_path.stem)
+                removed += 1
+        return removed
@@ -0,0 +1,276 @@
+"""
+Statistiques du tableau de bord admin.
+Les compteurs sont tenus dans des tables agrégées par jour, mises à jour
+dans la transaction de chaque écriture (création, changement de statut,
+lecture d'un indice...). Le tableau de bord ne lit que ces tables, et le
+résultat est gardé en cache quelques secondes.
+"""
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.category import Category
+from app.models.declaration import DeclarationStatus, DeclarationPriority
+from app.models.stats import DeclarationDailyStat, TipDailyStat
+
+settings = get_settings()
+
+# Nombre de catégories détaillées dans la réponse
+TOP_CATEGORIES = 20
+
+DECLARATION_KEYS = ("day", "type", "status", "priority", "category_id")
+TIP_COUNTERS = ("total", "unread", "useful", "not_useful")
+
+# Réponses récentes par période demandée: {days: (expiration, stats)}
+_cache: dict[int, tuple[float, dict]] = {}
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite restitue des dates naïves (stockées en UTC)
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def processing_seconds(created_at: Optional[datetime], status, decided_at: Optional[datetime]) -> float:
+    """Délai entre la soumission et la première décision (0 si en attente)."""
+    if created_at is None or decided_at is None or status in (None, DeclarationStatus.EN_ATTENTE):
+        return 0.0
+    return max((_utc(decided_at) - _utc(created_at)).total_seconds(), 0.0)
+
+
+def declaration_state(
+    created_at: Optional[datetime],
+    type,
+    status,
+    priority,
+    category_id: int,
+    decided_at: Optional[datetime] = None,
+) -> tuple[tuple, float]:
+    """Groupe statistique (jour, type, statut, priorité, identifiant de catégorie) et délai de traitement."""
+    # Avant insertion, les valeurs par défaut des colonnes ne sont pas encore appliquées
+    status = status or DeclarationStatus.EN_ATTENTE
+    priority = priority or DeclarationPriority.MOYENNE
+    day = _utc(created_at or datetime.now(timezone.utc)).date()
+    return (
+        (day, type, status, priority, category_id),
+        processing_seconds(created_at, status, decided_at),
+    )
+
+
+def state_of_declaration(declaration, decided_at: Optional[datetime] = None) -> tuple[tuple, float]:
+    """decided_at: date du premier statut autre que "en attente", lue dans l'historique par l'appelant."""
+    return declaration_state(
+        declaration.created_at,
+        declaration.type,
+        declaration.status,
+        declaration.priority,
+        declaration.category_id,
+        decided_at,
+    )
+
+
+def tip_state(created_at: Optional[datetime], is_read, is_useful) -> tuple[date, Counter]:
+    """Jour de création et contribution d'un indice aux compteurs."""
+    day = _utc(created_at or datetime.now(timezone.utc)).date()
+    return day, Counter(
+        total=1,
+        unread=int(not is_read),
+        useful=int(is_useful == 1),
+        not_useful=int(is_useful == 0),
+    )
+
+
+def state_of_tip(tip) -> tuple[date, Counter]:
+    return tip_state(tip.created_at, tip.is_read, tip.is_useful)
+
+
+class StatsDelta:
+    """
+    Variations des compteurs accumulées pendant une écriture,
+    puis appliquées en une requête (upsert) par table.
+    """
+
+    def __init__(self):
+        self.declarations: dict[tuple, list] = defaultdict(lambda: [0, 0.0])
+        self.tips: dict[date, Counter] = defaultdict(Counter)
+
+    def declaration(self, state: tuple[tuple, float], sign: int = 1) -> None:
+        key, seconds = state
+        self.declarations[key][0] += sign
+        self.declarations[key][1] += sign * seconds
+
+    def tip(self, state: tuple[date, Counter], sign: int = 1) -> None:
+        day, counters = state
+        for name, value in counters.items():
+            self.tips[day][name] += sign * value
+
+    async def apply(self, db: AsyncSession) -> None:
+        """Applique les variations (dans la transaction de l'appelant)."""
+        declaration_rows = [
+            {**dict(zip(DECLARATION_KEYS, key)), "count": count, "processing_seconds": seconds}
+            for key, (count, seconds) in self.declarations.items()
+            if count or seconds
+        ]
+        if declaration_rows:
+            table = DeclarationDailyStat.__table__
+            stmt = sqlite_insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(DECLARATION_KEYS),
+                set_={
+                    "count": table.c.count + stmt.excluded.count,
+                    "processing_seconds": table.c.processing_seconds + stmt.excluded.processing_seconds,
+                },
+            )
+            await db.execute(stmt, declaration_rows)
+
+        tip_rows = [
+            {"day": day, **{name: counters[name] for name in TIP_COUNTERS}}
+            for day, counters in self.tips.items()
+            if any(counters.values())
+        ]
+        if tip_rows:
+            table = TipDailyStat.__table__
+            stmt = sqlite_insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["day"],
+                set_={name: table.c[name] + stmt.excluded[name] for name in TIP_COUNTERS},
+            )
+            await db.execute(stmt, tip_rows)
+
+        self.declarations.clear()
+        self.tips.clear()
+
+
+# Recalcul complet en SQL. Le délai de traitement reprend la définition de
+# processing_seconds: premier événement de statut hors "en attente".
+_REBUILD_DECLARATIONS = text("""
+    INSERT INTO declaration_daily_stats
+        (day, type, status, priority, category_id, count, processing_seconds)
+    SELECT
+        date(d.created_at), d.type, d.status, d.priority, d.category_id, count(*),
+        sum(CASE WHEN d.status = 'EN_ATTENTE' THEN 0 ELSE coalesce(max(0, 86400 * (
+            julianday((
+                SELECT min(e.created_at)
+                FROM declaration_status_events AS e
+                WHERE e.declaration_id = d.id AND e.status != 'EN_ATTENTE'
+            )) - julianday(d.created_at)
+        )), 0) END)
+    FROM declarations AS d
+    GROUP BY 1, 2, 3, 4, 5
+""")
+
+_REBUILD_TIPS = text("""
+    INSERT INTO tip_daily_stats (day, total, unread, useful, not_useful)
+    SELECT
+        date(created_at), count(*),
+        sum(coalesce(is_read, 0) = 0), sum(is_useful = 1), sum(is_useful = 0)
+    FROM tips
+    GROUP BY 1
+""")
+
+
+async def rebuild_stats(db: AsyncSession) -> None:
+    """
+    Reconstruit les tables agrégées depuis les tables sources.
+    Une seule transaction: les écritures concurrentes attendent la fin du recalcul.
+    """
+    await db.execute(delete(DeclarationDailyStat))
+    await db.execute(delete(TipDailyStat))
+    await db.execute(_REBUILD_DECLARATIONS)
+    await db.execute(_REBUILD_TIPS)
+    await db.commit()
+    _cache.clear()
+
+
+async def stats_need_rebuild(db: AsyncSession) -> bool:
+    """Vrai si les tables agrégées sont vides alors que des données existent (premier démarrage)."""
+    has_stats = await db.scalar(select(DeclarationDailyStat.day).limit(1))
+    if has_stats is not None:
+        return False
+    has_declarations = await db.scalar(text("SELECT 1 FROM declarations LIMIT 1"))
+    return has_declarations is not None
+
+
+async def compute_stats(db: AsyncSession, days: int) -> dict:
+    """Statistiques du tableau de bord à partir des tables agrégées."""
+    by_status, by_type, by_priority, by_category = Counter(), Counter(), Counter(), Counter()
+    processed = 0
+    total_processing = 0.0
+
+    result = await db.execute(
+        select(
+            DeclarationDailyStat.type,
+            DeclarationDailyStat.status,
+            DeclarationDailyStat.priority,
+            Category.name,
+            func.sum(DeclarationDailyStat.count),
+            func.sum(DeclarationDailyStat.processing_seconds),
+        )
+        .join(Category, Category.id == DeclarationDailyStat.category_id)
+        .group_by(
+            DeclarationDailyStat.type,
+            DeclarationDailyStat.status,
+            DeclarationDailyStat.priority,
+            DeclarationDailyStat.category_id,
+        )
+    )
+    for type_, status, priority, category, count, seconds in result.all():
+        if not count:
+            continue
+        by_type[type_.value] += count
+        by_status[status.value] += count
+        by_priority[priority.value] += count
+        by_category[category] += count
+        if status != DeclarationStatus.EN_ATTENTE:
+            processed += count
+            total_processing += seconds or 0
+
+    today = datetime.now(timezone.utc).date()
+    since = today - timedelta(days=days - 1)
+    result = await db.execute(
+        select(DeclarationDailyStat.day, func.sum(DeclarationDailyStat.count))
+        .where(DeclarationDailyStat.day >= since)
+        .group_by(DeclarationDailyStat.day)
+    )
+    per_day = dict(result.all())
+    daily = [
+        {"date": since + timedelta(days=i), "count": per_day.get(since + timedelta(days=i), 0)}
+        for i in range(days)
+    ]
+
+    result = await db.execute(
+        select(*[func.coalesce(func.sum(getattr(TipDailyStat, name)), 0) for name in TIP_COUNTERS])
+    )
+    tips = dict(zip(TIP_COUNTERS, result.one()))
+
+    total = sum(by_status.values())
+    validated = by_status[DeclarationStatus.VALIDEE.value]
+    return {
+        "total": total,
+        "by_status": dict(by_status),
+        "by_type": dict(by_type),
+        "by_priority": dict(by_priority),
+        "by_category": dict(by_category.most_common(TOP_CATEGORIES)),
+        "last_7_days": sum(d["count"] for d in daily[-7:]),
+        "validation_rate": round(validated / total * 100, 1) if total else 0.0,
+        "avg_processing_hours": round(total_processing / processed / 3600, 1) if processed else 0.0,
+        "daily": daily,
+        "tips": tips,
+        "generated_at": datetime.now(timezone.utc),
+    }
+
+
+async def get_stats(db: AsyncSession, days: int) -> dict:
+    """Statistiques avec cache de courte durée (STATS_CACHE_SECONDS)."""
+    now = time.monotonic()
+    cached = _cache.get(days)
+    if cached and cached[0] > now:
+        return cached[1]
+    stats = await compute_stats(db, days)
+    _cache[days] = (now + settings.STATS_CACHE_SECONDS, stats)
+    return stats
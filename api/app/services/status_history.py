@@ -0,0 +1,74 @@
+"""
+Historique des statuts des déclarations (table declaration_status_events).
+Écriture: une insertion par changement. Lecture: requête bornée sur
+l'index (declaration_id, created_at).
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.declaration import DeclarationStatus, DeclarationStatusEvent
+
+# Nombre maximal d'entrées renvoyées par le suivi public
+TRACK_HISTORY_LIMIT = 50
+
+
+def add_status_event(
+    db: AsyncSession,
+    declaration_id: str,
+    status: DeclarationStatus,
+    comment: Optional[str] = None,
+    changed_by: Optional[str] = None,
+    created_at: Optional[datetime] = None,
+) -> DeclarationStatusEvent:
+    """Ajoute une entrée d'historique (insérée au prochain flush)."""
+    event = DeclarationStatusEvent(
+        declaration_id=declaration_id,
+        status=status,
+        comment=comment,
+        changed_by=changed_by,
+        created_at=created_at or datetime.now(timezone.utc),
+    )
+    db.add(event)
+    return event
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite restitue des dates naïves (stockées en UTC)
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def public_entry(event: DeclarationStatusEvent) -> dict:
+    """Entrée visible par le déclarant (sans commentaire ni auteur)."""
+    return {
+        "status": event.status.value,
+        "timestamp": _utc(event.created_at).isoformat(),
+    }
+
+
+def admin_entry(event: DeclarationStatusEvent) -> dict:
+    return {
+        **public_entry(event),
+        "comment": event.comment or "",
+        "changed_by": event.changed_by,
+    }
+
+
+async def get_status_events(
+    db: AsyncSession,
+    declaration_id: str,
+    limit: Optional[int] = None,
+) -> list[DeclarationStatusEvent]:
+    """Historique chronologique; avec limit, seulement les entrées les plus récentes."""
+    query = (
+        select(DeclarationStatusEvent)
+        .where(DeclarationStatusEvent.declaration_id == declaration_id)
+        .order_by(DeclarationStatusEvent.created_at.desc())
+    )
+    if limit:
+        query = query.limit(limit)
+    result = await db.execute(query)
+    events = result.scalars().all()
+    return list(reversed(events))
@@ -0,0 +1,147 @@
+"""
+Ramasse-miettes des fichiers uploadés et rapport d'utilisation du stockage.
+Marquage: parcours en flux des pièces jointes des déclarations et indices.
+Balayage: suppression par lots des fichiers non référencés plus anciens
+que le délai de grâce, avec pause entre les lots pour limiter les I/O.
+"""
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.declaration import Declaration
+from app.models.tip import Tip
+
+# Taille des lots lus depuis la base pendant le marquage
+STREAM_BATCH_SIZE = 1000
+
+# Clé des pièces jointes désignant un fichier stocké (nom sécurisé de l'upload);
+# "filename" porte le nom d'origine, choisi par le client
+ATTACHMENT_FILE_KEY = "stored_name"
+
+# Tranches d'âge du rapport de stockage (limite supérieure, libellé)
+AGE_BUCKETS = [
+    (timedelta(days=1), "moins_1_jour"),
+    (timedelta(days=7), "moins_7_jours"),
+    (timedelta(days=30), "moins_30_jours"),
+    (timedelta(days=90), "moins_90_jours"),
+    (None, "plus_90_jours"),
+]
+
+
+def _is_stored_file(entry: os.DirEntry) -> bool:
+    # Les fichiers temporaires (écriture atomique en cours) sont ignorés
+    return entry.is_file() and not entry.name.endswith(".tmp")
+
+
+async def collect_referenced_files(db: AsyncSession) -> set[str]:
+    """Phase de marquage: noms des fichiers référencés par une pièce jointe."""
+    referenced: set[str] = set()
+    for column in (Declaration.attachments, Tip.attachments):
+        result = await db.stream(
+            select(column).execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        async for (attachments,) in result:
+            for attachment in attachments or []:
+                if not isinstance(attachment, dict):
+                    continue
+                value = attachment.get(ATTACHMENT_FILE_KEY)
+                if value:
+                    referenced.add(os.path.basename(value))
+    return referenced
+
+
+def sweep_orphans(
+    upload_dir: Path,
+    referenced: set[str],
+    grace_period: timedelta,
+    batch_size: int,
+    batch_pause: float,
+    dry_run: bool = False,
+    on_delete: Optional[Callable[[Path], None]] = None,
+) -> dict:
+    """
+    Phase de balayage (bloquante, à exécuter dans un thread).
+    Retourne les compteurs et la liste des fichiers supprimés.
+    """
+    cutoff = time.time() - grace_period.total_seconds()
+    stats = {
+        "scanned": 0,
+        "referenced": 0,
+        "recent": 0,
+        "deleted": 0,
+        "bytes_freed": 0,
+        "deleted_files": [],
+    }
+
+    in_batch = 0
+    with os.scandir(upload_dir) as entries:
+        for entry in entries:
+            if not _is_stored_file(entry):
+                continue
+            stats["scanned"] += 1
+
+            if entry.name in referenced:
+                stats["referenced"] += 1
+                continue
+
+            st = entry.stat()
+            if st.st_mtime > cutoff:
+                stats["recent"] += 1
+                continue
+
+            if not dry_run:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+                if on_delete:
+                    on_delete(Path(entry.path))
+            stats["deleted"] += 1
+            stats["bytes_freed"] += st.st_size
+            stats["deleted_files"].append(entry.name)
+
+            # Limiter la charge I/O: pause après chaque lot de suppressions
+            in_batch += 1
+            if in_batch >= batch_size:
+                in_batch = 0
+                time.sleep(batch_pause)
+
+    return stats
+
+
+def storage_report(upload_dir: Path) -> dict:
+    """Utilisation du stockage par tranche d'âge et par type (bloquant)."""
+    now = time.time()
+    report = {
+        "total_files": 0,
+        "total_bytes": 0,
+        "by_age": {label: {"files": 0, "bytes": 0} for _, label in AGE_BUCKETS},
+        "by_type": {},
+    }
+
+    with os.scandir(upload_dir) as entries:
+        for entry in entries:
+            if not _is_stored_file(entry):
+                continue
+            st = entry.stat()
+            report["total_files"] += 1
+            report["total_bytes"] += st.st_size
+
+            age = now - st.st_mtime
+            for limit, label in AGE_BUCKETS:
+                if limit is None or age < limit.total_seconds():
+                    report["by_age"][label]["files"] += 1
+                    report["by_age"][label]["bytes"] += st.st_size
+                    break
+
+            ext = Path(entry.name).suffix.lower() or "(aucune)"
+            bucket = report["by_type"].setdefault(ext, {"files": 0, "bytes": 0})
+            bucket["files"] += 1
+            bucket["bytes"] += st.st_size
+
+    return report
@@ -0,0 +1,196 @@
+"""
+Suggestions de saisie pour la catégorie et le lieu des déclarations.
+Par champ, un tableau trié de clés normalisées (sans accents) renvoie aux
+valeurs et à leur nombre d'occurrences; chaque valeur est aussi indexée à
+partir de chacun de ses mots (« lome » trouve « Grand marché, Lomé »).
+Les préfixes courts, et les plus longs couvrant beaucoup de clés, gardent
+leurs SUGGEST_TOP_K meilleures valeurs en cache, tenues à jour à chaque
+insertion: la mémoire reste bornée et la réponse ne dépend pas du nombre
+de valeurs.
+"""
+import heapq
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import func, select
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.declaration import Declaration
+from app.services.normalize import fold
+
+settings = get_settings()
+
+SUGGEST_FIELDS = ("category", "location")
+
+# Préfixes dont les meilleures valeurs sont tenues à jour en cache
+CACHED_PREFIX_LENGTH = 3
+
+# Préfixe plus long couvrant davantage de clés: top mis en cache à la première requête
+CACHE_MIN_KEYS = 64
+
+# Au-delà, la valeur n'est ni indexée ni suggérée (adresse détaillée)
+MAX_VALUE_LENGTH = 100
+MAX_WORD_KEYS = 8
+
+# Borne supérieure des clés d'un préfixe (les clés ne contiennent que [a-z0-9 ])
+_KEY_END = "\x7f"
+
+
+class _Value:
+    __slots__ = ("count", "spellings")
+
+    def __init__(self):
+        self.count = 0
+        self.spellings = Counter()
+
+    @property
+    def display(self) -> str:
+        # Orthographe la plus fréquente de la valeur normalisée
+        return self.spellings.most_common(1)[0][0]
+
+
+class PrefixIndex:
+    """Index de préfixes d'un champ: clés triées et meilleures valeurs par préfixe."""
+
+    def __init__(self, top_k: int):
+        self.top_k = top_k
+        self._values: dict[str, _Value] = {}
+        self._keys: list[tuple[str, str]] = []  # (clé, valeur normalisée), triées
+        self._top: dict[str, list[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @staticmethod
+    def _normalize(value: Optional[str]) -> Optional[tuple[str, str]]:
+        if not value:
+            return None
+        value = " ".join(value.split())
+        folded = fold(value)
+        if not folded or len(folded) > MAX_VALUE_LENGTH:
+            return None
+        return value, folded
+
+    @staticmethod
+    def _keys_of(folded: str) -> list[str]:
+        words = folded.split()[:MAX_WORD_KEYS]
+        return [" ".join(words[i:]) for i in range(len(words))]
+
+    def _count(self, value: str, folded: str, count: int) -> tuple[_Value, bool]:
+        entry = self._values.get(folded)
+        created = entry is None
+        if created:
+            entry = self._values[folded] = _Value()
+        entry.count += count
+        entry.spellings[value] += count
+        return entry, created
+
+    def load(self, rows) -> None:
+        """Construction initiale depuis (valeur, nombre): un seul tri."""
+        self.clear()
+        for value, count in rows:
+            normalized = self._normalize(value)
+            if normalized:
+                self._count(*normalized, count)
+        self._keys = sorted(
+            (key, folded) for folded in self._values for key in self._keys_of(folded)
+        )
+        # Valeurs parcourues par fréquence décroissante: chaque top se remplit dans l'ordre
+        for folded in sorted(self._values, key=lambda v: self._values[v].count, reverse=True):
+            for prefix in self._short_prefixes(folded):
+                top = self._top.setdefault(prefix, [])
+                if len(top) < self.top_k and folded not in top:
+                    top.append(folded)
+
+    def _short_prefixes(self, folded: str) -> set[str]:
+        return {
+            key[:length]
+            for key in self._keys_of(folded)
+            for length in range(1, min(len(key), CACHED_PREFIX_LENGTH) + 1)
+        }
+
+    def add(self, value: Optional[str], count: int = 1) -> None:
+        normalized = self._normalize(value)
+        if not normalized:
+            return
+        _, folded = normalized
+        _, created = self._count(*normalized, count)
+        keys = self._keys_of(folded)
+        if created:
+            for key in keys:
+                insort(self._keys, (key, folded))
+        # Les nombres ne font que croître: seule cette valeur peut entrer dans
+        # un top; préfixes courts toujours, plus longs s'ils sont déjà en cache
+        for key in keys:
+            for length in range(1, len(key) + 1):
+                prefix = key[:length]
+                if length <= CACHED_PREFIX_LENGTH or prefix in self._top:
+                    self._promote(prefix, folded)
+
+    def _promote(self, prefix: str, folded: str) -> None:
+        top = self._top.setdefault(prefix, [])
+        if folded not in top:
+            if len(top) >= self.top_k and self._values[top[-1]].count >= self._values[folded].count:
+                return
+            top.append(folded)
+        top.sort(key=lambda v: self._values[v].count, reverse=True)
+        del top[self.top_k:]
+
+    def suggest(self, query: str, limit: int) -> list[tuple[str, int]]:
+        """Valeurs dont un mot commence par la requête, les plus fréquentes d'abord."""
+        prefix = fold(query)
+        if not prefix:
+            return []
+        top = self._top.get(prefix)
+        if top is None and len(prefix) > CACHED_PREFIX_LENGTH:
+            start = bisect_left(self._keys, (prefix,))
+            end = bisect_left(self._keys, (prefix + _KEY_END,), start)
+            candidates = {folded for _, folded in self._keys[start:end]}
+            top = heapq.nlargest(self.top_k, candidates, key=lambda v: self._values[v].count)
+            # Préfixe long mais encore large: mis en cache et tenu à jour ensuite
+            if end - start > CACHE_MIN_KEYS:
+                self._top[prefix] = top
+        return [(self._values[v].display, self._values[v].count) for v in (top or [])[:limit]]
+
+    def clear(self) -> None:
+        self._values.clear()
+        self._keys = []
+        self._top.clear()
+
+
+suggestion_indexes = {field: PrefixIndex(settings.SUGGEST_TOP_K) for field in SUGGEST_FIELDS}
+
+
+def add_suggestions(category: str, location: Optional[str]) -> None:
+    """Compte les valeurs d'une déclaration insérée (soumission ou import)."""
+    suggestion_indexes["category"].add(category)
+    suggestion_indexes["location"].add(location)
+
+
+def suggest(field: str, query: str, limit: int) -> list[tuple[str, int]]:
+    """
+    Suggestions publiques: seules les valeurs partagées par au moins
+    SUGGEST_MIN_COUNT déclarations sont proposées (un lieu saisi une seule
+    fois peut être une adresse personnelle).
+    """
+    return [
+        (value, count)
+        for value, count in suggestion_indexes[field].suggest(query, limit)
+        if count >= settings.SUGGEST_MIN_COUNT
+    ]
+
+
+async def load_suggestions() -> int:
+    """Construit les index au démarrage: une agrégation GROUP BY par champ."""
+    async with AsyncSessionLocal() as db:
+        for field in SUGGEST_FIELDS:
+            column = getattr(Declaration, field)
+            result = await db.execute(
+                select(column, func.count())
+                .where(column.is_not(None), func.length(column) <= MAX_VALUE_LENGTH)
+                .group_by(column)
+            )
+            suggestion_indexes[field].load(result.all())
+    return sum(len(index) for index in suggestion_indexes.values())
@@ -0,0 +1,50 @@
+"""
+Compteurs d'indices tenus sur la ligne de chaque déclaration
+(tips_count, unread_tips_count), mis à jour dans la transaction qui crée
+ou modifie les indices: la fiche admin se lit sans COUNT.
+"""
+from collections import Counter, defaultdict
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.declaration import Declaration
+
+
+class TipCounterDelta:
+    """
+    Variations des compteurs par déclaration accumulées pendant une écriture,
+    puis appliquées en une requête (executemany) par appel à apply().
+    """
+
+    def __init__(self):
+        self.declarations: dict[str, Counter] = defaultdict(Counter)
+
+    def tip(self, declaration_id: str, is_read, sign: int = 1) -> None:
+        counters = self.declarations[declaration_id]
+        counters["total"] += sign
+        counters["unread"] += sign * int(not is_read)
+
+    def read_changed(self, declaration_id: str, was_read, is_read) -> None:
+        """Passage d'un indice de lu à non lu (ou l'inverse)."""
+        self.declarations[declaration_id]["unread"] += int(not is_read) - int(not was_read)
+
+    async def apply(self, db: AsyncSession) -> None:
+        """Applique les variations (dans la transaction de l'appelant)."""
+        rows = [
+            {"b_id": declaration_id, "b_total": c["total"], "b_unread": c["unread"]}
+            for declaration_id, c in self.declarations.items()
+            if c["total"] or c["unread"]
+        ]
+        if rows:
+            table = Declaration.__table__
+            stmt = (
+                update(table)
+                .where(table.c.id == bindparam("b_id"))
+                .values(
+                    tips_count=table.c.tips_count + bindparam("b_total"),
+                    unread_tips_count=table.c.unread_tips_count + bindparam("b_unread"),
+                )
+            )
+            await db.execute(stmt, rows)
+        self.declarations.clear()
@@ -0,0 +1,89 @@
+"""
+Mesures de performance reproductibles (hors suite pytest, non collectées).
+Exécution depuis api/, par exemple:
+
+    python -m tests.benchmarks.file_serving --files 20
+
+Chaque script s'exécute dans un répertoire de travail temporaire (base et
+fichiers de données jetables) et affiche ses mesures; tests/test_benchmarks.py
+les lance à petite échelle pour qu'ils restent exécutables.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+
+def use_temp_workdir() -> None:
+    """
+    Répertoire de travail et réglages jetables, à appeler avant le premier
+    import de l'application (chemins ./data relatifs). Sans effet si
+    l'application est déjà chargée (exécution depuis la suite de tests).
+    """
+    if "app.main" in sys.modules:
+        return
+    os.chdir(tempfile.mkdtemp(prefix="declarations-bench-"))
+    os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000000")
+    os.environ.setdefault("RATE_LIMIT_PER_HOUR", "100000000")
+    os.environ.setdefault("STATS_CACHE_SECONDS", "0")
+
+
+def timed(fn: Callable[[], object], repeat: int = 5, number: int = 1) -> float:
+    """Médiane sur `repeat` essais du temps d'un appel (secondes), fn appelée `number` fois par essai."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples)
+
+
+def report(title: str, rows: list[tuple[str, str]]) -> None:
+    width = max(len(label) for label, _ in rows)
+    print(f"\n{title}")
+    for label, value in rows:
+        print(f"  {label.ljust(width)}  {value}")
+
+
+@contextmanager
+def admin_client() -> Iterator[tuple]:
+    """TestClient démarré sur une base neuve et en-têtes du premier compte (administrateur)."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    credentials = {"username": "bench_admin", "password": "Passw0rd!Passw0rd"}
+    with TestClient(app) as client:
+        client.post("/api/v1/auth/register", json={**credentials, "email": "bench_admin@example.com"})
+        r = client.post("/api/v1/auth/login", json=credentials)
+        r.raise_for_status()
+        yield client, {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def create_declarations(client, headers, count: int) -> list[str]:
+    """Déclarations créées par l'API publique (catégorie propre au lot), puis leurs identifiants."""
+    category = f"Banc {uuid.uuid4().hex[:8]}"
+    for i in range(count):
+        r = client.post("/api/v1/declarations/", json={
+            "type": "perte",
+            "category": category,
+            "description": f"Sacoche en cuir perdue au marché, lot de mesure {i}",
+            "location": "Marché de Bè, Lomé",
+            "captcha_answer": 3,
+            "captcha_expected": 3,
+        })
+        r.raise_for_status()
+    ids, page = [], 1
+    while len(ids) < count:
+        r = client.get("/api/v1/declarations/admin", headers=headers, params={
+            "category": category, "fields": "id", "per_page": 100, "page": page,
+        })
+        r.raise_for_status()
+        ids += [item["id"] for item in r.json()["items"]]
+        page += 1
+    return ids
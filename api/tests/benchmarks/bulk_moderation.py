@@ -0,0 +1,85 @@
+"""
+Modération groupée: N déclarations (et N indices) validées par une seule
+requête PATCH .../admin/bulk, comparé à N requêtes unitaires.
+
+    python -m tests.benchmarks.bulk_moderation --count 100
+"""
+import argparse
+import time
+
+from tests.benchmarks import admin_client, create_declarations, report, use_temp_workdir
+
+
+def _tips(client, headers, declaration_id: str, count: int) -> list[str]:
+    for i in range(count):
+        r = client.post("/api/v1/tips/", json={
+            "declaration_id": declaration_id,
+            "description": f"Aperçue près de la station de taxis, signalement {i}",
+            "captcha_answer": 3,
+            "captcha_expected": 3,
+        })
+        r.raise_for_status()
+    ids, page = [], 1
+    while len(ids) < count:
+        r = client.get("/api/v1/tips/admin", headers=headers, params={
+            "declaration_id": declaration_id, "fields": "id", "per_page": 100, "page": page,
+        })
+        r.raise_for_status()
+        ids += [item["id"] for item in r.json()["items"]]
+        page += 1
+    return ids
+
+
+def _elapsed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _compare(label: str, count: int, single: float, bulk: float) -> list[tuple[str, str]]:
+    return [
+        (f"{label}: {count} requêtes unitaires", f"{single * 1000:,.0f} ms ({single / count * 1000:.2f} ms/élément)"),
+        (f"{label}: 1 requête groupée", f"{bulk * 1000:,.0f} ms ({bulk / count * 1000:.2f} ms/élément)"),
+        (f"{label}: gain", f"x{single / bulk:,.1f}"),
+    ]
+
+
+def run(client, headers, count: int = 100) -> list[tuple[str, str]]:
+    ids = create_declarations(client, headers, 2 * count + 1)
+    target, single_ids, bulk_ids = ids[0], ids[1:count + 1], ids[count + 1:]
+
+    def patch(url: str, body: dict) -> dict:
+        r = client.patch(url, headers=headers, json=body)
+        r.raise_for_status()
+        return r.json()
+
+    # Déclaration validée: elle peut recevoir des indices
+    patch("/api/v1/declarations/admin/bulk", {"ids": [target], "status": "validee"})
+
+    single = _elapsed(lambda: [
+        patch(f"/api/v1/declarations/admin/{i}", {"status": "validee"}) for i in single_ids
+    ])
+    bulk = _elapsed(lambda: patch("/api/v1/declarations/admin/bulk", {"ids": bulk_ids, "status": "validee"}))
+    rows = _compare("déclarations", count, single, bulk)
+
+    tip_ids = _tips(client, headers, target, 2 * count)
+    single = _elapsed(lambda: [
+        patch(f"/api/v1/tips/admin/{i}", {"is_read": True, "is_useful": True}) for i in tip_ids[:count]
+    ])
+    bulk = _elapsed(lambda: patch(
+        "/api/v1/tips/admin/bulk", {"ids": tip_ids[count:], "is_read": True, "is_useful": True}
+    ))
+    return rows + _compare("indices", count, single, bulk)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100, help="au plus MODERATION_BULK_MAX_IDS")
+    args = parser.parse_args()
+    use_temp_workdir()
+    with admin_client() as (client, headers):
+        report("Modération groupée", run(client, headers, args.count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Détection des quasi-doublons: recherche dans l'index LSH (DuplicateIndex)
+à grande taille, coût du calcul d'une signature MinHash et rappel sur des
+déclarations ressaisies avec de légères variantes.
+
+    python -m tests.benchmarks.duplicates --size 1000000
+
+L'index est rempli de signatures aléatoires (le calcul de 1M de signatures
+réelles prendrait plusieurs minutes sans rien changer à la répartition des
+bandes), plus `--texts` déclarations réelles dont on cherche les variantes.
+"""
+import argparse
+import random
+import time
+import uuid
+
+from tests.benchmarks import report, timed, use_temp_workdir
+
+_OBJECTS = [
+    "sacoche en cuir noir", "téléphone Samsung Galaxy", "carte d'identité", "portefeuille marron",
+    "passeport togolais", "clés de moto", "sac à dos bleu", "permis de conduire", "ordinateur portable",
+    "montre dorée", "lunettes de vue", "carte grise", "attestation de diplôme", "chéquier Ecobank",
+]
+_PLACES = [
+    "marché de Bè", "grand marché d'Adawlato", "station de taxis d'Agbalépédo", "université de Lomé",
+    "rond-point Déckon", "gare routière d'Agbalépédo", "plage de Lomé", "marché d'Hédzranawoé",
+]
+_CIRCUMSTANCES = [
+    "perdu en fin d'après-midi", "oublié dans un taxi-moto", "tombé de ma poche", "disparu pendant la foule",
+    "laissé sur un banc", "volé pendant que je payais", "égaré en rentrant du travail",
+]
+_DETAILS = [
+    "avec mes papiers à l'intérieur", "contenant une photo de famille", "avec un autocollant rouge",
+    "dans une pochette plastique", "au nom de Koffi Mensah", "avec un porte-clés en forme de poisson",
+    "récompense promise à qui le rapporte", "contacter le numéro indiqué",
+]
+
+
+def _declaration(rng: random.Random) -> tuple[str, str, str]:
+    description = (
+        f"{rng.choice(_OBJECTS).capitalize()} {rng.choice(_CIRCUMSTANCES)} au {rng.choice(_PLACES)}, "
+        f"{rng.choice(_DETAILS)}, {rng.choice(_DETAILS)}. Référence {rng.randrange(10**6)}."
+    )
+    return description, rng.choice(["Documents", "Téléphone", "Sac"]), f"{rng.choice(_PLACES)}, Lomé"
+
+
+def _variant(rng: random.Random, description: str) -> str:
+    """Même déclaration ressaisie: un mot retiré et quelques mots ajoutés."""
+    words = description.split()
+    del words[rng.randrange(len(words))]
+    return " ".join(words) + " merci de m'aider"
+
+
+def run(size: int = 100_000, texts: int = 1000, lookups: int = 2000) -> list[tuple[str, str]]:
+    from app.models.declaration import DeclarationType
+    from app.services.duplicates import NUM_PERM, DuplicateIndex, compute_signature, similarity
+
+    rng = random.Random(42)
+    originals = [_declaration(rng) for _ in range(texts)]
+
+    index = DuplicateIndex()
+    start = time.perf_counter()
+    for _ in range(max(size - texts, 0)):
+        index.add(str(uuid.uuid4()), DeclarationType.PERTE, rng.randbytes(NUM_PERM * 4))
+    signatures = {}
+    for description, category, location in originals:
+        declaration_id = str(uuid.uuid4())
+        signatures[declaration_id] = compute_signature(description, category, location)
+        index.add(declaration_id, DeclarationType.PERTE, signatures[declaration_id])
+    build = time.perf_counter() - start
+
+    queries = [
+        (declaration_id, compute_signature(_variant(rng, description), category, location))
+        for declaration_id, (description, category, location) in zip(signatures, originals)
+    ]
+    unrelated = [compute_signature(*_declaration(rng)) for _ in range(lookups)]
+    query_signatures = [signature for _, signature in queries]
+
+    def lookup_all(batch):
+        for signature in batch:
+            index.candidates(DeclarationType.PERTE, signature)
+
+    hit = timed(lambda: lookup_all(query_signatures), repeat=5) / len(query_signatures)
+    miss = timed(lambda: lookup_all(unrelated), repeat=5) / len(unrelated)
+    signature_cost = timed(lambda: compute_signature(*originals[0]), repeat=5, number=200)
+
+    found = 0
+    for declaration_id, signature in queries:
+        candidates = index.candidates(DeclarationType.PERTE, signature)
+        found += declaration_id in candidates and similarity(signature, signatures[declaration_id]) >= 0.6
+    candidates_per_miss = sum(
+        len(index.candidates(DeclarationType.PERTE, s)) for s in unrelated
+    ) / len(unrelated)
+
+    return [
+        ("déclarations indexées", f"{index.size:,}"),
+        ("construction de l'index", f"{build:,.1f} s ({build / max(index.size, 1) * 1e6:.1f} µs/ajout)"),
+        ("recherche, variante d'une déclaration", f"{hit * 1e6:,.1f} µs"),
+        ("recherche, déclaration sans doublon", f"{miss * 1e6:,.1f} µs"),
+        ("candidats par recherche sans doublon", f"{candidates_per_miss:.2f}"),
+        ("calcul d'une signature", f"{signature_cost * 1e6:,.0f} µs"),
+        ("variantes retrouvées (similarité >= 0,6)", f"{found}/{len(queries)}"),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--texts", type=int, default=1000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+    use_temp_workdir()
+    report("Quasi-doublons (MinHash/LSH)", run(args.size, args.texts, args.lookups))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Service des fichiers uploadés (get_file): débit des images de la liste
+publique, réponses 304, requêtes partielles et variantes en cache, comparé
+à un FileResponse simple (service d'avant: stat à chaque appel, sans ETag).
+
+    python -m tests.benchmarks.file_serving --files 20 --requests 500
+
+Mesuré via TestClient (ASGI en processus, sans sendfile): les chiffres
+comparent le coût applicatif par requête, pas le débit réseau.
+"""
+import argparse
+import io
+import os
+import random
+
+from tests.benchmarks import admin_client, report, timed, use_temp_workdir
+
+
+def _photo(seed: int) -> bytes:
+    from PIL import Image
+
+    rng = random.Random(seed)
+    img = Image.new("RGB", (1600, 1200), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    img.paste(Image.frombytes("RGB", (400, 300), rng.randbytes(400 * 300 * 3)).resize((1600, 1200)))
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def _plain_file_app(directory):
+    """
+    Service d'origine: existence vérifiée à chaque appel, FileResponse sans
+    ETag de contenu, derrière les mêmes middlewares que l'application.
+    """
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import FileResponse
+
+    from app.main import app
+
+    plain = FastAPI()
+    plain.user_middleware = list(app.user_middleware)
+
+    @plain.get("/{filename}")
+    async def get_file(filename: str):
+        path = directory / os.path.basename(filename)
+        if not path.exists():
+            raise HTTPException(status_code=404)
+        return FileResponse(path, media_type="image/jpeg", headers={"Cache-Control": "public, max-age=31536000"})
+
+    return plain
+
+
+def run(client, headers, files: int = 20, requests: int = 200) -> list[tuple[str, str]]:
+    from fastapi.testclient import TestClient
+
+    from app.api.routes.files import UPLOAD_DIR
+
+    urls, sizes = [], []
+    for i in range(files):
+        r = client.post("/api/v1/files/upload", files={"file": (f"photo{i}.jpg", _photo(i), "image/jpeg")})
+        r.raise_for_status()
+        urls.append(r.json()["url"])
+    # Images publiées après optimisation: taille et ETag lus sur le fichier servi
+    published = {url: client.get(url) for url in urls}
+    sizes = [len(r.content) for r in published.values()]
+    etags = {url: r.headers["etag"] for url, r in published.items()}
+    mean_size = sum(sizes) / len(sizes)
+
+    def per_second(fn) -> float:
+        return requests / timed(lambda: [fn(urls[i % files]) for i in range(requests)], repeat=3)
+
+    def check(status):
+        def call(response):
+            assert response.status_code == status, response.status_code
+        return call
+
+    ok, partial, not_modified = check(200), check(206), check(304)
+    floor = per_second(lambda url: ok(client.get("/health")))
+    full = per_second(lambda url: ok(client.get(url)))
+    conditional = per_second(lambda url: not_modified(client.get(url, headers={"If-None-Match": etags[url]})))
+    ranged = per_second(lambda url: partial(client.get(url, headers={"Range": "bytes=0-65535"})))
+
+    for url in urls:
+        ok(client.get(url, params={"w": 320, "fmt": "webp"}))
+    thumbnails = per_second(lambda url: ok(client.get(url, params={"w": 320, "fmt": "webp"})))
+
+    plain = TestClient(_plain_file_app(UPLOAD_DIR))
+    names = {url: url.rsplit("/", 1)[1] for url in urls}
+    baseline = per_second(lambda url: ok(plain.get(f"/{names[url]}")))
+
+    return [
+        ("images", f"{files} x {mean_size / 1024:.0f} Ko"),
+        ("requête minimale (/health)", f"{floor:,.0f} req/s"),
+        ("FileResponse simple (avant)", f"{baseline:,.0f} req/s"),
+        ("get_file, 200", f"{full:,.0f} req/s ({full * mean_size / 2**20:,.0f} Mo/s)"),
+        ("get_file, 304 If-None-Match", f"{conditional:,.0f} req/s"),
+        ("get_file, 206 Range 64 Ko", f"{ranged:,.0f} req/s"),
+        ("variante w=320 webp en cache", f"{thumbnails:,.0f} req/s"),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    use_temp_workdir()
+    with admin_client() as (client, headers):
+        report("Service des fichiers", run(client, headers, args.files, args.requests))
+
+
+if __name__ == "__main__":
+    main()
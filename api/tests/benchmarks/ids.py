@@ -0,0 +1,161 @@
+"""
+Identifiants du journal d'activité: débit d'insertion et taille des index
+d'une table calquée sur activity_logs (mêmes colonnes, mêmes cinq index),
+avec des UUID4 en CHAR(36) (avant) puis des UUIDv7 en BLOB de 16 octets
+(BinaryUUID, après).
+
+    python -m tests.benchmarks.ids --rows 1000000
+    python -m tests.benchmarks.ids --rows 10000000   # plusieurs dizaines de minutes
+
+sqlite3 directement (sans SQLAlchemy), réglages de la base de l'application
+(WAL, synchronous=NORMAL, cache par défaut), lots de --batch lignes par
+transaction; seule l'écriture est chronométrée. Tailles lues dans la table
+virtuelle dbstat.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from tests.benchmarks import report
+
+_SCHEMA = """
+CREATE TABLE activity_logs (
+    id {id_type} NOT NULL PRIMARY KEY,
+    action VARCHAR(26) NOT NULL,
+    user_id {id_type},
+    username VARCHAR(50),
+    target_type VARCHAR(50),
+    target_id {id_type},
+    details JSON,
+    ip_address VARCHAR(45),
+    user_agent VARCHAR(500),
+    created_at DATETIME
+);
+CREATE INDEX idx_activity_action ON activity_logs (action, created_at, id);
+CREATE INDEX idx_activity_user ON activity_logs (user_id, created_at, id);
+CREATE INDEX idx_activity_target ON activity_logs (target_type, target_id, created_at, id);
+CREATE INDEX idx_activity_ip ON activity_logs (ip_address, created_at, id);
+CREATE INDEX idx_activity_created ON activity_logs (created_at, id);
+"""
+
+_ACTIONS = ["LOGIN_SUCCESS", "DECLARATION_CREATED", "DECLARATION_VALIDATED", "TIP_SUBMITTED", "MESSAGE_SENT"]
+
+_INSERT = (
+    "INSERT INTO activity_logs (id, action, user_id, username, target_type, target_id, "
+    "details, ip_address, user_agent, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _uuid4_text() -> str:
+    return str(uuid.uuid4())
+
+
+def _uuid7_blob() -> bytes:
+    from app.core.ids import id_bytes, new_id
+    return id_bytes(new_id())
+
+
+# (nom, type de colonne, générateur d'identifiant)
+VARIANTS = [
+    ("UUID4 CHAR(36)", "CHAR(36)", _uuid4_text),
+    ("UUIDv7 BLOB(16)", "BLOB", _uuid7_blob),
+]
+
+
+def _insert(path: str, id_type: str, make_id, rows: int, batch: int) -> dict:
+    rng = random.Random(1)
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA.format(id_type=id_type))
+
+    # Acteurs et cibles: identifiants créés avant les lignes du journal
+    users = [(make_id(), f"moderateur{i}") for i in range(50)]
+    targets = [make_id() for _ in range(max(rows // 20, 1))]
+    created = datetime(2024, 1, 1)
+    step = timedelta(milliseconds=50)
+
+    elapsed, last_elapsed, last_rows = 0.0, 0.0, 0
+    tail_start = rows - max(rows // 10, batch)
+    done = 0
+    while done < rows:
+        size = min(batch, rows - done)
+        values = []
+        for _ in range(size):
+            user_id, username = rng.choice(users)
+            created += step
+            values.append((
+                make_id(), rng.choice(_ACTIONS), user_id, username, "declaration", rng.choice(targets),
+                '{"status": "validee"}', f"41.207.{rng.randrange(256)}.{rng.randrange(256)}",
+                "Mozilla/5.0 (Linux; Android 12)", created.isoformat(sep=" "),
+            ))
+        start = time.perf_counter()
+        conn.execute("BEGIN")
+        conn.executemany(_INSERT, values)
+        conn.execute("COMMIT")
+        spent = time.perf_counter() - start
+        elapsed += spent
+        if done >= tail_start:
+            last_elapsed += spent
+            last_rows += size
+        done += size
+
+    sizes = dict(conn.execute("SELECT name, sum(pgsize) FROM dbstat GROUP BY name"))
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return {
+        "rows_per_s": rows / elapsed,
+        "tail_rows_per_s": last_rows / last_elapsed,
+        "file": os.path.getsize(path),
+        "sizes": sizes,
+    }
+
+
+def _mib(size: int) -> str:
+    return f"{size / 2**20:,.1f} Mio"
+
+
+def run(rows: int = 1_000_000, batch: int = 10_000) -> list[tuple[str, str]]:
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="declarations-ids-") as directory:
+        for name, id_type, make_id in VARIANTS:
+            results[name] = _insert(os.path.join(directory, f"{id_type[:4]}.db"), id_type, make_id, rows, batch)
+
+    lines = [("lignes insérées", f"{rows:,} (lots de {batch:,})")]
+    for name, result in results.items():
+        sizes = result["sizes"]
+        pk = next(size for index, size in sizes.items() if index.startswith("sqlite_autoindex"))
+        lines += [
+            (f"{name}: débit", f"{result['rows_per_s']:,.0f} lignes/s"),
+            (f"{name}: débit des 10 % derniers", f"{result['tail_rows_per_s']:,.0f} lignes/s"),
+            (f"{name}: fichier", _mib(result["file"])),
+            (f"{name}: table", _mib(sizes["activity_logs"])),
+            (f"{name}: clé primaire", _mib(pk)),
+        ]
+        lines += [
+            (f"{name}: {index}", _mib(size))
+            for index, size in sorted(sizes.items()) if index.startswith("idx_")
+        ]
+    before, after = (results[name] for name, _, _ in VARIANTS)
+    lines += [
+        ("gain de débit", f"x{after['rows_per_s'] / before['rows_per_s']:.2f}"),
+        ("fichier réduit de", f"{1 - after['file'] / before['file']:.0%}"),
+    ]
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    args = parser.parse_args()
+    report("Identifiants du journal d'activité", run(args.rows, args.batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Nettoyage des champs texte (sanitize_input) sur du français réaliste,
+comparé à un appel systématique à bleach.clean, avec contrôle que les deux
+donnent le même résultat.
+
+    python -m tests.benchmarks.sanitize --texts 2000
+
+Avant: bleach.clean deux fois par champ (validateur du schéma puis route).
+Après: un seul passage, bleach seulement pour un texte avec balisage,
+entité ou caractère de contrôle.
+"""
+import argparse
+import random
+
+from tests.benchmarks import report, timed, use_temp_workdir
+
+_SENTENCES = [
+    "J'ai perdu ma sacoche en cuir noir au grand marché d'Adawlato vers 17 h.",
+    "Elle contenait ma carte d'identité, mon permis de conduire et environ 15 000 FCFA.",
+    "Le zémidjan m'a déposé près de la station Total d'Agbalépédo, je pense l'avoir oubliée là.",
+    "Téléphone Samsung Galaxy A12, coque bleue, écran fissuré dans le coin supérieur gauche.",
+    "Récompense promise à la personne qui le rapportera, merci d'avance !",
+    "Mon fils a égaré son cartable en rentrant de l'école primaire de Bè-Kpota.",
+    "Il y avait dedans ses cahiers, une trousse rouge et ses lunettes de vue.",
+    "Plainte pour vol : on m'a arraché mon sac devant la pharmacie du Boulevard, lundi soir.",
+    "Les témoins ont vu deux jeunes s'enfuir sur une moto sans plaque en direction de Tokoin.",
+    "Passeport togolais au nom de Koffi Mensah, délivré en 2019 — très urgent pour mon voyage.",
+    "Clés de maison avec un porte-clés en forme de poisson, perdues sur la plage de Lomé.",
+    "« Je l'ai posé sur le banc une minute », m'a dit ma sœur ; quand elle est revenue, il n'y était plus.",
+    "Merci de me contacter au +228 90 12 34 56 ou à l'adresse indiquée dans ma déclaration.",
+    "Montre dorée, cadeau de mariage, gravée à l'intérieur : « À Afi, pour toujours ».",
+]
+# Entrées avec balisage ou entités: bleach reste nécessaire
+_MARKUP = [
+    "Sac perdu <b>urgent</b> au marché",
+    "<script>alert('x')</script>Téléphone volé",
+    "Prix : 5 000 FCFA & récompense",
+    "Montant < 10 000 FCFA",
+    'Voir <a href="http://exemple.tg">ici</a> pour la photo',
+]
+
+
+def corpus(count: int, seed: int = 7) -> list[str]:
+    """Descriptions de 1 à 8 phrases, sauts de ligne compris (texte brut)."""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        sentences = rng.sample(_SENTENCES, rng.randint(1, 8))
+        texts.append(("\n" if rng.random() < 0.3 else " ").join(sentences))
+    return texts
+
+
+def run(texts: int = 2000) -> list[tuple[str, str]]:
+    import bleach
+
+    from app.core.security import sanitize_input
+
+    plain = corpus(texts)
+    markup = [m + " " + t for m, t in zip(_MARKUP * (texts // len(_MARKUP) + 1), plain)][:texts]
+
+    def reference(text: str) -> str:
+        return bleach.clean(text, tags=[], strip=True)[:1000].strip()
+
+    mismatches = sum(sanitize_input(t) != reference(t) for t in plain + markup)
+
+    def each(fn, batch):
+        return lambda: [fn(t) for t in batch]
+
+    fast_plain = timed(each(sanitize_input, plain)) / len(plain)
+    bleach_plain = timed(each(reference, plain)) / len(plain)
+    fast_markup = timed(each(sanitize_input, markup)) / len(markup)
+    bleach_markup = timed(each(reference, markup)) / len(markup)
+    mean_length = sum(map(len, plain)) / len(plain)
+
+    return [
+        ("textes (longueur moyenne)", f"{len(plain):,} ({mean_length:.0f} caractères)"),
+        ("texte brut: sanitize_input", f"{fast_plain * 1e6:,.1f} µs/champ"),
+        ("texte brut: bleach.clean", f"{bleach_plain * 1e6:,.1f} µs/champ"),
+        ("texte brut: avant (bleach deux fois)", f"{2 * bleach_plain * 1e6:,.1f} µs/champ"),
+        ("texte brut: gain", f"x{2 * bleach_plain / fast_plain:,.0f}"),
+        ("balisage: sanitize_input", f"{fast_markup * 1e6:,.1f} µs/champ"),
+        ("balisage: bleach.clean", f"{bleach_markup * 1e6:,.1f} µs/champ"),
+        ("résultats différents de bleach", f"{mismatches}/{len(plain) + len(markup)}"),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--texts", type=int, default=2000)
+    args = parser.parse_args()
+    use_temp_workdir()
+    report("Nettoyage des champs texte", run(args.texts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Sérialisation d'une page de 100 éléments de /declarations/public: chemin
+d'avant (objets DeclarationPublicResponse, revalidation par response_model
+puis JSONResponse) comparé aux dictionnaires de lignes renvoyés par
+ORJSONResponse (page_response), et requête complète.
+
+    python -m tests.benchmarks.serialization --per-page 100
+"""
+import argparse
+import asyncio
+from datetime import datetime
+
+import orjson
+
+from tests.benchmarks import admin_client, create_declarations, report, timed, use_temp_workdir
+
+PUBLIC_PATH = "/api/v1/declarations/public"
+
+
+def _rows(items: list[dict]) -> list[dict]:
+    """Éléments JSON remis sous la forme de row_dicts (dates et énumérations typées)."""
+    from app.models.declaration import DeclarationPriority, DeclarationStatus, DeclarationType
+
+    rows = []
+    for item in items:
+        row = dict(item)
+        row["type"] = DeclarationType(row["type"])
+        row["status"] = DeclarationStatus(row["status"])
+        row["priority"] = DeclarationPriority(row["priority"])
+        for key in ("created_at", "incident_date"):
+            if row[key] is not None:
+                row[key] = datetime.fromisoformat(row[key])
+        rows.append(row)
+    return rows
+
+
+def run(client, headers, per_page: int = 100) -> list[tuple[str, str]]:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+
+    from app.api.responses import page_response
+    from app.main import app
+    from app.schemas.declaration import DeclarationListResponse, DeclarationPublicResponse
+
+    ids = create_declarations(client, headers, per_page)
+    client.patch(
+        "/api/v1/declarations/admin/bulk", headers=headers, json={"ids": ids, "status": "validee"},
+    ).raise_for_status()
+
+    r = client.get(PUBLIC_PATH, params={"per_page": per_page})
+    r.raise_for_status()
+    page = r.json()
+    rows = _rows(page["items"])
+    total = page["total"]
+
+    # Champ de réponse de la route, tel que FastAPI l'utilise pour response_model
+    route = next(route for route in app.routes if getattr(route, "path", None) == PUBLIC_PATH)
+    loop = asyncio.new_event_loop()
+
+    def before() -> bytes:
+        content = DeclarationListResponse(
+            items=[DeclarationPublicResponse(**row) for row in rows],
+            total=total, page=1, per_page=per_page, pages=(total + per_page - 1) // per_page,
+        )
+        data = loop.run_until_complete(serialize_response(field=route.response_field, response_content=content))
+        return JSONResponse(data).body
+
+    def after() -> bytes:
+        return page_response(rows, total, 1, per_page).body
+
+    def content(body: bytes) -> dict:
+        # Le modèle ajoute description_preview (null), absent sans fields=
+        data = orjson.loads(body)
+        for item in data["items"]:
+            item.pop("description_preview", None)
+        return data
+
+    try:
+        same = content(before()) == content(after())
+        old = timed(before, repeat=7, number=20)
+        new = timed(after, repeat=7, number=20)
+    finally:
+        loop.close()
+    request = timed(lambda: client.get(PUBLIC_PATH, params={"per_page": per_page}), repeat=7, number=10)
+
+    return [
+        ("éléments par page", f"{len(rows)}"),
+        ("même contenu JSON", "oui" if same else "non"),
+        ("avant: modèles + response_model + json", f"{old * 1000:,.2f} ms/page"),
+        ("après: dictionnaires + orjson", f"{new * 1000:,.3f} ms/page"),
+        ("gain sur la sérialisation", f"x{old / new:,.0f}"),
+        ("requête complète (TestClient)", f"{request * 1000:,.2f} ms"),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--per-page", type=int, default=100)
+    args = parser.parse_args()
+    use_temp_workdir()
+    with admin_client() as (client, headers):
+        report("Sérialisation de /declarations/public", run(client, headers, args.per_page))
+
+
+if __name__ == "__main__":
+    main()
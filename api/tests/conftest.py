@@ -0,0 +1,119 @@
+"""
+Configuration des tests: l'application est servie par TestClient sur une
+base SQLite temporaire. Les chemins de données (./data) étant relatifs,
+les tests s'exécutent dans un répertoire de travail isolé, choisi avant le
+premier import de l'application.
+"""
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta, timezone
+from itertools import cycle
+
+os.chdir(tempfile.mkdtemp(prefix="declarations-tests-"))
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "1000000")
+os.environ.setdefault("RATE_LIMIT_PER_HOUR", "1000000")
+os.environ.setdefault("STATS_CACHE_SECONDS", "0")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+from app.core.database import AsyncSessionLocal, engine
+from app.core.ids import new_id
+from app.main import app
+from app.models.declaration import (
+    PRIORITY_RANK,
+    Declaration,
+    DeclarationPriority,
+    DeclarationStatus,
+    DeclarationType,
+)
+from app.services.categories import resolve_categories
+
+ADMIN = {"username": "admin1", "email": "admin1@example.com", "password": "Passw0rd!Passw0rd"}
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    """Premier compte créé: administrateur."""
+    r = client.post("/api/v1/auth/register", json=ADMIN)
+    assert r.status_code == 201, r.text
+    r = client.post("/api/v1/auth/login", json={"username": ADMIN["username"], "password": ADMIN["password"]})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def run_db(client):
+    """Exécute fn(db) dans la boucle de l'application, avec sa propre session."""
+    async def call(fn):
+        async with AsyncSessionLocal() as db:
+            return await fn(db)
+
+    return lambda fn: client.portal.call(call, fn)
+
+
+@pytest.fixture
+def captured_sql():
+    """Instructions SQL (texte, paramètres) exécutées pendant le test."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+def query_plan(run_db, statement: str, parameters) -> list[str]:
+    """Détail de EXPLAIN QUERY PLAN pour une instruction capturée."""
+    async def explain(db):
+        conn = await db.connection()
+        result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in result]
+
+    return run_db(explain)
+
+
+async def insert_declarations(db, count: int, category: str = "Téléphone", **values) -> list[str]:
+    """
+    Insère `count` déclarations en une instruction (priorités alternées,
+    dates décroissantes). Retourne leurs identifiants.
+    """
+    category_id = (await resolve_categories(db, [category]))[category]
+    priorities = cycle(DeclarationPriority)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(count):
+        priority = next(priorities)
+        row = {
+            "id": new_id(),
+            "tracking_code": f"T{random.getrandbits(64):016X}"[:20],
+            "type": DeclarationType.PERTE,
+            "category": category,
+            "category_id": category_id,
+            "description": f"Déclaration de test numéro {i}",
+            "location": "Grand marché, Lomé",
+            "status": DeclarationStatus.EN_ATTENTE,
+            "priority": priority,
+            "priority_rank": PRIORITY_RANK[priority],
+            "attachments": [],
+            "metadata_": {},
+            "created_at": now - timedelta(minutes=i),
+        }
+        row.update(values)
+        if "priority" in values:
+            row["priority_rank"] = PRIORITY_RANK[values["priority"]]
+        rows.append(row)
+    await db.execute(insert(Declaration), rows)
+    await db.commit()
+    return [row["id"] for row in rows]
@@ -0,0 +1,62 @@
+"""Journal d'activité: chaque combinaison de filtres est servie par un index."""
+import itertools
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.models.activity_log import ActivityAction
+from app.services.activity_logs import (
+    ActivityLogFilters,
+    build_activity_query,
+    choose_index,
+    encode_cursor,
+)
+
+from tests.conftest import query_plan
+
+EQUALITIES = {
+    "action": {"action": next(iter(ActivityAction))},
+    "user": {"user_id": str(uuid.uuid4())},
+    "target": {"target_type": "declaration", "target_id": str(uuid.uuid4())},
+    "target_type": {"target_type": "declaration"},
+    "ip": {"ip_address": "203.0.113.7"},
+}
+
+# Combinaisons distinctes (target inclut déjà target_type)
+COMBINATIONS = [
+    combo
+    for n in range(len(EQUALITIES) + 1)
+    for combo in itertools.combinations(EQUALITIES, n)
+    if not {"target", "target_type"} <= set(combo)
+]
+
+
+@pytest.mark.parametrize("period", [False, True], ids=["all-time", "period"])
+@pytest.mark.parametrize("with_cursor", [False, True], ids=["first-page", "next-page"])
+def test_no_table_scan_for_any_filter_combination(client, run_db, captured_sql, period, with_cursor):
+    cursor = encode_cursor(datetime(2024, 1, 15), str(uuid.uuid4())) if with_cursor else None
+    for combo in COMBINATIONS:
+        values = {}
+        for name in combo:
+            values.update(EQUALITIES[name])
+        if period:
+            values.update(date_from=datetime(2024, 1, 1), date_to=datetime(2024, 2, 1))
+        filters = ActivityLogFilters(**values)
+        query = build_activity_query(filters, 50, cursor)
+
+        captured_sql.clear()
+        run_db(lambda db: db.execute(query))
+        statement, parameters = captured_sql[-1]
+        plan = query_plan(run_db, statement, parameters)
+
+        index = choose_index(filters)
+        assert len(plan) == 1, (combo, plan)
+        assert f"USING INDEX {index}" in plan[0], (combo, plan)
+        assert "TEMP B-TREE" not in plan[0], (combo, plan)
+        if period or with_cursor or index != "idx_activity_created":
+            assert plan[0].startswith("SEARCH activity_logs"), (combo, plan)
+        else:
+            # Sans filtre sélectif ni borne: parcours de l'index chronologique
+            # arrêté par LIMIT, jamais un parcours de la table
+            assert plan[0] == "SCAN activity_logs USING INDEX idx_activity_created", (combo, plan)
@@ -0,0 +1,70 @@
+"""Sauvegarde à chaud: copie incrémentale et écritures concurrentes."""
+import gzip
+import sqlite3
+import threading
+
+import pytest
+
+from app.services.backup import create_snapshot
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "source.db"
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE logs (id INTEGER PRIMARY KEY, payload BLOB)")
+    conn.executemany("INSERT INTO logs (payload) VALUES (?)", [(b"x" * 1000,)] * 2000)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _rows(archive) -> int:
+    snapshot = archive.with_name("restored.db")
+    with gzip.open(archive, "rb") as src:
+        snapshot.write_bytes(src.read())
+    conn = sqlite3.connect(snapshot)
+    try:
+        assert conn.execute("PRAGMA quick_check").fetchone()[0] == "ok"
+        return conn.execute("SELECT count(*) FROM logs").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_backup_copies_in_steps_without_writes(database, tmp_path):
+    report = create_snapshot(database, tmp_path, pages_per_step=16, step_pause=0, max_restarts=3)
+
+    assert report["steps"] > 10
+    assert report["restarts"] == 0
+    assert not report["single_step"]
+    assert _rows(tmp_path / report["filename"]) == 2000
+
+
+def test_backup_finishes_under_concurrent_writes(database, tmp_path):
+    """Une écriture à chaque étape: la copie reprend sans fin sans la copie en une étape."""
+    started, stop = threading.Event(), threading.Event()
+    written = []
+
+    def writer():
+        conn = sqlite3.connect(database, isolation_level=None, check_same_thread=False)
+        try:
+            while not stop.is_set():
+                conn.execute("INSERT INTO logs (payload) VALUES (?)", (b"y" * 100,))
+                written.append(1)
+                started.set()
+        finally:
+            conn.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        started.wait(5)
+        report = create_snapshot(database, tmp_path, pages_per_step=16, step_pause=0.005, max_restarts=2)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert report["restarts"] == 3
+    assert report["single_step"]
+    assert 2000 < _rows(tmp_path / report["filename"]) <= 2000 + len(written)
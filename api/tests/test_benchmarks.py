@@ -0,0 +1,33 @@
+"""Benchmarks (tests/benchmarks) exécutés à petite échelle: ils restent exécutables."""
+from tests.benchmarks import bulk_moderation, duplicates, file_serving, ids, sanitize, serialization
+
+
+def test_file_serving_benchmark_runs(client, admin_headers):
+    rows = file_serving.run(client, admin_headers, files=2, requests=4)
+    assert len(rows) == 7
+
+
+def test_bulk_moderation_benchmark_runs(client, admin_headers):
+    rows = bulk_moderation.run(client, admin_headers, count=3)
+    assert len(rows) == 6
+
+
+def test_duplicates_benchmark_runs():
+    rows = dict(duplicates.run(size=300, texts=20, lookups=20))
+    assert rows["variantes retrouvées (similarité >= 0,6)"] == "20/20"
+
+
+def test_sanitize_benchmark_runs():
+    rows = dict(sanitize.run(texts=20))
+    assert rows["résultats différents de bleach"] == "0/40"
+
+
+def test_serialization_benchmark_runs(client, admin_headers):
+    rows = dict(serialization.run(client, admin_headers, per_page=5))
+    assert rows["même contenu JSON"] == "oui"
+
+
+def test_ids_benchmark_runs():
+    rows = ids.run(rows=2000, batch=500)
+    # Par variante: débits, fichier, table, clé primaire et cinq index
+    assert len(rows) == 1 + 2 * 10 + 2
@@ -0,0 +1,51 @@
+"""Export en flux: mémoire bornée quelle que soit la taille de la table."""
+import tracemalloc
+
+from app.models.declaration import DeclarationStatus
+from app.services.export import (
+    EXPORT_BATCH_SIZE,
+    EXPORT_DATASETS,
+    build_export_query,
+    ndjson_chunks,
+    resolve_columns,
+)
+
+from tests.conftest import insert_declarations
+
+ROWS = 40_000
+DESCRIPTION = "Sac à dos noir perdu près de la gare routière. " * 40  # ~2 Ko
+
+
+def test_streaming_export_memory_stays_bounded(client, run_db):
+    async def seed(db):
+        for _ in range(ROWS // 5000):
+            await insert_declarations(
+                db, 5000, category="Sac", status=DeclarationStatus.REJETEE, description=DESCRIPTION,
+            )
+
+    run_db(seed)
+
+    dataset = EXPORT_DATASETS["declarations"]
+    columns = resolve_columns(dataset, None)
+    query = build_export_query(dataset, columns, {"status": DeclarationStatus.REJETEE})
+
+    async def export() -> tuple[int, int, int]:
+        rows = size = 0
+        tracemalloc.start()
+        try:
+            async for chunk in ndjson_chunks(query, columns):
+                rows += chunk.count(b"\n")
+                size += len(chunk)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return rows, size, peak
+
+    rows, size, peak = client.portal.call(export)
+
+    assert rows == ROWS
+    assert size > 80 * 1024 * 1024
+    # Quelques lots en mémoire (lecture, sérialisation, envoi), jamais la table
+    batch_bytes = size // ROWS * EXPORT_BATCH_SIZE
+    assert peak < 8 * batch_bytes, (peak, batch_bytes)
+    assert peak < size // 4, (peak, size)
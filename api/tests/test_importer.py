@@ -0,0 +1,62 @@
+"""Import en masse: index en mémoire mis à jour seulement pour les lots validés."""
+import json
+
+from app.models.declaration import DeclarationStatus, DeclarationType
+from app.services import importer
+from app.services.matching import match_index
+from app.services.suggestions import suggestion_indexes
+
+IMPORT = "/api/v1/admin/import/declarations"
+
+
+def _ndjson(location: str, count: int) -> bytes:
+    return "".join(
+        json.dumps({
+            "type": DeclarationType.PERTE.value,
+            "category": "Portefeuille",
+            "description": f"Portefeuille marron perdu, numéro {i}",
+            "location": location,
+            "status": DeclarationStatus.VALIDEE.value,
+        }) + "\n"
+        for i in range(count)
+    ).encode()
+
+
+def _import(client, headers, data: bytes) -> dict:
+    r = client.post(IMPORT, headers=headers, files={"file": ("lot.ndjson", data, "application/x-ndjson")})
+    assert r.status_code in (200, 201, 202), r.text
+    r = client.get(f"/api/v1/admin/import/jobs/{r.json()['id']}", headers=headers)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _location_count(location: str) -> int:
+    return dict(suggestion_indexes["location"].suggest(location, 5)).get(location, 0)
+
+
+def test_failed_batch_leaves_in_memory_indexes_untouched(client, admin_headers, monkeypatch):
+    insert_declarations = importer._insert_declarations
+
+    async def insert_then_fail(db, job, rows):
+        await insert_declarations(db, job, rows)
+        raise RuntimeError("échec avant la validation du lot")
+
+    monkeypatch.setattr(importer, "_insert_declarations", insert_then_fail)
+    indexed = len(match_index)
+
+    job = _import(client, admin_headers, _ndjson("Zongo Nord", 3))
+
+    assert job["status"] == "failed"
+    assert len(match_index) == indexed
+    assert _location_count("Zongo Nord") == 0
+
+
+def test_committed_batch_is_indexed(client, admin_headers):
+    indexed = len(match_index)
+
+    job = _import(client, admin_headers, _ndjson("Zongo Sud", 3))
+
+    assert job["status"] == "completed", job
+    assert job["rows_inserted"] == 3
+    assert len(match_index) == indexed + 3
+    assert _location_count("Zongo Sud") == 3
@@ -0,0 +1,87 @@
+"""Modération: mises à jour groupées et file de travail."""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, update
+
+from app.core.ids import new_id
+from app.models.declaration import Declaration, DeclarationPriority
+from app.models.tip import Tip
+
+from tests.conftest import insert_declarations
+
+
+def _variants(declaration_id: str) -> list[str]:
+    """Formes acceptées par BinaryUUID pour un même identifiant."""
+    return [declaration_id.upper(), uuid.UUID(declaration_id).hex, declaration_id]
+
+
+def test_bulk_declarations_normalize_ids(client, admin_headers, run_db):
+    first, second = run_db(lambda db: insert_declarations(db, 2, priority=DeclarationPriority.BASSE))
+    unknown = str(uuid.uuid4())
+
+    r = client.patch(
+        "/api/v1/declarations/admin/bulk",
+        headers=admin_headers,
+        json={
+            "ids": _variants(first) + [second.upper(), "pas-un-uuid", unknown],
+            "priority": DeclarationPriority.URGENTE.value,
+        },
+    )
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["results"] == [
+        {"id": first, "result": "updated"},
+        {"id": second, "result": "updated"},
+        {"id": "pas-un-uuid", "result": "not_found"},
+        {"id": unknown, "result": "not_found"},
+    ]
+    assert body["updated"] == 2
+
+
+def test_bulk_tips_normalize_ids(client, admin_headers, run_db):
+    async def seed(db):
+        declaration_id = (await insert_declarations(db, 1))[0]
+        tip_id = new_id()
+        await db.execute(insert(Tip), [{
+            "id": tip_id,
+            "declaration_id": declaration_id,
+            "description": "Vu près de la station de taxis",
+            "attachments": [],
+            "metadata_": {},
+        }])
+        await db.commit()
+        return tip_id
+
+    tip_id = run_db(seed)
+
+    r = client.patch(
+        "/api/v1/tips/admin/bulk",
+        headers=admin_headers,
+        json={"ids": _variants(tip_id), "is_useful": True},
+    )
+    assert r.status_code == 200, r.text
+    assert r.json() == {"results": [{"id": tip_id, "result": "updated"}], "updated": 1}
+
+
+def test_lapsed_lease_cannot_be_renewed(client, admin_headers, run_db):
+    run_db(lambda db: insert_declarations(db, 1, priority=DeclarationPriority.URGENTE))
+    r = client.post("/api/v1/declarations/admin/queue/claim", headers=admin_headers)
+    assert r.status_code == 200, r.text
+    declaration_id = r.json()["declaration"]["id"]
+    renew = f"/api/v1/declarations/admin/queue/{declaration_id}/renew"
+
+    assert client.post(renew, headers=admin_headers).status_code == 200
+
+    async def expire(db):
+        await db.execute(
+            update(Declaration)
+            .where(Declaration.id == declaration_id)
+            .values(claim_expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+        )
+        await db.commit()
+
+    run_db(expire)
+    r = client.post(renew, headers=admin_headers)
+    assert r.status_code == 409
+    assert r.json()["detail"] == "Bail expiré ou déclaration non réservée par vous"
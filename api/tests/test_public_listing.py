@@ -0,0 +1,40 @@
+"""Liste publique: tri par urgence servi par idx_declaration_public."""
+from app.models.declaration import PRIORITY_RANK, DeclarationPriority, DeclarationStatus
+
+from tests.conftest import insert_declarations, query_plan
+
+
+def _rank(item: dict) -> int:
+    return PRIORITY_RANK[DeclarationPriority(item["priority"])]
+
+
+def test_public_listing_ordered_by_priority_then_date(client, run_db):
+    run_db(lambda db: insert_declarations(db, 40, category="Sac", status=DeclarationStatus.VALIDEE))
+
+    r = client.get("/api/v1/declarations/public", params={"category": "Sac", "per_page": 100})
+    assert r.status_code == 200, r.text
+    items = r.json()["items"]
+    assert len(items) == 40
+
+    keys = [(_rank(item), item["created_at"]) for item in items]
+    assert keys == sorted(keys, reverse=True)
+    # Urgente en tête, pas l'ordre alphabétique des noms d'énumération
+    assert items[0]["priority"] == DeclarationPriority.URGENTE.value
+    assert items[-1]["priority"] == DeclarationPriority.BASSE.value
+
+
+def test_public_listing_plan_has_no_temp_btree(client, run_db, captured_sql):
+    run_db(lambda db: insert_declarations(db, 20, status=DeclarationStatus.VALIDEE))
+
+    for params in ({}, {"category": "Téléphone"}, {"page": 2, "per_page": 5}):
+        captured_sql.clear()
+        r = client.get("/api/v1/declarations/public", params=params)
+        assert r.status_code == 200, r.text
+
+        statement, parameters = next(
+            (s, p) for s, p in captured_sql if "ORDER BY" in s and "FROM declarations" in s
+        )
+        plan = query_plan(run_db, statement, parameters)
+        assert not any("TEMP B-TREE" in line for line in plan), plan
+        if "category" not in params:
+            assert any("idx_declaration_public" in line for line in plan), plan
@@ -0,0 +1,95 @@
+"""Uploads reprenables: reprise après coupure, finalisation unique."""
+import asyncio
+import base64
+import hashlib
+import io
+import os
+
+import httpx
+from PIL import Image
+
+from app.api.routes.files import UPLOAD_DIR
+from app.main import app
+
+UPLOADS = "/api/v1/files/uploads"
+CHUNK_HEADERS = {"Content-Type": "application/offset+octet-stream"}
+
+
+def _png(size: int = 64) -> bytes:
+    buffer = io.BytesIO()
+    Image.frombytes("RGB", (size, size), os.urandom(size * size * 3)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _create_session(client, data: bytes) -> str:
+    r = client.post(UPLOADS, json={"filename": "photo.png", "content_type": "image/png", "size": len(data)})
+    assert r.status_code == 201, r.text
+    return r.json()["id"]
+
+
+def _patch(client, session_id: str, offset: int, chunk: bytes, checksum: bytes = None):
+    headers = {**CHUNK_HEADERS, "Upload-Offset": str(offset)}
+    digest = hashlib.sha256(checksum if checksum is not None else chunk).digest()
+    headers["Upload-Checksum"] = f"sha256 {base64.b64encode(digest).decode()}"
+    return client.patch(f"{UPLOADS}/{session_id}", content=chunk, headers=headers)
+
+
+def test_interrupted_transfer_resumes_from_server_offset(client):
+    data = _png()
+    half = len(data) // 2
+    session_id = _create_session(client, data)
+
+    assert _patch(client, session_id, 0, data[:half]).status_code == 204
+    # Bloc tronqué par la coupure: checksum du bloc complet, rien n'est écrit
+    r = _patch(client, session_id, half, data[half:half + 10], checksum=data[half:])
+    assert r.status_code == 460
+    # Finalisation prématurée refusée, session conservée
+    assert client.post(f"{UPLOADS}/{session_id}/finalize").status_code == 409
+
+    r = client.head(f"{UPLOADS}/{session_id}")
+    assert r.status_code == 200
+    offset = int(r.headers["Upload-Offset"])
+    assert offset == half
+    # Reprise à un mauvais offset refusée
+    assert _patch(client, session_id, 0, data).status_code == 409
+    assert _patch(client, session_id, offset, data[offset:]).status_code == 204
+
+    r = client.post(f"{UPLOADS}/{session_id}/finalize")
+    # Image: réponse avant l'optimisation, publiée ensuite
+    assert r.status_code == 202, r.text
+    assert r.json()["processing"]
+    stored = client.get(r.json()["url"])
+    assert stored.status_code == 200
+    assert stored.headers["etag"] == f'"{hashlib.sha256(stored.content).hexdigest()}"'
+    assert client.head(f"{UPLOADS}/{session_id}").status_code == 404
+
+
+def test_concurrent_finalize_stores_the_file_once(client):
+    data = _png()
+    session_id = _create_session(client, data)
+    assert _patch(client, session_id, 0, data).status_code == 204
+    before = set(os.listdir(UPLOAD_DIR))
+
+    async def finalize_twice():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await asyncio.gather(
+                ac.post(f"{UPLOADS}/{session_id}/finalize"),
+                ac.post(f"{UPLOADS}/{session_id}/finalize"),
+            )
+
+    responses = client.portal.call(finalize_twice)
+    assert sorted(r.status_code for r in responses) == [202, 404]
+    assert len(set(os.listdir(UPLOAD_DIR)) - before) == 1
+
+
+def test_non_numeric_content_length_is_rejected(client):
+    data = _png()
+    session_id = _create_session(client, data)
+    r = client.patch(
+        f"{UPLOADS}/{session_id}",
+        content=data,
+        headers={**CHUNK_HEADERS, "Upload-Offset": "0", "Content-Length": "abc"},
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Content-Length invalide"
@@ -0,0 +1,29 @@
+"""Suivi public: historique des statuts horodaté en UTC explicite."""
+from datetime import datetime, timezone
+
+DECLARATION = {
+    "type": "perte",
+    "category": "Téléphone",
+    "description": "Téléphone Samsung perdu au grand marché de Lomé",
+    "location": "Grand marché, Lomé",
+    "captcha_answer": 3,
+    "captcha_expected": 3,
+}
+
+
+def test_track_history_timestamps_are_utc(client):
+    r = client.post("/api/v1/declarations/", json=DECLARATION)
+    assert r.status_code == 201, r.text
+    tracking_code = r.json()["tracking_code"]
+    # Réponse de création: événement encore en mémoire
+    assert datetime.fromisoformat(r.json()["status_history"][0]["timestamp"]).utcoffset() is not None
+
+    # Suivi: événements relus depuis SQLite (dates naïves)
+    r = client.get(f"/api/v1/declarations/track/{tracking_code}")
+    assert r.status_code == 200, r.text
+    history = r.json()["status_history"]
+    assert history
+    for entry in history:
+        timestamp = datetime.fromisoformat(entry["timestamp"])
+        assert timestamp.utcoffset() is not None and timestamp.utcoffset().total_seconds() == 0, entry
+        assert abs((datetime.now(timezone.utc) - timestamp).total_seconds()) < 60
@@ -0,0 +1,61 @@
+"""Upload direct: optimisation des images en arrière-plan, publication ensuite."""
+import hashlib
+import io
+import os
+import uuid
+
+from PIL import Image
+
+from app.api.routes.files import UPLOAD_DIR
+
+UPLOAD = "/api/v1/files/upload"
+
+
+def _jpeg_with_exif() -> bytes:
+    exif = Image.Exif()
+    exif[0x010F] = "Appareil du déclarant"  # Make
+    exif[0x0132] = "2024:05:01 10:00:00"  # DateTime
+    buffer = io.BytesIO()
+    Image.frombytes("RGB", (64, 64), os.urandom(64 * 64 * 3)).save(buffer, "JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+def test_image_is_answered_before_optimization_then_published_without_exif(client):
+    r = client.post(UPLOAD, files={"file": ("photo.jpg", _jpeg_with_exif(), "image/jpeg")})
+    assert r.status_code == 202, r.text
+    body = r.json()
+    assert body["processing"]
+    assert body["file_id"] is None and body["size"] is None
+
+    # Tâche d'arrière-plan terminée: fichier publié sous le nom annoncé
+    stored = client.get(body["url"])
+    assert stored.status_code == 200
+    assert not Image.open(io.BytesIO(stored.content)).getexif()
+    assert stored.headers["etag"] == f'"{hashlib.sha256(stored.content).hexdigest()}"'
+    assert not (UPLOAD_DIR / f"{body['filename']}.tmp").exists()
+
+
+def test_pending_upload_answers_202_until_published(client):
+    name = f"20240501_{uuid.uuid4().hex}.jpg"
+    pending = UPLOAD_DIR / f"{name}.tmp"
+    pending.write_bytes(_jpeg_with_exif())
+    try:
+        r = client.get(f"/api/v1/files/{name}")
+        assert r.status_code == 202
+        assert r.headers["retry-after"] == "1"
+        assert r.headers["cache-control"] == "no-store"
+    finally:
+        pending.unlink()
+    assert client.get(f"/api/v1/files/{name}").status_code == 404
+
+
+def test_unreadable_image_is_never_published(client):
+    # En-tête PNG valide (type détecté), contenu impossible à décoder
+    data = b"\x89PNG\r\n\x1a\n" + b"\x00\x00\x00\rIHDR" + os.urandom(2048)
+    r = client.post(UPLOAD, files={"file": ("photo.png", data, "image/png")})
+    assert r.status_code == 202, r.text
+    name = r.json()["filename"]
+
+    assert client.get(r.json()["url"]).status_code == 404
+    assert not (UPLOAD_DIR / name).exists()
+    assert not (UPLOAD_DIR / f"{name}.tmp").exists()